@@ -1,7 +1,9 @@
 from smash.board import Board, START_POSITION
+from smash.bitboard import BitBoard
 from smash.move import Move
 
 # pyflakes workaround
 Board
+BitBoard
 START_POSITION
 Move
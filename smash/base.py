@@ -1,14 +1,23 @@
+from array import array
 from contextlib import contextmanager
-from collections import namedtuple
 
 import numpy as np
 
+from smash.evaluate import PSQ_MG, PSQ_EG, PIECE_PHASE, compute_psq
+
+try:
+    from smash.movetables import \
+        zobrist_piece, zobrist_en_passant, zobrist_castling, zobrist_stm
+except ImportError:
+    pass
+
 
 pieces = ' PNBRQK pnbrqk'
 squares = [''.join([c, r]) for r in '12345678' for c in 'abcdefgh']
 squares = {label: idx for idx, label in enumerate(squares)}
 squares_inv = {idx: label for label, idx in squares.iteritems()}
 sides = 'wb'
+PIECE_SIDE = dict([(p, 'w') for p in 'PNBRQK'] + [(p, 'b') for p in 'pnbrqk'])
 
 
 def is_black(x):
@@ -45,12 +54,68 @@ def pair2square(r, c):
 START_POSITION = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
 EN_PASSANT_CAPTURES = {pair2square(5, c): pair2square(4, c) for c in range(8)}
 EN_PASSANT_CAPTURES.update({pair2square(2, c): pair2square(3, c) for c in range(8)})
+# the pawn that can capture en passant and its squares by en passant square
+EN_PASSANT_ATTACKERS = {}
+for _c in range(8):
+    EN_PASSANT_ATTACKERS[pair2square(5, _c)] = (
+        'P', [pair2square(4, _f) for _f in (_c - 1, _c + 1) if 0 <= _f < 8])
+    EN_PASSANT_ATTACKERS[pair2square(2, _c)] = (
+        'p', [pair2square(3, _f) for _f in (_c - 1, _c + 1) if 0 <= _f < 8])
+
+# piece codes by the ascii code of the pieces
+PACKED_CODES = np.zeros(256, dtype=np.int8)
+for _code, _p in enumerate(pieces):
+    if _p != ' ':
+        PACKED_CODES[ord(_p)] = _code
+
+# castling rights are stored as a 4 bits integer
+CASTLING_BITS = {'K': 1, 'Q': 2, 'k': 4, 'q': 8}
+
+# rights lost when a piece moves from or to a square
+CASTLING_MASKS = [0] * 64
+CASTLING_MASKS[squares['a1']] = CASTLING_BITS['Q']
+CASTLING_MASKS[squares['h1']] = CASTLING_BITS['K']
+CASTLING_MASKS[squares['e1']] = CASTLING_BITS['K'] | CASTLING_BITS['Q']
+CASTLING_MASKS[squares['a8']] = CASTLING_BITS['q']
+CASTLING_MASKS[squares['h8']] = CASTLING_BITS['k']
+CASTLING_MASKS[squares['e8']] = CASTLING_BITS['k'] | CASTLING_BITS['q']
+
+# rook (src, dst) by king destination of a castling move
+CASTLING_ROOKS = {
+    squares['c1']: (squares['a1'], squares['d1']),
+    squares['g1']: (squares['h1'], squares['f1']),
+    squares['c8']: (squares['a8'], squares['d8']),
+    squares['g8']: (squares['h8'], squares['f8']),
+    }
+
+# zobrist keys for every combination of castling rights
+zobrist_castling_rights = [0] * 16
+for _rights in range(16):
+    for _c, _bit in CASTLING_BITS.iteritems():
+        if _rights & _bit:
+            zobrist_castling_rights[_rights] ^= zobrist_castling[_c]
+
+# initial capacity of the undo history (it grows when needed)
+HISTORY_SIZE = 512
 
 
 class BaseBoard(object):
+    # when set, the incremental hash keys and evaluation totals are checked
+    # against a full recompute after every move and undo
+    debug = False
+
     def __init__(self, fen=START_POSITION):
         self._board = board = np.empty(64, dtype='c')
         board[:] = ' '
+        self._pieces = {'w': set(), 'b': set()}
+        self._kings = {'w': None, 'b': None}
+        # material and piece square scores (see `smash.evaluate`) and the
+        # zobrist key of the pawns only
+        self._mg = self._eg = self._phase = 0
+        self._pawnkey = 0
+        # the network and its accumulators (see `set_nnue`)
+        self._nnue = None
+        self._acc = None
         i = 0
         pieces, stm, castling, en_passant, rule50, movecnt = fen.split()
         for p in pieces:
@@ -62,25 +127,34 @@ class BaseBoard(object):
             r, c = rank(i), col(i)
             sq = pair2square(7-r, c)
             i += 1
-            board[sq] = p
+            self._add_piece(sq, p)
 
         self._stm = stm
 
-        self._castling = {'K': 0, 'Q': 0, 'k': 0, 'q': 0}
+        self._castling = 0
         if castling != '-':
             for c in castling:
                 assert c in 'KQkq'
-                self._castling[c] = 1
+                self._castling |= CASTLING_BITS[c]
 
         self._en_passant = squares.get(en_passant, None)
         self._rule50 = int(rule50)
         self._movecnt = int(movecnt)
         self._checked = self._is_checked()
-        self._set_hashkey()
-
-        self._history = [TransitionStatus(None, self.castling.copy(),
-                                          self._en_passant, self._rule50,
-                                          self._checked, self._hashkey, True)]
+        self._hashkey = self._compute_hashkey()
+
+        # the history is stored in preallocated columns indexed by ply,
+        # each entry is the status after the (encoded) move
+        self._ply = 0
+        self._hist_move = array('i', [0]) * HISTORY_SIZE
+        self._hist_castling = array('i', [0]) * HISTORY_SIZE
+        self._hist_en_passant = array('i', [0]) * HISTORY_SIZE
+        self._hist_rule50 = array('i', [0]) * HISTORY_SIZE
+        self._hist_checked = array('b', [0]) * HISTORY_SIZE
+        # the keys are 64 bits on every platform
+        self._hist_hashkey = np.zeros(HISTORY_SIZE, dtype=np.int64)
+        self._hist_irreversible = array('b', [0]) * HISTORY_SIZE
+        self._store_status(0, 0, True)
 
     def __str__(self):
         lines = []
@@ -108,8 +182,8 @@ class BaseBoard(object):
         out = ['/'.join(out)]
 
         out.append(self.stm)
-        if any(self.castling.values()):
-            out.append(''.join(p for p in 'KQkq' if self.castling[p]))
+        if self._castling:
+            out.append(''.join(p for p in 'KQkq' if self._castling & CASTLING_BITS[p]))
         else:
             out.append('-')
 
@@ -122,130 +196,240 @@ class BaseBoard(object):
         return ' '.join(out)
 
     def move(self, m):
-        irreversible = False
+        """Make the move `m` (an encoded move, see `smash.move`)"""
+
         b = self.raw
-        p = b[m.dst] = b[m.src]
-        b[m.src] = ' '
+        key = self._hashkey
+        src = m & 0x3f
+        dst = m >> 6 & 0x3f
+        promote = m >> 12 & 0xf
+        p = b[src]
+        captured = b[dst]
 
         old_en_passant = self._en_passant
         self._en_passant = None
-        
-        if m.promote:
-            b[m.dst] = m.promote
-
-        # check if rook or king moved and set castling values
-        if p in 'Rr':
-            castling_side = {(0, 'w'): 'Q',
-                             (56, 'b'): 'q',
-                             (7, 'w'): 'K',
-                             (63, 'b'): 'k'}.get((m.src, self.stm), None)
-            if castling_side and self._castling[castling_side]:
-                self._castling[castling_side] = 0
-                irreversible = True
-        elif p in 'Kk':
-            if self.stm == 'w':
-                castling_sides = 'KQ'
-            else:
-                castling_sides = 'kq'
-            
-            if self._castling[castling_sides[0]] or self._castling[castling_sides[1]]:
-                self._castling[castling_sides[0]] = 0
-                self._castling[castling_sides[1]] = 0
-                irreversible = True
+        if old_en_passant is not None:
+            key ^= self._en_passant_key(old_en_passant)
+
+        key ^= zobrist_piece[p][src]
+        if captured != ' ':
+            self._remove_piece(dst)
+            key ^= zobrist_piece[captured][dst]
+
+        if promote:
+            promote = pieces[promote]
+            self._remove_piece(src)
+            self._add_piece(dst, promote)
+            key ^= zobrist_piece[promote][dst]
+        else:
+            self._move_piece(src, dst)
+            key ^= zobrist_piece[p][dst]
+
+        # moving from or to a king/rook initial square loses castling rights
+        castling = self._castling
+        irreversible = castling & (CASTLING_MASKS[src] | CASTLING_MASKS[dst])
+        if irreversible:
+            key ^= zobrist_castling_rights[castling]
+            castling ^= irreversible
+            key ^= zobrist_castling_rights[castling]
+            self._castling = castling
 
         if p in 'Pp':
             self._rule50 = 0
             irreversible = True
 
-            if m.dst == old_en_passant:
-                b[EN_PASSANT_CAPTURES[m.dst]] = ' '
-            
+            if dst == old_en_passant:
+                ep_sq = EN_PASSANT_CAPTURES[dst]
+                key ^= zobrist_piece[b[ep_sq]][ep_sq]
+                self._remove_piece(ep_sq)
+
             # set the en passant square if it is a double push
-            if abs(rank(m.src) - rank(m.dst)) == 2:
-                self._en_passant = pair2square((rank(m.src) + rank(m.dst)) / 2,
-                                               col(m.src))
+            if abs(src - dst) == 16:
+                self._en_passant = (src + dst) / 2
+                key ^= self._en_passant_key(self._en_passant)
 
-        elif m.capture:
+        elif captured != ' ':
             self._rule50 = 0
             irreversible = True
 
-            # if a rook is captures, check if castling flags should be changed
-            if m.capture in 'Rr':
-                castling_side = {(0, 'b'): 'Q',
-                                 (56, 'w'): 'q',
-                                 (7, 'b'): 'K',
-                                 (63, 'w'): 'k'}.get((m.dst, self.stm), None)
-                if castling_side and self._castling[castling_side]:
-                    self._castling[castling_side] = 0
-                    irreversible = True
-            
-        elif p in 'Kk' and abs(col(m.src) - col(m.dst)) == 2:
+        elif p in 'Kk' and abs(src - dst) == 2:
             # if it is a castling move then move also the rook
-            r = rank(m.dst)
-            c = col(m.dst)
-            if c == 2:
-                r_src = pair2square(r, 0)
-                r_dst = pair2square(r, c+1)
-            else:
-                r_src = pair2square(r, 7)
-                r_dst = pair2square(r, c-1)
-            b[r_dst] = b[r_src]
-            b[r_src] = ' '
+            r_src, r_dst = CASTLING_ROOKS[dst]
+            rook = b[r_src]
+            self._move_piece(r_src, r_dst)
+            key ^= zobrist_piece[rook][r_src] ^ zobrist_piece[rook][r_dst]
             irreversible = True
         else:
             self._rule50 += 1
 
         self._movecnt += 1
         self._stm = swap_side(self.stm)
-        self._set_hashkey()
+        self._hashkey = key ^ zobrist_stm
+
+        if self.debug:
+            self._check_hashkey()
 
         self._checked = self._is_checked()
-        
-        self._history.append(TransitionStatus(m, self.castling.copy(),
-                                              self._en_passant, self._rule50,
-                                              self._checked, self._hashkey, irreversible))
+
+        self._ply += 1
+        self._store_status(self._ply, m, irreversible)
 
     def undo(self):
-        assert len(self._history) > 1
+        assert self._ply > 0
 
         b = self.raw
-        m = self._history.pop().move
-        status = self._history[-1]
+        ply = self._ply
+        m = self._hist_move[ply]
+        src = m & 0x3f
+        dst = m >> 6 & 0x3f
+        capture = m >> 16 & 0xf
+        ply -= 1
+        self._ply = ply
 
         stm = swap_side(self._stm)
+        en_passant = self._hist_en_passant[ply]
+        if en_passant < 0:
+            en_passant = None
 
-        if m.promote:
-            b[m.src] = {'w': 'P', 'b': 'p'}[stm]
+        if m >> 12 & 0xf:
+            self._remove_piece(dst)
+            self._add_piece(src, {'w': 'P', 'b': 'p'}[stm])
         else:
-            b[m.src] = b[m.dst]
+            self._move_piece(dst, src)
+
+        p = b[src]
+        if dst == en_passant and p in 'Pp':
+            self._add_piece(EN_PASSANT_CAPTURES[dst], {'w': 'p', 'b': 'P'}[stm])
+        elif capture:
+            self._add_piece(dst, pieces[capture])
+        elif p in 'Kk' and abs(dst - src) == 2:
+            r_src, r_dst = CASTLING_ROOKS[dst]
+            self._move_piece(r_dst, r_src)
 
-        b[m.dst] = ' '
-        if b[m.src] in 'Pp' and m.dst == status.en_passant:
-            b[EN_PASSANT_CAPTURES[m.dst]] = {'w': 'p', 'b': 'P'}[stm]
-        elif m.capture:
-            b[m.dst] = m.capture
+        self._stm = stm
+        self._movecnt -= 1
+        self._castling = self._hist_castling[ply]
+        self._en_passant = en_passant
+        self._rule50 = self._hist_rule50[ply]
+        self._checked = self._hist_checked[ply] == 1
+        self._hashkey = self._hist_hashkey.item(ply)
 
-        if b[m.src] in 'Kk' and abs(col(m.dst) - col(m.src)) == 2:
-            r = rank(m.dst)
-            c = col(m.dst)
+        if self.debug:
+            self._check_hashkey()
 
-            if c == 2:
-                r_src = pair2square(r, 0)
-                r_dst = pair2square(r, c+1)
-            else:
-                r_src = pair2square(r, 7)
-                r_dst = pair2square(r, c-1)
+    def move_null(self):
+        """Pass the turn to the opponent (only for the search)"""
 
-            b[r_src] = b[r_dst]
-            b[r_dst] = ' '
+        assert not self._checked
 
-        self._stm = stm
+        key = self._hashkey
+        if self._en_passant is not None:
+            key ^= self._en_passant_key(self._en_passant)
+            self._en_passant = None
+
+        self._rule50 += 1
+        self._movecnt += 1
+        self._stm = swap_side(self._stm)
+        self._hashkey = key ^ zobrist_stm
+
+        self._ply += 1
+        self._store_status(self._ply, 0, False)
+
+    def undo_null(self):
+        assert self._ply > 0 and self._hist_move[self._ply] == 0
+
+        ply = self._ply - 1
+        self._ply = ply
+
+        en_passant = self._hist_en_passant[ply]
+        self._stm = swap_side(self._stm)
         self._movecnt -= 1
-        self._castling.update(status.castling)
-        self._en_passant = status.en_passant
-        self._rule50 = status.rule50
-        self._checked = status.checked
-        self._hashkey = status.hashkey
+        self._en_passant = en_passant if en_passant >= 0 else None
+        self._rule50 = self._hist_rule50[ply]
+        self._hashkey = self._hist_hashkey.item(ply)
+
+    def _store_status(self, ply, m, irreversible):
+        """Store the current status in the history at the given ply"""
+
+        if ply == len(self._hist_move):
+            self._grow_history()
+
+        self._hist_move[ply] = m
+        self._hist_castling[ply] = self._castling
+        if self._en_passant is None:
+            self._hist_en_passant[ply] = -1
+        else:
+            self._hist_en_passant[ply] = self._en_passant
+        self._hist_rule50[ply] = self._rule50
+        self._hist_checked[ply] = self._checked
+        self._hist_hashkey[ply] = self._hashkey
+        self._hist_irreversible[ply] = bool(irreversible)
+
+    def _grow_history(self):
+        size = len(self._hist_move)
+        for column in (self._hist_move, self._hist_castling, self._hist_en_passant,
+                       self._hist_rule50, self._hist_checked,
+                       self._hist_irreversible):
+            column.extend(array(column.typecode, [0]) * size)
+        self._hist_hashkey = np.concatenate(
+            [self._hist_hashkey, np.zeros(size, dtype=np.int64)])
+
+    def _add_piece(self, sq, p):
+        """Put the piece `p` in the empty square `sq`"""
+
+        self._board[sq] = p
+        side = PIECE_SIDE[p]
+        self._pieces[side].add(sq)
+        if p in 'Kk':
+            self._kings[side] = sq
+        self._mg += PSQ_MG[p][sq]
+        self._eg += PSQ_EG[p][sq]
+        self._phase += PIECE_PHASE[p]
+        if p in 'Pp':
+            self._pawnkey ^= zobrist_piece[p][sq]
+        if self._nnue is not None:
+            self._nnue.add(self._acc, self._kings, p, sq)
+
+    def _remove_piece(self, sq):
+        """Remove the piece in the square `sq`"""
+
+        b = self._board
+        p = b[sq]
+        self._pieces[PIECE_SIDE[p]].remove(sq)
+        b[sq] = ' '
+        self._mg -= PSQ_MG[p][sq]
+        self._eg -= PSQ_EG[p][sq]
+        self._phase -= PIECE_PHASE[p]
+        if p in 'Pp':
+            self._pawnkey ^= zobrist_piece[p][sq]
+        if self._nnue is not None:
+            self._nnue.remove(self._acc, self._kings, p, sq)
+
+    def _move_piece(self, src, dst):
+        """Move the piece from `src` to the empty square `dst`"""
+
+        b = self._board
+        p = b[dst] = b[src]
+        b[src] = ' '
+        side = PIECE_SIDE[p]
+        pieces = self._pieces[side]
+        pieces.remove(src)
+        pieces.add(dst)
+        if p in 'Kk':
+            self._kings[side] = dst
+        table = PSQ_MG[p]
+        self._mg += table[dst] - table[src]
+        table = PSQ_EG[p]
+        self._eg += table[dst] - table[src]
+        if p in 'Pp':
+            table = zobrist_piece[p]
+            self._pawnkey ^= table[src] ^ table[dst]
+        if self._nnue is not None:
+            if p in 'Kk':
+                # the features of a side depend on the square of its king
+                self._acc[0 if side == 'w' else 1] = self._nnue.refresh(self, side)
+            else:
+                self._nnue.move(self._acc, self._kings, p, src, dst)
 
     @property
     def stm(self):
@@ -261,23 +445,133 @@ class BaseBoard(object):
 
     @property
     def castling(self):
+        """Castling rights as a dictionary (i.e. ``{'K': 1, 'Q': 0, ...}``)"""
+
+        return {c: int(bool(self._castling & bit))
+                for c, bit in CASTLING_BITS.iteritems()}
+
+    @property
+    def castling_rights(self):
+        """Castling rights as a 4 bits integer (see `CASTLING_BITS`)"""
+
         return self._castling
 
     @property
     def checked(self):
         return self._checked
 
+    @property
+    def psq(self):
+        """Material and piece square scores: ``(midgame, endgame, phase)``"""
+
+        return self._mg, self._eg, self._phase
+
+    @property
+    def packed(self):
+        """The board as an array of int8 piece codes (indices of `pieces`)"""
+
+        return PACKED_CODES[self._board.view(np.uint8)]
+
+    def pack_moves(self, moves):
+        """The positions after each of `moves` as a (N, 64) packed array"""
+
+        packed = self.packed
+        children = np.repeat(packed[None], len(moves), axis=0)
+        b = self._board
+        for i, m in enumerate(moves):
+            child = children[i]
+            src = m & 0x3f
+            dst = m >> 6 & 0x3f
+            p = b[src]
+            child[dst] = m >> 12 & 0xf or packed[src]
+            child[src] = 0
+            if p in 'Pp' and dst == self._en_passant:
+                child[EN_PASSANT_CAPTURES[dst]] = 0
+            elif p in 'Kk' and abs(src - dst) == 2:
+                r_src, r_dst = CASTLING_ROOKS[dst]
+                child[r_dst] = child[r_src]
+                child[r_src] = 0
+        return children
+
+    @property
+    def nnue(self):
+        return self._nnue
+
+    @property
+    def accumulators(self):
+        """The accumulators of the network, white and black perspective"""
+
+        return self._acc
+
+    def set_nnue(self, nnue):
+        """Keep the accumulators of the network `nnue` (None to stop)"""
+
+        self._nnue = nnue
+        self._acc = nnue.accumulators(self) if nnue is not None else None
+
+    @property
+    def pawnkey(self):
+        """Zobrist key of the pawn structure"""
+
+        return self._pawnkey
+
+    @property
+    def last_move(self):
+        """The last move played (as an int), 0 if there is none"""
+
+        return self._hist_move[self._ply] if self._ply else 0
+
+    def pieces(self, side):
+        """Returns the set of squares occupied by the pieces of `side`
+
+        NOTE: the set changes with the board, make a copy before moving.
+
+        """
+        return self._pieces[side]
+
+    def king_square(self, side):
+        return self._kings[side]
+
+    @property
+    def hashkey(self):
+        """Zobrist key of the position
+
+        The key is a signed 64 bits integer, it doesn't depend on the
+        process or on the run so it can be stored.
+
+        """
+        return self._hashkey
+
     def can_attack(self, stm, sq):
         raise NotImplemented()
 
     def is_legal(self):
-        xking = {'w': 'k', 'b': 'K'}[self.stm]
-        sq = np.where(self.raw == xking)[0][0]
-        return not self.can_attack(self.stm, sq)
+        stm = self._stm
+        return not self.can_attack(stm, self._kings[swap_side(stm)])
+
+    def gen_moves(self):
+        """Generate all the pseudo legal moves of the side to move"""
 
-    def legal_moves(self):
         raise NotImplemented()
 
+    def gen_captures(self):
+        """Generate the pseudo legal captures and promotions"""
+
+        raise NotImplemented()
+
+    def gen_quiets(self):
+        """Generate the pseudo legal moves that are not captures or promotions"""
+
+        raise NotImplemented()
+
+    def legal_moves(self):
+        """Returns the list of legal moves as `Move` objects"""
+
+        from smash.move import Move
+        from smash.movegen import gen_legal_moves
+
+        return [Move.from_int(m) for m in gen_legal_moves(self)]
+
     @contextmanager
     def moving(self, m):
         """Context manager to make a move and undo it at the end"""
@@ -288,17 +582,77 @@ class BaseBoard(object):
         finally:
             self.undo()
 
+    @contextmanager
+    def moving_null(self):
+        """Context manager to make a null move and undo it at the end"""
+
+        try:
+            self.move_null()
+            yield
+        finally:
+            self.undo_null()
+
     def _is_checked(self):
-        king = {'w': 'K', 'b': 'k'}[self.stm]
-        sq = np.where(self.raw == king)[0][0]
-        return self.can_attack(swap_side(self.stm), sq)
-
-    def _set_hashkey(self):
-        self._hashkey = hash((self.stm, tuple(self.raw), self.en_passant,
-                              tuple(self.castling.iteritems())))
-                             
-TransitionStatus = namedtuple('TransitionStatus',
-                              'move castling en_passant rule50 checked hashkey irreversible')
+        stm = self._stm
+        return self.can_attack(swap_side(stm), self._kings[stm])
+
+    def _compute_hashkey(self):
+        """Compute the zobrist key of the position from scratch"""
+
+        key = 0
+        for sq, p in enumerate(self.raw):
+            if p != ' ':
+                key ^= zobrist_piece[p][sq]
+
+        key ^= zobrist_castling_rights[self._castling]
+
+        if self.en_passant is not None:
+            key ^= self._en_passant_key(self.en_passant)
+
+        if self.stm == 'b':
+            key ^= zobrist_stm
+
+        return key
+
+    def _en_passant_key(self, en_passant):
+        """The zobrist key of the en passant square `en_passant`
+
+        The square is hashed only when a pawn can capture on it, so the
+        positions that differ only by a useless en passant square have the
+        same key.
+
+        """
+        p, attackers = EN_PASSANT_ATTACKERS[en_passant]
+        b = self.raw
+        for sq in attackers:
+            if b[sq] == p:
+                return zobrist_en_passant[col(en_passant)]
+        return 0
+
+    def _compute_pawnkey(self):
+        key = 0
+        for sq, p in enumerate(self.raw):
+            if p in 'Pp':
+                key ^= zobrist_piece[p][sq]
+        return key
+
+    def _check_hashkey(self):
+        key = self._compute_hashkey()
+        assert self._hashkey == key, \
+            'Hash key mismatch: %s != %s (%s)' % (self._hashkey, key, self.fen())
+
+        key = self._compute_pawnkey()
+        assert self._pawnkey == key, \
+            'Pawn key mismatch: %s != %s (%s)' % (self._pawnkey, key, self.fen())
+
+        if self._nnue is not None:
+            acc = self._nnue.accumulators(self)
+            assert (self._acc == acc).all(), \
+                'Accumulators mismatch (%s)' % self.fen()
+
+        psq = compute_psq(self.raw)
+        assert self.psq == psq, \
+            'Evaluation mismatch: %s != %s (%s)' % (self.psq, psq, self.fen())
 
 
 class SquareHelper(object):
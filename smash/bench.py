@@ -0,0 +1,37 @@
+"""Fixed depth benchmark
+
+Searches a fixed set of positions to a given depth, used to measure the
+time to depth of the search changes.
+
+"""
+
+import time
+
+from smash.board import Board
+
+
+BENCH_POSITIONS = [
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+    'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+    'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+    'r1bq1rk1/pp2ppbp/2np1np1/8/3NP3/2N1BP2/PPPQ2PP/R3KB1R w KQ - 0 1',
+    'r2q1rk1/ppp2ppp/2n1bn2/2b1p3/3pP3/3P1NPP/PPP1NPB1/R1BQ1RK1 b - - 0 9',
+    '6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1',
+    ]
+
+
+def bench(engine, depth, board_class=Board, positions=BENCH_POSITIONS):
+    """Search each position to `depth` with a cleared engine
+
+    Returns a list of tuples (fen, nodes, seconds).
+
+    """
+    results = []
+    for fen in positions:
+        engine.new_game()
+        t = time.time()
+        engine.bestmove(board_class(fen), depth=depth)
+        results.append((fen, engine.stat.nodes, time.time() - t))
+    return results
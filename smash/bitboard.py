@@ -0,0 +1,284 @@
+"""Bitboard based board
+
+Every piece of every side is stored as a 64 bits integer where the n-th bit
+is set when the piece is in the n-th square. Attacks are built from
+precomputed masks, sliders follow the classical ray approach: the ray is
+cut at the first blocker found with a bit scan.
+
+"""
+
+from smash.base import \
+    BaseBoard, START_POSITION, PIECE_SIDE, rank, col, pair2square, swap_side
+from smash.move import CAPTURE_BITS, MOVE_DOUBLE_PUSH
+from smash.movegen import PROMOTES, _gen_castling_moves
+try:
+    from smash.movetables import knight_table, king_table
+except ImportError:
+    pass
+
+
+PIECES = {'w': 'PNBRQK', 'b': 'pnbrqk'}
+
+BB_SQUARES = [1 << sq for sq in range(64)]
+
+
+def bb_mask(squares):
+    """Returns the bitboard with the given squares set"""
+
+    x = 0
+    for sq in squares:
+        x |= BB_SQUARES[sq]
+    return x
+
+
+def bb_lsb(x):
+    """Returns the lowest square set in the bitboard"""
+
+    return (x & -x).bit_length() - 1
+
+
+def bb_squares(x):
+    """Iterate over the squares set in the bitboard"""
+
+    while x:
+        bit = x & -x
+        yield bit.bit_length() - 1
+        x ^= bit
+
+
+def _gen_ray_masks(dr, dc):
+    masks = []
+    for sq in range(64):
+        r, c = rank(sq) + dr, col(sq) + dc
+        squares = []
+        while 0 <= r <= 7 and 0 <= c <= 7:
+            squares.append(pair2square(r, c))
+            r += dr
+            c += dc
+        masks.append(bb_mask(squares))
+    return masks
+
+
+def _gen_pawn_attacks(dr):
+    masks = []
+    for sq in range(64):
+        r = rank(sq) + dr
+        squares = [pair2square(r, c) for c in (col(sq) - 1, col(sq) + 1)
+                   if 0 <= r <= 7 and 0 <= c <= 7]
+        masks.append(bb_mask(squares))
+    return masks
+
+
+# rays going towards higher squares have the nearest blocker in the lowest
+# bit, the others in the highest bit
+ROOK_RAYS_UP = [_gen_ray_masks(1, 0), _gen_ray_masks(0, 1)]
+ROOK_RAYS_DOWN = [_gen_ray_masks(-1, 0), _gen_ray_masks(0, -1)]
+BISHOP_RAYS_UP = [_gen_ray_masks(1, 1), _gen_ray_masks(1, -1)]
+BISHOP_RAYS_DOWN = [_gen_ray_masks(-1, -1), _gen_ray_masks(-1, 1)]
+
+KNIGHT_ATTACKS = [bb_mask(knight_table[sq]) for sq in range(64)]
+KING_ATTACKS = [bb_mask(king_table[sq]) for sq in range(64)]
+PAWN_ATTACKS = {'w': _gen_pawn_attacks(1), 'b': _gen_pawn_attacks(-1)}
+
+
+def _slider_attacks(sq, occ, rays_up, rays_down):
+    attacks = 0
+    for rays in rays_up:
+        ray = rays[sq]
+        blockers = ray & occ
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in rays_down:
+        ray = rays[sq]
+        blockers = ray & occ
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def bishop_attacks(sq, occ):
+    return _slider_attacks(sq, occ, BISHOP_RAYS_UP, BISHOP_RAYS_DOWN)
+
+
+def rook_attacks(sq, occ):
+    return _slider_attacks(sq, occ, ROOK_RAYS_UP, ROOK_RAYS_DOWN)
+
+
+def queen_attacks(sq, occ):
+    return bishop_attacks(sq, occ) | rook_attacks(sq, occ)
+
+
+class BitBoard(BaseBoard):
+    """Board storing the position as bitboards
+
+    The mailbox representation is kept up to date too (it is used for fen
+    conversion, moves parsing and evaluation).
+
+    """
+
+    def __init__(self, fen=START_POSITION):
+        self._bb = dict.fromkeys(PIECE_SIDE, 0)
+        self._occ = {'w': 0, 'b': 0}
+        super(BitBoard, self).__init__(fen)
+
+    def _add_piece(self, sq, p):
+        super(BitBoard, self)._add_piece(sq, p)
+        bit = BB_SQUARES[sq]
+        self._bb[p] |= bit
+        self._occ[PIECE_SIDE[p]] |= bit
+
+    def _remove_piece(self, sq):
+        p = self._board[sq]
+        super(BitBoard, self)._remove_piece(sq)
+        bit = BB_SQUARES[sq]
+        self._bb[p] ^= bit
+        self._occ[PIECE_SIDE[p]] ^= bit
+
+    def _move_piece(self, src, dst):
+        p = self._board[src]
+        super(BitBoard, self)._move_piece(src, dst)
+        bits = BB_SQUARES[src] | BB_SQUARES[dst]
+        self._bb[p] ^= bits
+        self._occ[PIECE_SIDE[p]] ^= bits
+
+    def bitboard(self, p):
+        """Returns the bitboard of the piece `p`"""
+
+        return self._bb[p]
+
+    def occupancy(self, side=None):
+        """Returns the bitboard of the squares occupied by `side` (or by
+        any side if it is None)"""
+
+        if side is None:
+            return self._occ['w'] | self._occ['b']
+        return self._occ[side]
+
+    def can_attack(self, stm, sq):
+        """Returns true if the player attacks the square"""
+
+        bb = self._bb
+        pawn, knight, bishop, rook, queen, king = PIECES[stm]
+
+        if KNIGHT_ATTACKS[sq] & bb[knight]:
+            return True
+        if KING_ATTACKS[sq] & bb[king]:
+            return True
+        # a pawn attacks the square if it stays where a pawn of the other side
+        # on that square would capture
+        if PAWN_ATTACKS[swap_side(stm)][sq] & bb[pawn]:
+            return True
+
+        occ = self._occ['w'] | self._occ['b']
+        sliders = bb[bishop] | bb[queen]
+        if sliders and bishop_attacks(sq, occ) & sliders:
+            return True
+        sliders = bb[rook] | bb[queen]
+        if sliders and rook_attacks(sq, occ) & sliders:
+            return True
+
+        return False
+
+    def gen_moves(self):
+        """Generate all the pseudo legal moves
+
+        NOTE: this includes also invalid moves
+
+        """
+        return self._gen_moves(True, True)
+
+    def gen_captures(self):
+        return self._gen_moves(True, False)
+
+    def gen_quiets(self):
+        return self._gen_moves(False, True)
+
+    def _gen_moves(self, captures, quiets):
+        stm = self.stm
+        xside = swap_side(stm)
+        bb = self._bb
+        b = self._board
+        own = self._occ[stm]
+        occ = own | self._occ[xside]
+        pawn, knight, bishop, rook, queen, king = PIECES[stm]
+
+        for m in self._gen_pawn_moves(bb[pawn], occ, self._occ[xside],
+                                      captures, quiets):
+            yield m
+
+        targets = 0
+        if captures:
+            targets |= self._occ[xside]
+        if quiets:
+            targets |= ~occ
+        for src in bb_squares(bb[knight]):
+            for dst in bb_squares(KNIGHT_ATTACKS[src] & targets):
+                yield src | dst << 6 | CAPTURE_BITS[b[dst]]
+
+        for p, attacks in ((bishop, bishop_attacks),
+                           (rook, rook_attacks),
+                           (queen, queen_attacks)):
+            for src in bb_squares(bb[p]):
+                for dst in bb_squares(attacks(src, occ) & targets):
+                    yield src | dst << 6 | CAPTURE_BITS[b[dst]]
+
+        for src in bb_squares(bb[king]):
+            for dst in bb_squares(KING_ATTACKS[src] & targets):
+                yield src | dst << 6 | CAPTURE_BITS[b[dst]]
+
+            if quiets and not self.checked:
+                for m in _gen_castling_moves(self, src, stm):
+                    yield m
+
+    def _gen_pawn_moves(self, pawns, occ, enemies, captures, quiets):
+        b = self._board
+        stm = self.stm
+        attacks = PAWN_ATTACKS[stm]
+        promotes = PROMOTES[stm]
+
+        if stm == 'w':
+            step = 8
+            first_rank = 1
+            last_rank = 6
+        else:
+            step = -8
+            first_rank = 6
+            last_rank = 1
+
+        en_passant = self.en_passant
+        if en_passant is not None:
+            en_passant_bb = BB_SQUARES[en_passant]
+        else:
+            en_passant_bb = 0
+
+        for src in bb_squares(pawns):
+            r = rank(src)
+            nextsq = src + step
+
+            if r == last_rank:
+                if not captures:
+                    continue
+                if not occ & BB_SQUARES[nextsq]:
+                    for p in promotes:
+                        yield src | nextsq << 6 | p
+                for dst in bb_squares(attacks[src] & enemies):
+                    for p in promotes:
+                        yield src | dst << 6 | CAPTURE_BITS[b[dst]] | p
+                continue
+
+            if quiets and not occ & BB_SQUARES[nextsq]:
+                yield src | nextsq << 6
+                doublesq = nextsq + step
+                if r == first_rank and not occ & BB_SQUARES[doublesq]:
+                    yield src | doublesq << 6 | MOVE_DOUBLE_PUSH
+
+            if not captures:
+                continue
+
+            for dst in bb_squares(attacks[src] & enemies):
+                yield src | dst << 6 | CAPTURE_BITS[b[dst]]
+
+            if attacks[src] & en_passant_bb:
+                yield src | en_passant << 6 | CAPTURE_BITS[b[src].swapcase()]
@@ -2,7 +2,7 @@ from smash.base import \
     BaseBoard, SquareHelper, START_POSITION, rank, col, pair2square, swap_side
 from movegen import \
     gen_knight_captures, gen_bishop_captures, gen_rook_captures, gen_king_captures, \
-    gen_moves
+    gen_moves, gen_captures, gen_quiets
 
 
 # workarounds for pyflakes
@@ -58,10 +58,11 @@ class Board(BaseBoard):
 
         return False
 
-    def legal_moves(self):
-        moves = []
-        for m in gen_moves(self):
-            with self.moving(m):
-                if self.is_legal():
-                    moves.append(m)
-        return moves
+    def gen_moves(self):
+        return gen_moves(self)
+
+    def gen_captures(self):
+        return gen_captures(self)
+
+    def gen_quiets(self):
+        return gen_quiets(self)
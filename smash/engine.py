@@ -1,7 +1,39 @@
 import time
 
-from smash.evaluate import INF, evaluate
-from smash.movegen import gen_moves
+from smash import smp
+from smash.evaluate import (INF, MAT_SCORES, EvalCache, PawnTable, evaluate,
+                            evaluate_batch)
+from smash.move import Move
+from smash.nnue import NNUE
+from smash.movegen import gen_legal_moves
+from smash.movepick import MovePicker, STAGE_QUIETS, is_pseudo_legal
+from smash.ordering import MoveOrdering, PIECE_VALUES, see
+from smash.timeman import TimeManager
+from smash.tt import TranspositionTable, TT_EXACT, TT_LOWER, TT_UPPER, MAX_PLY, MATE_BOUND
+
+
+# nodes searched between two checks of the time and stop conditions
+CHECK_NODES = 256
+
+# safety margin of the delta pruning in the quiescence search
+DELTA_MARGIN = 2 * MAT_SCORES['p']
+
+# selective search parameters
+NULL_MOVE_MIN_DEPTH = 3
+FUTILITY_DEPTH = 2
+FUTILITY_MARGINS = [0, 2 * MAT_SCORES['p'], 5 * MAT_SCORES['p']]
+REVERSE_FUTILITY_MARGIN = 2 * MAT_SCORES['p']
+# deeper the static score hides the mate threats of the opponent
+REVERSE_FUTILITY_DEPTH = 1
+LMR_MIN_DEPTH = 3
+LMR_MIN_MOVES = 4
+
+
+def has_pieces(board, side):
+    """Returns true if `side` has pieces other than pawns and king"""
+
+    raw = board.raw
+    return any(raw[sq] in 'NBRQnbrq' for sq in board.pieces(side))
 
 
 def mate_score(ply):
@@ -10,8 +42,14 @@ def mate_score(ply):
     return -(INF - ply + 1)
 
 
+class SearchAborted(Exception):
+    """Raised inside the search when it must stop"""
+
+
 class Stat(object):
-    __slots__ = ['nodes', 'leaves', 'mates', 'draws', 't_start']
+    __slots__ = ['nodes', 'leaves', 'mates', 'draws', 'cutoffs',
+                 'first_cutoffs', 'tt_hits', 'qnodes', 'pruned', 'reductions',
+                 'eval_hits', 'eval_misses', 't_start']
 
     def __init__(self):
         self.reset()
@@ -22,13 +60,67 @@ class Stat(object):
         self.leaves = 0
         self.mates = 0
         self.draws = 0
+        self.cutoffs = 0
+        self.first_cutoffs = 0
+        self.tt_hits = 0
+        self.qnodes = 0
+        self.pruned = 0
+        self.reductions = 0
+        self.eval_hits = 0
+        self.eval_misses = 0
+
+    @property
+    def first_cutoff_rate(self):
+        """Fraction of the cutoffs caused by the first move searched"""
+
+        return float(self.first_cutoffs) / self.cutoffs if self.cutoffs else 0.
+
+    @property
+    def eval_hit_rate(self):
+        """Fraction of the evaluations found in the cache"""
+
+        probes = self.eval_hits + self.eval_misses
+        return float(self.eval_hits) / probes if probes else 0.
 
 
 class Engine(object):
     DEFAULT_CONFIG = {
         'depth': 4,
+        'hash': 16,
+        'eval_cache': 1,
+        'pawn_hash': 1,
+        'null_move': True,
+        'lmr': True,
+        'futility': True,
+        'reverse_futility': True,
+        'mate_distance': True,
+        # lazy SMP, unvalidated on more than one core (see smash.smp)
+        'threads': 1,
+        'ponder': False,
+        'multipv': 1,
+        'batch_eval': False,
+        'nnue': False,
+        'eval_file': '',
         }
 
+    # UCI options: (name, config key, type, min, max)
+    OPTIONS = [
+        ('Hash', 'hash', 'spin', 1, 1024),
+        ('EvalCache', 'eval_cache', 'spin', 1, 256),
+        ('PawnHash', 'pawn_hash', 'spin', 1, 256),
+        ('NullMove', 'null_move', 'check', None, None),
+        ('LMR', 'lmr', 'check', None, None),
+        ('Futility', 'futility', 'check', None, None),
+        ('ReverseFutility', 'reverse_futility', 'check', None, None),
+        ('MateDistancePruning', 'mate_distance', 'check', None, None),
+        ('Threads', 'threads', 'spin', 1, 64),
+        ('Ponder', 'ponder', 'check', None, None),
+        ('MultiPV', 'multipv', 'spin', 1, 64),
+        ('BatchEval', 'batch_eval', 'check', None, None),
+        ('UseNNUE', 'nnue', 'check', None, None),
+        ('EvalFile', 'eval_file', 'string', None, None),
+        ]
+
     name = 'Smash'
     author = 'Maurizio Sambati'
 
@@ -36,95 +128,532 @@ class Engine(object):
         self.config = self.DEFAULT_CONFIG.copy()
         self.config.update(config)
         self.stat = Stat()
+        self.tt = TranspositionTable(self.config['hash'])
+        self.eval_cache = EvalCache(self.config['eval_cache'], self.stat)
+        self.pawn_table = PawnTable(self.config['pawn_hash'])
+        self.nnue = None
+        self._load_nnue()
+        self.ordering = MoveOrdering()
+        self._stop = False
+        self._abortable = False
+        self._shared = None
+        self._shared_index = 0
+        self._ponder = None
+        self._pv = [[] for _ in range(MAX_PLY + 2)]
+        self._prev_pv = []
+        self._follow_pv = False
+        self.lines = []
 
         def _cb_null(*args, **kwargs):
             pass
 
         self._cb_info = _cb_null
 
-    def check_end(self, board, ply):
-        """Check the end of a game
+    def set_option(self, name, value):
+        """Set an option by its UCI name"""
 
-        Only check for checkmates and stale draw.
+        for opt_name, key, opt_type, opt_min, opt_max in self.OPTIONS:
+            if opt_name.lower() == name.lower():
+                break
+        else:
+            raise KeyError(name)
+
+        if opt_type == 'spin':
+            value = max(opt_min, min(opt_max, int(value)))
+        elif opt_type == 'check':
+            value = value in (True, 'true')
+        elif opt_type == 'string' and value in (None, '<empty>'):
+            value = ''
+        self.config[key] = value
+
+        if key == 'hash':
+            self.tt.resize(value)
+        elif key == 'eval_cache':
+            self.eval_cache.resize(value)
+        elif key == 'pawn_hash':
+            self.pawn_table.resize(value)
+        elif key in ('nnue', 'eval_file'):
+            self._load_nnue()
+
+    def _load_nnue(self):
+        """Load the network of `config['eval_file']` when it is enabled
+
+        The network is disabled (`config['nnue']` is reset) when the file
+        can't be loaded.
 
-        NOTE: This function doesn't check draw by move repetitions or rule 50.
+        """
+        self.nnue = None
+        self.eval_cache.clear()
+        if self.config['nnue'] and self.config['eval_file']:
+            try:
+                self.nnue = NNUE(self.config['eval_file'])
+            except (IOError, ValueError) as e:
+                self.config['nnue'] = False
+                raise ValueError(str(e))
+
+    def new_game(self):
+        self.tt.clear()
+        self.eval_cache.clear()
+        self.pawn_table.clear()
+        self.ordering.clear()
+
+    def bestmove(self, board, depth=None, nodes=None, ponder=None, **clock):
+        """Returns the best move and its score
+
+        The search is iteratively deepened up to `depth` and within the
+        limits of `nodes` and of the clock parameters of the UCI go command
+        (see `TimeManager`). Without limits `config['depth']` is used.
+
+        `ponder` is an event set on ponderhit: until then the search has no
+        time limit, after it the clock is started.
 
         """
-        for move in gen_moves(board):
-            with board.moving(move):
-                if board.is_legal():
-                    return None
+        self.stat.reset()
+        if board.nnue is not self.nnue:
+            board.set_nnue(self.nnue)
+        self.tt.new_search()
+        self.ordering.new_search()
+        self._stop = False
+        self._abortable = False
+        self._timer = timer = TimeManager(board.stm, **clock)
+        self._max_nodes = nodes
+        self._ponder = None
+        if ponder is not None and not ponder.is_set():
+            self._ponder = (ponder, board.stm, clock)
+            self._timer = TimeManager(infinite=True)
+
+        if depth is None:
+            if timer.limited or nodes or clock.get('infinite') or ponder:
+                depth = MAX_PLY
+            else:
+                depth = self.config['depth']
 
-        if board.checked:
-            return mate_score(ply)
+        if self.config['threads'] > 1:
+            move, score, _ = smp.search(self, board, depth, self.config['threads'])
         else:
-            return 0
-
-    def bestmove(self, board):
-        """Returns the best move and its score"""
+            move, score, _ = self._iterate(board, depth)
 
-        self.stat.reset()
-        score, move = self._search(board, self.config['depth'])
-        self.send_info(depth=self.config['depth'], score=score, pv=[move])
+        if move is not None:
+            move = Move.from_int(move)
         return (move, score)
 
+    def _iterate(self, board, depth, start=1):
+        """Iterative deepening from `start` to `depth`
+
+        With `config['multipv']` > 1 the best lines are searched by
+        `_search_root`. The root moves are ordered by the previous
+        iteration: the moves of the lines first.
+
+        Returns ``(move, score, depth)`` of the last completed iteration,
+        its lines are kept in `lines` as ``(score, pv)`` tuples.
+
+        """
+        root_moves = list(MovePicker(board))
+        multipv = min(self.config['multipv'], len(root_moves)) or 1
+        self.lines = []
+        self._follow_pv = False
+        completed = 0
+
+        for d in range(start, depth + 1):
+            if self.lines:
+                self._prev_pv = self.lines[0][1]
+                self._follow_pv = True
+            try:
+                if multipv > 1:
+                    lines = self._search_root(board, d, root_moves, multipv)
+                else:
+                    score, move = self._search(board, d, root_moves=root_moves)
+                    lines = [(score, self._pv[1] if move is not None else [])]
+            except SearchAborted:
+                break
+            completed = d
+            self.lines = lines
+
+            for k, (score, pv) in enumerate(lines, 1):
+                self.send_info(depth=d, score=score,
+                               pv=[Move.from_int(m) for m in pv],
+                               multipv=k if multipv > 1 else None)
+
+            best = [pv[0] for score, pv in lines if pv]
+            root_moves = best + [m for m in root_moves if m not in best]
+
+            # after the first iteration we always have a move to play
+            self._abortable = True
+            self._check_ponderhit()
+            if self._stop or abs(lines[0][0]) > MATE_BOUND or \
+                    not self._timer.can_deepen():
+                break
+
+        if not self.lines:
+            return None, 0, completed
+        score, pv = self.lines[0]
+        return (pv[0] if pv else None), score, completed
+
     def stop(self):
         self._stop = True
 
-    def _search(self, board, depth, ply=1):
-        """Search recursively for the best move"""
+    @property
+    def pv(self):
+        """The principal variation of the last search"""
+
+        return [Move.from_int(m) for m in self.lines[0][1]] if self.lines else []
+
+    def ponder_move(self, board, move):
+        """The expected reply to `move`
+
+        The second move of the principal variation, or the move stored in
+        the transposition table when the variation was cut by a hit. None
+        for no move (no legal moves at the root).
+
+        """
+        if move is None:
+            return None
+
+        pv = self.pv
+        if len(pv) > 1 and pv[0] == move:
+            return pv[1]
+
+        with board.moving(move):
+            entry = self.tt.probe(board.hashkey, 1)
+            if entry is None or not entry[0]:
+                return None
+            m = entry[0]
+            if not is_pseudo_legal(board, m) or not list(gen_legal_moves(board, [m])):
+                return None
+        return Move.from_int(m)
+
+    def _check_ponderhit(self):
+        """Start the clock when the pondered move is played"""
+
+        if self._ponder is not None and self._ponder[0].is_set():
+            event, stm, clock = self._ponder
+            self._timer = TimeManager(stm, **clock)
+            self._ponder = None
+
+    def _check_abort(self):
+        self._check_ponderhit()
+        shared = self._shared
+        if shared is not None:
+            self._publish_nodes()
+            if shared.stop.value:
+                self._stop = True
+
+        if self._abortable and (
+                self._stop or self._timer.out_of_time() or
+                (self._max_nodes and self._total_nodes() >= self._max_nodes)):
+            raise SearchAborted()
+
+    def _publish_nodes(self):
+        if self._shared is not None:
+            self._shared.nodes[self._shared_index] = self.stat.nodes
+
+    def _total_nodes(self):
+        """Nodes searched by all the processes of the search"""
+
+        if self._shared is None:
+            return self.stat.nodes
+        self._publish_nodes()
+        return self._shared.total_nodes()
+
+    def _search(self, board, depth, alpha=-INF, beta=INF, ply=1, null_ok=True,
+                root_moves=None):
+        """Search recursively for the best move
+
+        Fail-soft alpha-beta negamax with principal variation search: the
+        first move is searched with the full window, the others with a null
+        window and searched again only if they fall inside the window.
+
+        Outside the principal variation the search is selective (each
+        technique can be disabled in the config):
+
+        - mate distance pruning: the window is bounded by the shortest mates
+          still possible
+        - reverse futility pruning: near the horizon a static evaluation
+          well above beta fails high
+        - null move pruning: passing the turn and still failing high with a
+          reduced search (not in check and not with only pawns)
+        - futility pruning: near the horizon quiet moves can't raise a
+          static evaluation well below alpha
+        - late move reductions: late quiet moves are searched with reduced
+          depth and searched again if they raise alpha
+
+        The principal variation from each node is collected in the
+        triangular table `_pv` indexed by ply. At the root `root_moves`
+        replaces the move generation.
+
+        """
 
         assert depth >= 0
         assert ply >= 1
         assert board.is_legal()
 
         stat = self.stat
-        stat.nodes += 1
+        config = self.config
+        pv = self._pv
+        pv[ply] = []
 
-        # the search terminates at depth = 0
-        # just check for a mate/draw or returns an heuristic score
+        # the search terminates at depth = 0 with the quiescence search
         if depth == 0:
             stat.leaves += 1
-            score = self.check_end(board, ply)
-            if score is not None:
-                if score == 0:
-                    stat.draws += 1
-                else:
-                    stat.mates += 1
-                return score, None
-
-            return evaluate(board), None
+            return self._qsearch(board, alpha, beta, ply), None
 
-        alpha = -INF
+        stat.nodes += 1
+        if not stat.nodes % CHECK_NODES:
+            self._check_abort()
+
+        if config['mate_distance'] and ply > 1:
+            alpha = max(alpha, mate_score(ply))
+            beta = min(beta, -mate_score(ply + 1))
+            if alpha >= beta:
+                return alpha, None
+
+        # the hash move is tried first, its score is used when the entry
+        # was searched deep enough (not at the root: we need its move, and
+        # not in the principal variation: we need its moves)
+        key = board.hashkey
+        pv_node = beta - alpha > 1
+        tt_move = None
+        entry = self.tt.probe(key, ply)
+        if entry is not None:
+            tt_move, tt_score, tt_depth, tt_bound = entry
+            if ply > 1 and not pv_node and tt_depth >= depth and \
+                    (tt_bound == TT_EXACT or
+                     (tt_bound == TT_LOWER and tt_score >= beta) or
+                     (tt_bound == TT_UPPER and tt_score <= alpha)):
+                stat.tt_hits += 1
+                return tt_score, tt_move or None
+
+        # the nodes of the previous principal variation search its move first
+        pv_move = 0
+        if self._follow_pv:
+            self._follow_pv = False
+            if ply <= len(self._prev_pv):
+                pv_move = self._prev_pv[ply - 1]
+
+        checked = board.checked
+        static = None
+        if not checked and not pv_node:
+            static = evaluate(board, self.eval_cache, self.pawn_table)
+
+            if config['reverse_futility'] and depth <= REVERSE_FUTILITY_DEPTH \
+                    and abs(beta) < MATE_BOUND \
+                    and static - REVERSE_FUTILITY_MARGIN * depth >= beta:
+                stat.pruned += 1
+                return static, None
+
+            if config['null_move'] and null_ok and depth >= NULL_MOVE_MIN_DEPTH \
+                    and static >= beta and has_pieces(board, board.stm):
+                # adaptive reduction: deeper searches can be reduced more
+                r = 3 if depth > 6 else 2
+                with board.moving_null():
+                    score = -self._search(board, max(0, depth - 1 - r), -beta,
+                                          -beta + 1, ply + 1, False)[0]
+                if score >= beta:
+                    stat.pruned += 1
+                    # a mate found after passing the turn is not proven
+                    return (beta if score > MATE_BOUND else score), None
+
+        futility = None
+        if config['futility'] and static is not None and depth <= FUTILITY_DEPTH \
+                and abs(alpha) < MATE_BOUND \
+                and static + FUTILITY_MARGINS[depth] <= alpha:
+            futility = static + FUTILITY_MARGINS[depth]
+
+        alpha_orig = alpha
+        best = -INF
         bestmove = None
-
-        for move in gen_moves(board):
+        ordering = self.ordering
+        quiets = []
+        lmr = config['lmr'] and depth >= LMR_MIN_DEPTH and not checked and not pv_node
+
+        if root_moves is None:
+            picker = MovePicker(board, pv_move or tt_move, ordering.get_killers(ply),
+                                counter_move=ordering.get_counter(board.last_move),
+                                history=ordering.get_history(board.stm))
+        else:
+            picker = root_moves
+
+        # the children of the nodes before the horizon are evaluated at once:
+        # the quiescence search of the ones failing low would stand pat
+        children = None
+        if config['batch_eval'] and depth == 1 and static is not None \
+                and self.nnue is None:
+            picker = list(picker)
+            xside = 'b' if board.stm == 'w' else 'w'
+            children = evaluate_batch(board.pack_moves(picker), xside)
+            if board.stm != 'w':
+                children = -children
+
+        for i, move in enumerate(picker):
+            quiet = not move >> 12 & 0xff
             with board.moving(move):
-                if not board.is_legal():
+                gives_check = board.checked
+                if futility is not None and quiet and bestmove is not None \
+                        and not gives_check:
+                    stat.pruned += 1
+                    if futility > best:
+                        best = futility
                     continue
 
-                score, _ = self._search(board, depth-1, ply+1)
-                score = -score
-
-                if bestmove is None or score > alpha:
+                if children is not None and not gives_check \
+                        and children.item(i) <= alpha:
+                    stat.leaves += 1
+                    stat.nodes += 1
+                    stat.qnodes += 1
+                    if not stat.nodes % CHECK_NODES:
+                        self._check_abort()
+                    score = children.item(i)
+                elif bestmove is None:
+                    self._follow_pv = pv_move and move == pv_move
+                    score = -self._search(board, depth-1, -beta, -alpha, ply+1)[0]
+                    self._follow_pv = False
+                else:
+                    r = 0
+                    if lmr and quiet and i >= LMR_MIN_MOVES and not gives_check \
+                            and picker.stage == STAGE_QUIETS:
+                        r = 2 if i >= 2 * LMR_MIN_MOVES and depth >= 6 else 1
+                        stat.reductions += 1
+
+                    score = -self._search(board, depth-1-r, -alpha-1, -alpha, ply+1)[0]
+                    if r and score > alpha:
+                        score = -self._search(board, depth-1, -alpha-1, -alpha, ply+1)[0]
+                    if alpha < score < beta:
+                        score = -self._search(board, depth-1, -beta, -alpha, ply+1)[0]
+
+            if bestmove is None or score > best:
+                best = score
+                bestmove = move
+                if score > alpha:
                     alpha = score
-                    bestmove = move
+                    pv[ply] = [move] + pv[ply + 1]
+                    if score >= beta:
+                        stat.cutoffs += 1
+                        if not i:
+                            stat.first_cutoffs += 1
+                        if quiet:
+                            ordering.update(board, move, depth, ply, quiets)
+                        break
+
+            if quiet:
+                quiets.append(move)
 
         # if no move was found, then we must be in an game over
         if bestmove is None:
             stat.leaves += 1
-            if board.checked:
+            if checked:
                 stat.mates += 1
                 return mate_score(ply), None
             else:
                 stat.draws += 1
                 return 0, None
 
-        return alpha, bestmove
+        if best >= beta:
+            bound = TT_LOWER
+        elif best > alpha_orig:
+            bound = TT_EXACT
+        else:
+            bound = TT_UPPER
+        self.tt.store(key, bestmove, best, depth, bound, ply)
+
+        return best, bestmove
+
+    def _search_root(self, board, depth, root_moves, multipv):
+        """Search the `multipv` best lines of the root in a single pass
+
+        Alpha is the score of the worst line found so far: the other moves
+        are searched with a null window on it, the ones above it are
+        searched again with an open window to get their exact score and
+        principal variation.
+
+        Returns the lines as ``(score, pv)`` tuples, best first.
+
+        """
+        self.stat.nodes += 1
+        lines = []
+        for i, move in enumerate(root_moves):
+            with board.moving(move):
+                if len(lines) < multipv:
+                    self._follow_pv = not i and self._follow_pv
+                    score = -self._search(board, depth-1, -INF, INF, 2)[0]
+                    self._follow_pv = False
+                else:
+                    alpha = lines[-1][0]
+                    score = -self._search(board, depth-1, -alpha-1, -alpha, 2)[0]
+                    if score > alpha:
+                        score = -self._search(board, depth-1, -INF, -alpha, 2)[0]
+
+            if len(lines) < multipv or score > lines[-1][0]:
+                lines.append((score, [move] + self._pv[2]))
+                lines.sort(key=lambda line: line[0], reverse=True)
+                del lines[multipv:]
+
+        return lines
+
+    def _qsearch(self, board, alpha, beta, ply):
+        """Search the captures until the position is quiet
+
+        The side to move can stand pat on the static evaluation, captures
+        that can't raise it above alpha even winning the captured piece
+        are skipped (delta pruning) as are the captures by a more valuable
+        piece that lose material by static exchange evaluation. When in
+        check all the evasions are searched and mates are detected.
+
+        NOTE: stalemates are not detected here.
+
+        """
+        stat = self.stat
+        stat.nodes += 1
+        stat.qnodes += 1
+        if not stat.nodes % CHECK_NODES:
+            self._check_abort()
+
+        checked = board.checked
+        if checked:
+            best = -INF
+        else:
+            best = evaluate(board, self.eval_cache, self.pawn_table)
+            if best >= beta or ply >= MAX_PLY:
+                return best
+            if best > alpha:
+                alpha = best
+            delta = alpha - best - DELTA_MARGIN
+
+        for i, move in enumerate(MovePicker(board, captures_only=not checked)):
+            if not checked:
+                victim = PIECE_VALUES[move >> 16 & 0xf] + PIECE_VALUES[move >> 12 & 0xf]
+                if victim < delta:
+                    continue
+                # a piece taking a cheaper one can lose material
+                if MAT_SCORES.get(board.raw[move & 0x3f], 0) > victim and \
+                        see(board, move) < 0:
+                    continue
+
+            with board.moving(move):
+                score = -self._qsearch(board, -beta, -alpha, ply+1)
+
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if score >= beta:
+                        stat.cutoffs += 1
+                        if not i:
+                            stat.first_cutoffs += 1
+                        break
+
+        if best == -INF:
+            stat.mates += 1
+            return mate_score(ply)
+
+        return best
 
     def set_cb_info(self, cb):
         self._cb_info = cb
 
-    def send_info(self, depth, score, pv):
-        self._cb_info(depth=depth, score=score, pv=pv, nodes=self.stat.nodes,
-                      time=(time.time() - self.stat.t_start))
+    def send_info(self, depth, score, pv, multipv=None):
+        info = dict(depth=depth, score=score, pv=pv, nodes=self._total_nodes(),
+                    time=(time.time() - self.stat.t_start),
+                    hashfull=self.tt.hashfull())
+        if multipv is not None:
+            info['multipv'] = multipv
+        self._cb_info(**info)
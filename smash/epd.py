@@ -8,7 +8,8 @@ log = logging.getLogger(__name__)
 
 
 class EPDSuite(object):
-    def __init__(self, fin):
+    def __init__(self, fin, board_class=Board):
+        self.board_class = board_class
         self._suite = suite = []
 
         for i, line in enumerate(fin, 1):
@@ -27,7 +28,7 @@ class EPDSuite(object):
         fen.extend(['0', '1'])
         fen = ' '.join(fen)
 
-        board = Board(fen)
+        board = self.board_class(fen)
         moves = []
         for san in line[bmidx+1:]:
             san = san.rstrip(',')
@@ -40,7 +41,7 @@ class EPDSuite(object):
 
         for i, (fen, moves) in enumerate(self._suite, 1):
             print 'Test n.%d:' % i,
-            board = Board(fen)
+            board = self.board_class(fen)
             result, score = engine.bestmove(board)
             if result not in moves:
                 fail += 1
@@ -1,3 +1,10 @@
+import logging
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
 MAT_SCORES = {
     'p': 10,
     'n': 30,
@@ -8,23 +15,569 @@ MAT_SCORES = {
 
 INF = 100000
 
+# game phase: the sum of the weights of the pieces on the board, from
+# PHASE_TOTAL at the start (midgame) to 0 with only kings and pawns
+PHASE_WEIGHTS = {'n': 1, 'b': 1, 'r': 2, 'q': 4}
+PHASE_TOTAL = 24
+
+
+# piece square tables from the white point of view, rows from the 8th
+# rank to the 1st one (as in a diagram)
+PST_MG = {
+    'p': [
+        0,  0,  0,  0,  0,  0,  0,  0,
+        5,  5,  5,  5,  5,  5,  5,  5,
+        1,  1,  2,  3,  3,  2,  1,  1,
+        0,  0,  1,  2,  2,  1,  0,  0,
+        0,  0,  0,  2,  2,  0,  0,  0,
+        0,  0, -1,  0,  0, -1,  0,  0,
+        0,  1,  1, -2, -2,  1,  1,  0,
+        0,  0,  0,  0,  0,  0,  0,  0],
+    'n': [
+        -5, -4, -3, -3, -3, -3, -4, -5,
+        -4, -2,  0,  0,  0,  0, -2, -4,
+        -3,  0,  1,  2,  2,  1,  0, -3,
+        -3,  1,  2,  2,  2,  2,  1, -3,
+        -3,  0,  2,  2,  2,  2,  0, -3,
+        -3,  1,  1,  2,  2,  1,  1, -3,
+        -4, -2,  0,  1,  1,  0, -2, -4,
+        -5, -4, -3, -3, -3, -3, -4, -5],
+    'b': [
+        -2, -1, -1, -1, -1, -1, -1, -2,
+        -1,  0,  0,  0,  0,  0,  0, -1,
+        -1,  0,  1,  1,  1,  1,  0, -1,
+        -1,  1,  1,  1,  1,  1,  1, -1,
+        -1,  0,  1,  1,  1,  1,  0, -1,
+        -1,  1,  1,  1,  1,  1,  1, -1,
+        -1,  1,  0,  0,  0,  0,  1, -1,
+        -2, -1, -1, -1, -1, -1, -1, -2],
+    'r': [
+        0,  0,  0,  0,  0,  0,  0,  0,
+        1,  1,  1,  1,  1,  1,  1,  1,
+        -1,  0,  0,  0,  0,  0,  0, -1,
+        -1,  0,  0,  0,  0,  0,  0, -1,
+        -1,  0,  0,  0,  0,  0,  0, -1,
+        -1,  0,  0,  0,  0,  0,  0, -1,
+        -1,  0,  0,  0,  0,  0,  0, -1,
+        0,  0,  0,  1,  1,  0,  0,  0],
+    'q': [
+        -2, -1, -1, -1, -1, -1, -1, -2,
+        -1,  0,  0,  0,  0,  0,  0, -1,
+        -1,  0,  1,  1,  1,  1,  0, -1,
+        0,  0,  1,  1,  1,  1,  0,  0,
+        0,  0,  1,  1,  1,  1,  0,  0,
+        -1,  1,  1,  1,  1,  1,  0, -1,
+        -1,  0,  1,  0,  0,  0,  0, -1,
+        -2, -1, -1,  0,  0, -1, -1, -2],
+    'k': [
+        -3, -4, -4, -5, -5, -4, -4, -3,
+        -3, -4, -4, -5, -5, -4, -4, -3,
+        -3, -4, -4, -5, -5, -4, -4, -3,
+        -3, -4, -4, -5, -5, -4, -4, -3,
+        -2, -3, -3, -4, -4, -3, -3, -2,
+        -1, -2, -2, -2, -2, -2, -2, -1,
+        2,  2,  0,  0,  0,  0,  2,  2,
+        2,  3,  1,  0,  0,  1,  3,  2],
+    }
+
+PST_EG = {
+    'p': [
+        0,  0,  0,  0,  0,  0,  0,  0,
+        8,  8,  8,  8,  8,  8,  8,  8,
+        5,  5,  5,  5,  5,  5,  5,  5,
+        3,  3,  3,  3,  3,  3,  3,  3,
+        2,  2,  2,  2,  2,  2,  2,  2,
+        1,  1,  1,  1,  1,  1,  1,  1,
+        0,  0,  0,  0,  0,  0,  0,  0,
+        0,  0,  0,  0,  0,  0,  0,  0],
+    'n': PST_MG['n'],
+    'b': PST_MG['b'],
+    'r': [
+        0,  0,  0,  0,  0,  0,  0,  0,
+        1,  1,  1,  1,  1,  1,  1,  1,
+        0,  0,  0,  0,  0,  0,  0,  0,
+        0,  0,  0,  0,  0,  0,  0,  0,
+        0,  0,  0,  0,  0,  0,  0,  0,
+        0,  0,  0,  0,  0,  0,  0,  0,
+        0,  0,  0,  0,  0,  0,  0,  0,
+        0,  0,  0,  0,  0,  0,  0,  0],
+    'q': PST_MG['q'],
+    'k': [
+        -5, -4, -3, -2, -2, -3, -4, -5,
+        -3, -2, -1,  0,  0, -1, -2, -3,
+        -3, -1,  2,  3,  3,  2, -1, -3,
+        -3, -1,  3,  4,  4,  3, -1, -3,
+        -3, -1,  3,  4,  4,  3, -1, -3,
+        -3, -1,  2,  3,  3,  2, -1, -3,
+        -3, -3,  0,  0,  0,  0, -3, -3,
+        -5, -3, -3, -3, -3, -3, -3, -5],
+    }
+
+
+# pawn structure penalties and bonuses as (midgame, endgame)
+DOUBLED_PAWN = (-1, -2)
+ISOLATED_PAWN = (-1, -1)
+BACKWARD_PAWN = (-1, -1)
+# by the rank of the pawn from its side (0 is the first rank)
+PASSED_PAWN_MG = [0, 0, 0, 1, 2, 3, 5, 0]
+PASSED_PAWN_EG = [0, 1, 1, 2, 4, 7, 11, 0]
+# midgame bonus of a pawn in front of the king (on its file or on the
+# adjacent ones) by its rank, only the nearest pawn of each file counts
+PAWN_SHIELD = [0, 2, 1, 0, 0, 0, 0, 0]
+
+# the parameters tuned by `smash.tune`, when installed as the module
+# smash/evalparams.py, replace the ones above
+try:
+    from smash.evalparams import \
+        MAT_SCORES, PST_MG, PST_EG, DOUBLED_PAWN, ISOLATED_PAWN, \
+        BACKWARD_PAWN, PASSED_PAWN_MG, PASSED_PAWN_EG, PAWN_SHIELD
+except ImportError:
+    pass
+else:
+    log.warning('Tuned evaluation parameters loaded from smash/evalparams.py')
+
 for p in 'PNBRQ':
     MAT_SCORES[p] = MAT_SCORES[p.lower()]
 
 
-def evaluate(board):
+def _psq_tables(pst):
+    """Material plus piece square scores by piece and square
+
+    The scores are from the white point of view: negative for the black
+    pieces.
+
+    """
+    tables = {}
+    for p, table in pst.items():
+        # square 0 is a1: the first row of the table is the 8th rank
+        white = [MAT_SCORES.get(p, 0) + table[sq ^ 56] for sq in range(64)]
+        tables[p.upper()] = white
+        tables[p] = [-white[sq ^ 56] for sq in range(64)]
+    return tables
+
+
+PSQ_MG = _psq_tables(PST_MG)
+PSQ_EG = _psq_tables(PST_EG)
+PIECE_PHASE = dict((p, PHASE_WEIGHTS.get(p.lower(), 0)) for p in 'PNBRQKpnbrqk')
+
+
+class EvalCache(object):
+    """Direct-mapped cache of the evaluations by position hash key
+
+    The hits and misses are counted in the `eval_hits` and `eval_misses`
+    attributes of `stat` (see `smash.engine.Stat`).
+
+    """
+
+    # bytes used by an entry: key and score
+    ENTRY_SIZE = 8 + 4
+
+    def __init__(self, size_mb=1, stat=None):
+        self.stat = stat
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        """Allocate the cache to use about `size_mb` megabytes"""
+
+        n = 1
+        while n * 2 * self.ENTRY_SIZE <= size_mb * 1024 * 1024:
+            n *= 2
+
+        self.size_mb = size_mb
+        self._mask = n - 1
+        self._keys = np.zeros(n, dtype=np.int64)
+        self._scores = np.zeros(n, dtype=np.int32)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def clear(self):
+        self._keys.fill(0)
+        self._scores.fill(0)
+
+    def probe(self, key):
+        """The score of the position `key`, None if it is not cached"""
+
+        i = key & self._mask
+        if self._keys.item(i) != key:
+            if self.stat is not None:
+                self.stat.eval_misses += 1
+            return None
+        if self.stat is not None:
+            self.stat.eval_hits += 1
+        return self._scores.item(i)
+
+    def store(self, key, score):
+        i = key & self._mask
+        self._keys[i] = key
+        self._scores[i] = score
+
+
+class PawnTable(object):
+    """Direct-mapped cache of the pawn structure scores by pawn key
+
+    An entry holds the results of `evaluate_pawns`: the midgame and
+    endgame scores followed by the shields of both sides.
+
+    """
+
+    # bytes used by an entry: key, scores and shields
+    ENTRY_SIZE = 8 + 4 * (2 + 16)
+
+    def __init__(self, size_mb=1):
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        """Allocate the table to use about `size_mb` megabytes"""
+
+        n = 1
+        while n * 2 * self.ENTRY_SIZE <= size_mb * 1024 * 1024:
+            n *= 2
+
+        self.size_mb = size_mb
+        self._mask = n - 1
+        self._keys = np.zeros(n, dtype=np.int64)
+        # the empty slots match the key 0 of no pawns at all, their scores
+        # are right
+        self._data = np.zeros((n, 2 + 16), dtype=np.int32)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def clear(self):
+        self._keys.fill(0)
+        self._data.fill(0)
+
+    def probe(self, key):
+        """The pawn scores of `key` as a list, None if not stored"""
+
+        i = key & self._mask
+        if self._keys.item(i) != key:
+            return None
+        return self._data[i].tolist()
+
+    def store(self, key, scores):
+        i = key & self._mask
+        self._keys[i] = key
+        self._data[i] = scores
+
+
+def _pawn_files(b, p):
+    """The ranks of the pawns `p` by file"""
+
+    files = [[] for _ in range(8)]
+    for sq in np.flatnonzero(b == p):
+        files[sq & 7].append(sq >> 3)
+    return files
+
+
+def _evaluate_pawn_side(own, other):
+    """Structure scores and shields of the pawns `own`
+
+    The ranks of both `own` and `other` are from the side of `own`.
+
+    Returns a list ``[mg, eg, shield of file a, ..., shield of file h]``.
+
+    """
+    mg = eg = 0
+    shield = [0] * 8
+    for f, ranks in enumerate(own):
+        if not ranks:
+            continue
+
+        nearest = PAWN_SHIELD[min(ranks)]
+        for k in range(max(0, f - 1), min(8, f + 2)):
+            shield[k] += nearest
+
+        if len(ranks) > 1:
+            mg += DOUBLED_PAWN[0] * (len(ranks) - 1)
+            eg += DOUBLED_PAWN[1] * (len(ranks) - 1)
+
+        adjacent = []
+        enemies = list(other[f])
+        if f > 0:
+            adjacent += own[f - 1]
+            enemies += other[f - 1]
+        if f < 7:
+            adjacent += own[f + 1]
+            enemies += other[f + 1]
+        attackers = (other[f - 1] if f > 0 else []) + \
+                    (other[f + 1] if f < 7 else [])
+
+        front = max(ranks)
+        for r in ranks:
+            if not adjacent:
+                mg += ISOLATED_PAWN[0]
+                eg += ISOLATED_PAWN[1]
+            elif min(adjacent) > r and r + 2 in attackers:
+                # can't be defended by the pawns beside it and its stop
+                # square is attacked by a pawn
+                mg += BACKWARD_PAWN[0]
+                eg += BACKWARD_PAWN[1]
+
+            if r == front and not any(x > r for x in enemies):
+                mg += PASSED_PAWN_MG[r]
+                eg += PASSED_PAWN_EG[r]
+
+    return [mg, eg] + shield
+
+
+def evaluate_pawns(b):
+    """Evaluates the pawn structure
+
+    Doubled, isolated, backward and passed pawns are scored for the
+    midgame and the endgame, the shield of a side is its bonus for a king
+    on its first two ranks by the file of the king.
+
+    Returns a list ``[mg, eg, white shield by file, black shield by file]``
+    with the scores from the white point of view.
+
+    """
+    white = _pawn_files(b, 'P')
+    black = _pawn_files(b, 'p')
+    w = _evaluate_pawn_side(white, black)
+    # the ranks seen from the black side
+    black = [[7 - r for r in ranks] for ranks in black]
+    white = [[7 - r for r in ranks] for ranks in white]
+    k = _evaluate_pawn_side(black, white)
+    return [w[0] - k[0], w[1] - k[1]] + w[2:] + k[2:]
+
+
+def evaluate(board, cache=None, pawns=None):
     """Evaluates a board static position
 
+    Material and piece square scores are kept by the board as running
+    totals for the midgame and the endgame, the pawn structure is looked
+    up in the `pawns` table (a `PawnTable`) by the pawn key of the board
+    and computed only when missing. The score is the blend of the
+    midgame and endgame scores by the game phase.
+
+    When the board keeps the accumulators of a network (see
+    `smash.nnue`) the score is the output of the network instead.
+
+    The scores are looked up and stored in `cache` (an `EvalCache`) when
+    given.
+
     Returns a score relative to the `stm`.
-    
+
     """
-    b = board.raw
-    white_score, black_score = evaluate_material(b)
+    if cache is not None:
+        key = board.hashkey
+        score = cache.probe(key)
+        if score is not None:
+            return score
+
+    nnue = board.nnue
+    if nnue is not None:
+        score = nnue.evaluate(board.accumulators, board.stm)
+        if cache is not None:
+            cache.store(key, score)
+        return score
 
-    if board.stm == 'w':
-        return white_score - black_score
+    if pawns is None:
+        pawn_scores = evaluate_pawns(board.raw)
     else:
-        return black_score - white_score
+        pawn_key = board.pawnkey
+        pawn_scores = pawns.probe(pawn_key)
+        if pawn_scores is None:
+            pawn_scores = evaluate_pawns(board.raw)
+            pawns.store(pawn_key, pawn_scores)
+
+    mg, eg, phase = board.psq
+    mg += pawn_scores[0]
+    eg += pawn_scores[1]
+    king = board.king_square('w')
+    if king < 16:
+        mg += pawn_scores[2 + (king & 7)]
+    king = board.king_square('b')
+    if king >= 48:
+        mg -= pawn_scores[10 + (king & 7)]
+
+    # blended relative to the side to move, so that the rounding doesn't
+    # depend on the color
+    if board.stm != 'w':
+        mg, eg = -mg, -eg
+    if phase > PHASE_TOTAL:
+        phase = PHASE_TOTAL
+    score = (mg * phase + eg * (PHASE_TOTAL - phase)) // PHASE_TOTAL
+
+    if cache is not None:
+        cache.store(key, score)
+    return score
+
+
+def compute_psq(b):
+    """Compute from scratch the totals kept by the board
+
+    Returns a tuple ``mg, eg, phase``.
+
+    """
+    mg = eg = phase = 0
+    for sq, p in enumerate(b):
+        if p != ' ':
+            mg += PSQ_MG[p][sq]
+            eg += PSQ_EG[p][sq]
+            phase += PIECE_PHASE[p]
+    return mg, eg, phase
+
+
+# piece codes of the packed boards, the same of `smash.base.pieces`
+PACKED_PIECES = ' PNBRQK pnbrqk'
+
+
+def _packed_table(values):
+    table = np.zeros((len(PACKED_PIECES), 64), dtype=np.int32)
+    for code, p in enumerate(PACKED_PIECES):
+        if p != ' ':
+            table[code] = values[p]
+    return table
+
+
+PACKED_PSQ_MG = _packed_table(PSQ_MG).ravel()
+PACKED_PSQ_EG = _packed_table(PSQ_EG).ravel()
+PACKED_PHASE = np.array([PIECE_PHASE.get(p, 0) for p in PACKED_PIECES],
+                        dtype=np.int32)
+_SQUARES = np.arange(64)
+
+# the pawns of a file are packed as a bitmask of their ranks, these tables
+# are indexed by the masks
+_MASKS = range(256)
+POPCOUNT = np.array([bin(x).count('1') for x in _MASKS], dtype=np.int32)
+HIGHEST_RANK = np.array([x.bit_length() - 1 for x in _MASKS], dtype=np.int32)
+LOWEST_RANK = np.array([(x & -x).bit_length() - 1 if x else 8 for x in _MASKS],
+                       dtype=np.int32)
+# the masks of the ranks below a rank
+BELOW_RANK = np.array([(1 << r) - 1 for r in range(9)], dtype=np.int32)
+# the masks seen from the other side
+FLIPPED_RANKS = np.array([int('{:08b}'.format(x)[::-1], 2) for x in _MASKS],
+                         dtype=np.uint8)
+_PASSED_PAWN_MG = np.array(PASSED_PAWN_MG + [0], dtype=np.int32)
+_PASSED_PAWN_EG = np.array(PASSED_PAWN_EG + [0], dtype=np.int32)
+_PAWN_SHIELD = np.array(PAWN_SHIELD + [0], dtype=np.int32)
+
+
+def _beside(masks):
+    """The masks of the files on the left and on the right of each file"""
+
+    left = np.zeros_like(masks)
+    left[:, 1:] = masks[:, :-1]
+    right = np.zeros_like(masks)
+    right[:, :-1] = masks[:, 1:]
+    return left | right
+
+
+def pawn_terms_batch(own, other):
+    """The pawn structure terms of `_evaluate_pawn_side`, vectorized
+
+    `own` and `other` are (N, 8) arrays of the masks of the pawn ranks by
+    file, with the ranks from the side of `own`.
+
+    Returns ``doubled, isolated, backward, front, passed``: the counts of
+    the doubled, isolated and backward pawns, and (N, 8) arrays of the
+    rank of the front pawn of each file and of whether it is passed.
+
+    """
+    counts = POPCOUNT[own]
+    present = own != 0
+    beside = _beside(own)
+    supported = beside != 0
+
+    doubled = np.maximum(counts - 1, 0).sum(axis=1)
+    isolated = (counts * ~supported).sum(axis=1)
+
+    # backward: no pawns beside at the same rank or below and the stop
+    # square attacked
+    attackers = _beside(other)
+    backward = POPCOUNT[own & BELOW_RANK[LOWEST_RANK[beside]] & attackers >> 2]
+    backward = (backward * supported).sum(axis=1)
+
+    front = HIGHEST_RANK[own]
+    passed = present & (HIGHEST_RANK[other | attackers] <= front)
+    return doubled, isolated, backward, front, passed
+
+
+def _evaluate_pawn_side_batch(own, other):
+    """Vectorized `_evaluate_pawn_side`
+
+    The arguments are the ones of `pawn_terms_batch`.
+
+    Returns ``mg, eg, shield`` with a (N, 8) shield.
+
+    """
+    doubled, isolated, backward, front, passed = pawn_terms_batch(own, other)
+
+    mg = (DOUBLED_PAWN[0] * doubled + ISOLATED_PAWN[0] * isolated +
+          BACKWARD_PAWN[0] * backward + (_PASSED_PAWN_MG[front] * passed).sum(axis=1))
+    eg = (DOUBLED_PAWN[1] * doubled + ISOLATED_PAWN[1] * isolated +
+          BACKWARD_PAWN[1] * backward + (_PASSED_PAWN_EG[front] * passed).sum(axis=1))
+
+    nearest = _PAWN_SHIELD[LOWEST_RANK[own]]
+    shield = nearest.copy()
+    shield[:, 1:] += nearest[:, :-1]
+    shield[:, :-1] += nearest[:, 1:]
+    return mg, eg, shield
+
+
+def pawn_masks(positions):
+    """The masks of the pawn ranks by file of packed positions
+
+    Returns ``white, black``, two (N, 8) arrays with the bits of the ranks
+    from the white side in white and from the black side in black.
+
+    """
+    n = len(positions)
+    pawns = (positions == PACKED_PIECES.index('P')).reshape(n, 8, 8)
+    white = np.packbits(pawns[:, ::-1], axis=1)[:, 0]
+    pawns = (positions == PACKED_PIECES.index('p')).reshape(n, 8, 8)
+    black = np.packbits(pawns, axis=1)[:, 0]
+    return white, black
+
+
+def evaluate_batch(positions, stm=None):
+    """Evaluates many positions at once
+
+    `positions` is a sequence of boards or a (N, 64) int8 array of piece
+    codes (see `smash.base.BaseBoard.packed`). The scores are the ones of
+    `evaluate`, with numpy operations over all the positions.
+
+    `stm` is the side to move of all the positions or a sequence of the
+    sides to move by position, by default the ones of the boards or white
+    for an array.
+
+    Returns an array of scores from the white point of view.
+
+    """
+    if not isinstance(positions, np.ndarray):
+        if stm is None:
+            stm = [board.stm for board in positions]
+        positions = np.array([board.packed for board in positions],
+                             dtype=np.int8)
+    if stm is None:
+        stm = 'w'
+    n = len(positions)
+    index = (positions.astype(np.intp) << 6) + _SQUARES
+
+    mg = np.take(PACKED_PSQ_MG, index).sum(axis=1)
+    eg = np.take(PACKED_PSQ_EG, index).sum(axis=1)
+    phase = np.minimum(np.take(PACKED_PHASE, positions).sum(axis=1),
+                       PHASE_TOTAL)
+
+    white, black = pawn_masks(positions)
+    w_mg, w_eg, w_shield = _evaluate_pawn_side_batch(white, FLIPPED_RANKS[black])
+    b_mg, b_eg, b_shield = _evaluate_pawn_side_batch(black, FLIPPED_RANKS[white])
+    mg += w_mg - b_mg
+    eg += w_eg - b_eg
+
+    rows = np.arange(n)
+    king = (positions == PACKED_PIECES.index('K')).argmax(axis=1)
+    mg += np.where(king < 16, w_shield[rows, king & 7], 0)
+    king = (positions == PACKED_PIECES.index('k')).argmax(axis=1)
+    mg -= np.where(king >= 48, b_shield[rows, king & 7], 0)
+
+    # blended relative to the side to move as in `evaluate`
+    sign = np.where(np.asarray(stm) == 'w', 1, -1)
+    return sign * ((sign * mg * phase + sign * eg * (PHASE_TOTAL - phase))
+                   // PHASE_TOTAL)
 
 
 def evaluate_material(b):
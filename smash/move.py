@@ -1,22 +1,108 @@
 import re
-from base import squares, squares_inv, rank, col, pair2square
+from base import squares, squares_inv, pieces, rank, col, pair2square
 
 
 SAN_EXP = re.compile(r'^(?P<piece>[PNRBQK])?(?P<src>[a-h][1-8]?)?(?P<capture>[x:])?-?(?P<dst>[a-h]?[1-8]?)(?:e\.p)?(?P<promote>(?:=)?[NBRQ]|(?:\()[NBRQ](?:\)))?(?:\+)?$')
 
 
-class Move(object):
-    __slot__ = ['src', 'dst', 'en_passant', 'capture', 'promote']
+# Moves are encoded as integers:
+#
+#   bits  0-5   source square
+#   bits  6-11  destination square
+#   bits 12-15  promoted piece (index in `pieces`, 0 for none)
+#   bits 16-19  captured piece (index in `pieces`, 0 for none)
+#   bit  20     pawn double push (the en passant square is in the middle)
+#
+# Move generators, the board and the search work on the plain integers,
+# `Move` is an int subclass adding a readable interface on top of them.
 
-    def __init__(self, src, dst, capture=None, en_passant=None, promote=None):
-        self.src = src
-        self.dst = dst
-        self.en_passant = en_passant
-        self.capture = capture
-        self.promote = promote
+MOVE_SQUARE_MASK = 0x3f
+MOVE_DST_SHIFT = 6
+MOVE_PROMOTE_SHIFT = 12
+MOVE_CAPTURE_SHIFT = 16
+MOVE_PIECE_MASK = 0xf
+MOVE_DOUBLE_PUSH = 1 << 20
 
-    def __eq__(self, other):
-        return self._tuple() == other._tuple()
+PIECE_CODES = {p: i for i, p in enumerate(pieces) if p != ' '}
+
+# pieces already shifted to their place in the move
+PROMOTE_BITS = {p: i << MOVE_PROMOTE_SHIFT for p, i in PIECE_CODES.iteritems()}
+CAPTURE_BITS = {p: i << MOVE_CAPTURE_SHIFT for p, i in PIECE_CODES.iteritems()}
+CAPTURE_BITS[' '] = 0
+
+
+def encode_move(src, dst, capture=None, en_passant=None, promote=None):
+    m = src | dst << MOVE_DST_SHIFT
+    if promote:
+        m |= PROMOTE_BITS[promote]
+    if capture:
+        m |= CAPTURE_BITS[capture]
+    if en_passant is not None:
+        m |= MOVE_DOUBLE_PUSH
+    return m
+
+
+def move_src(m):
+    return m & MOVE_SQUARE_MASK
+
+
+def move_dst(m):
+    return m >> MOVE_DST_SHIFT & MOVE_SQUARE_MASK
+
+
+def move_promote(m):
+    """Returns the promoted piece or an empty string"""
+
+    return pieces[m >> MOVE_PROMOTE_SHIFT & MOVE_PIECE_MASK].strip()
+
+
+def move_capture(m):
+    """Returns the captured piece or an empty string"""
+
+    return pieces[m >> MOVE_CAPTURE_SHIFT & MOVE_PIECE_MASK].strip()
+
+
+class Move(int):
+    """A move encoded as integer
+
+    It compares and hashes as the plain integer, so it can be mixed with the
+    moves produced by the generators.
+
+    """
+    __slots__ = []
+
+    def __new__(cls, src, dst, capture=None, en_passant=None, promote=None):
+        return int.__new__(cls, encode_move(src, dst, capture=capture,
+                                            en_passant=en_passant,
+                                            promote=promote))
+
+    @classmethod
+    def from_int(cls, m):
+        """Returns a `Move` view of an encoded move"""
+
+        return int.__new__(cls, m)
+
+    @property
+    def src(self):
+        return self & MOVE_SQUARE_MASK
+
+    @property
+    def dst(self):
+        return self >> MOVE_DST_SHIFT & MOVE_SQUARE_MASK
+
+    @property
+    def en_passant(self):
+        if self & MOVE_DOUBLE_PUSH:
+            return (self.src + self.dst) / 2
+        return None
+
+    @property
+    def capture(self):
+        return move_capture(self) or None
+
+    @property
+    def promote(self):
+        return move_promote(self) or None
 
     def __str__(self):
         return str(self._tuple())
@@ -24,12 +110,6 @@ class Move(object):
     def __repr__(self):
         return 'Move' + str(self)
 
-    def __hash__(self):
-        return hash(self._tuple())
-
-    def __lt__(self, other):
-        return self._tuple() < other._tuple()
-
     def _tuple(self):
         return (self.src, self.dst, self.en_passant, self.capture, self.promote)
 
@@ -91,7 +171,7 @@ class Move(object):
         b = board.raw
         if b[dst] != ' ':
             capture = b[dst]
-        elif dst == board.en_passant:
+        elif dst == board.en_passant and b[src] in 'pP':
             capture = 'p' if board.stm == 'w' else 'P'
 
         # check for pawn double push (and set en passant square)
@@ -1,11 +1,14 @@
-"""Move generator"""
+"""Move generator
 
-from itertools import chain
+Moves are yielded encoded as integers (see `smash.move`).
+
+"""
 
-import numpy as np
+from itertools import chain
 
-from smash.move import Move
-from smash.base import pair2square, rank, col, get_side, swap_side
+from smash.move import CAPTURE_BITS, PROMOTE_BITS, MOVE_DOUBLE_PUSH
+from smash.base import \
+    pair2square, rank, col, get_side, swap_side, CASTLING_BITS, PIECE_SIDE
 try:
     from smash.movetables import knight_table, bishop_table, rook_table, king_table
 except ImportError:
@@ -14,6 +17,9 @@ except ImportError:
 
 movefunc = {}
 
+PROMOTES = {'w': [PROMOTE_BITS[p] for p in 'NBRQ'],
+            'b': [PROMOTE_BITS[p] for p in 'nbrq']}
+
 
 def gen_moves(board):
     """Generate all moves for a board
@@ -21,20 +27,164 @@ def gen_moves(board):
     NOTE: this includes also invalid moves
 
     """
-    stm = board.stm
     b = board.raw
 
-    if stm == 'w':
-        cond = np.char.isupper
-    else:
-        cond = np.char.islower
-
-    for sq in np.where(cond(b))[0]:
+    for sq in sorted(board.pieces(board.stm)):
         p = b[sq]
         for m in movefunc[p.lower()](board, sq):
             yield m
 
 
+def gen_captures(board):
+    """Generate captures and promotions for a board
+
+    NOTE: this includes also invalid moves
+
+    """
+    b = board.raw
+
+    for sq in sorted(board.pieces(board.stm)):
+        p = b[sq]
+        for m in capturefunc[p.lower()](board, sq):
+            yield m
+
+
+def gen_quiets(board):
+    """Generate the moves not generated by `gen_captures`
+
+    NOTE: this includes also invalid moves
+
+    """
+    b = board.raw
+
+    for sq in sorted(board.pieces(board.stm)):
+        p = b[sq]
+        for m in quietfunc[p.lower()](board, sq):
+            yield m
+
+
+SLIDERS = {'w': ('bq', 'rq'), 'b': ('BQ', 'RQ')}
+
+
+def find_checks_and_pins(board, stm=None):
+    """Find the pieces checking and pinned to the king of `stm`
+
+    Returns a tuple ``checks, pins`` where `checks` is a list with the
+    squares that resolve each check (the checker square and, for sliders,
+    the squares between it and the king) and `pins` maps every pinned
+    piece square to the squares it can move to.
+
+    """
+    if stm is None:
+        stm = board.stm
+
+    b = board.raw
+    k = board.king_square(stm)
+    checks = []
+    pins = {}
+
+    bishops, rooks = SLIDERS[stm]
+    for rays, sliders in ((bishop_table[k], bishops), (rook_table[k], rooks)):
+        for ray in rays:
+            pinned = None
+            for i, sq in enumerate(ray):
+                p = b[sq]
+                if p == ' ':
+                    continue
+                if PIECE_SIDE[p] == stm:
+                    if pinned is not None:
+                        break
+                    pinned = sq
+                else:
+                    if p in sliders:
+                        if pinned is None:
+                            checks.append(ray[:i+1])
+                        else:
+                            pins[pinned] = ray[:i+1]
+                    break
+
+    if stm == 'w':
+        knight, pawn, dir = 'n', 'p', 1
+    else:
+        knight, pawn, dir = 'N', 'P', -1
+
+    for sq in knight_table[k]:
+        if b[sq] == knight:
+            checks.append([sq])
+
+    r, c = rank(k) + dir, col(k)
+    if 0 <= r <= 7:
+        if c > 0 and b[pair2square(r, c - 1)] == pawn:
+            checks.append([pair2square(r, c - 1)])
+        if c < 7 and b[pair2square(r, c + 1)] == pawn:
+            checks.append([pair2square(r, c + 1)])
+
+    return checks, pins
+
+
+def gen_legal_moves(board, moves=None, checks_and_pins=None):
+    """Generate all the legal moves of the side to move
+
+    Checkers and pinned pieces are computed before generating the moves,
+    the pseudo legal moves of the board are then filtered without making
+    them. Only en passant captures (that can discover a check on the rank
+    of the king) are validated by making the move.
+
+    `moves` are the pseudo legal moves to filter (all the board moves by
+    default) and `checks_and_pins` the result of `find_checks_and_pins`,
+    if it is already known.
+
+    """
+    stm = board.stm
+    xside = swap_side(stm)
+    k = board.king_square(stm)
+    if checks_and_pins is None:
+        checks_and_pins = find_checks_and_pins(board, stm)
+    checks, pins = checks_and_pins
+
+    if moves is None:
+        moves = board.gen_moves()
+
+    evasions = None
+    xrays = ()
+    if checks:
+        if len(checks) == 1:
+            evasions = set(checks[0])
+
+        # the king can't step back on the line of a checking slider
+        xrays = []
+        for line in checks:
+            if board.raw[line[-1]] in 'BRQbrq':
+                x = k - (line[0] - k)
+                if x in king_table[k]:
+                    xrays.append(x)
+
+    en_passant = board.en_passant
+
+    for m in moves:
+        src = m & 0x3f
+        dst = m >> 6 & 0x3f
+
+        if src == k:
+            if dst in xrays or board.can_attack(xside, dst):
+                continue
+        elif evasions is None and checks:
+            # double check, only the king can move
+            continue
+        elif dst == en_passant and m >> 16 & 0xf and board.raw[src] in 'Pp':
+            board.move(m)
+            legal = board.is_legal()
+            board.undo()
+            if not legal:
+                continue
+        elif evasions is not None and dst not in evasions:
+            continue
+        elif src in pins and dst not in pins[src]:
+            continue
+
+        yield m
+
+
 def gen_pawn_moves(board, src):
     """Generate pawn moves"""
 
@@ -46,28 +196,28 @@ def gen_pawn_moves(board, src):
     assert 0 < r < 7
     assert 0 <= c <= 7
     
-    promotes = [None]
+    promotes = [0]
     if stm == 'w':
         dir = 1
         if r == 6:
-            promotes = 'NBRQ'
+            promotes = PROMOTES[stm]
         first_rank = 1
     else:
         dir = -1
         if r == 1:
-            promotes = 'nbrq'
+            promotes = PROMOTES[stm]
         first_rank = 6
 
     nextsq = pair2square(r + dir, c)
 
     if b[nextsq] == ' ':
         for p in promotes:
-            yield Move(src, nextsq, promote=p)
+            yield src | nextsq << 6 | p
 
         if first_rank == r:
             doublesq = pair2square(r + dir*2, c)
             if b[doublesq] == ' ':
-                yield Move(src, doublesq, en_passant=nextsq)
+                yield src | doublesq << 6 | MOVE_DOUBLE_PUSH
 
     # gen captures
     nextsqs = []
@@ -79,9 +229,9 @@ def gen_pawn_moves(board, src):
     for nextsq in nextsqs:
         if b[nextsq] != ' ' and get_side(b[nextsq]) != stm:
             for p in promotes:
-                yield Move(src, nextsq, capture=b[nextsq], promote=p)
+                yield src | nextsq << 6 | CAPTURE_BITS[b[nextsq]] | p
         elif nextsq == board.en_passant:
-            yield Move(src, nextsq, capture=b[src].swapcase())
+            yield src | nextsq << 6 | CAPTURE_BITS[b[src].swapcase()]
 
 
 def _gen_ray_moves(board, src, rays, stm):
@@ -93,10 +243,10 @@ def _gen_ray_moves(board, src, rays, stm):
         for dst in ray:
             if b[dst] != ' ':
                 if get_side(b[dst]) != stm:
-                    yield Move(src, dst, capture=b[dst])
+                    yield src | dst << 6 | CAPTURE_BITS[b[dst]]
                 break
             else:
-                yield Move(src, dst)
+                yield src | dst << 6
 
 
 def gen_bishop_moves(board, src, stm=None):
@@ -131,9 +281,9 @@ def _gen_simple_moves(board, src, dsts, stm):
     for dst in dsts:
         if b[dst] != ' ':
             if get_side(b[dst]) != stm:
-                yield Move(src, dst, capture=b[dst])
+                yield src | dst << 6 | CAPTURE_BITS[b[dst]]
         else:
-            yield Move(src, dst)
+            yield src | dst << 6
         
 
 def gen_knight_moves(board, src, stm=None):
@@ -167,19 +317,20 @@ def _gen_castling_moves(board, src, stm):
     qs_transit = src - 1
     qs_transit_rook = src - 3
     if stm == 'w':
-        ks = 'K'
-        qs = 'Q'
+        ks = CASTLING_BITS['K']
+        qs = CASTLING_BITS['Q']
     else:
-        ks = 'k'
-        qs = 'q'
+        ks = CASTLING_BITS['k']
+        qs = CASTLING_BITS['q']
 
+    castling = board.castling_rights
     xside = swap_side(stm)
-    if board.castling[ks] and b[ks_transit] == ' ' and b[ks_dst] == ' ' \
+    if castling & ks and b[ks_transit] == ' ' and b[ks_dst] == ' ' \
             and not board.can_attack(xside, ks_transit):
-        yield Move(src, ks_dst)
-    if board.castling[qs] and b[qs_transit] == ' ' and b[qs_transit_rook] == ' ' \
+        yield src | ks_dst << 6
+    if castling & qs and b[qs_transit] == ' ' and b[qs_transit_rook] == ' ' \
             and b[qs_dst] == ' ' and not board.can_attack(xside, qs_transit):
-        yield Move(src, qs_dst)
+        yield src | qs_dst << 6
     
 
 def _gen_ray_captures(board, src, rays, stm):
@@ -224,9 +375,126 @@ def gen_rook_captures(board, src, stm=None):
         yield m
 
 
+def gen_pawn_captures(board, src):
+    """Generate pawn captures and promotions"""
+
+    b = board.raw
+    stm = board.stm
+    r = rank(src)
+    c = col(src)
+
+    promotes = [0]
+    if stm == 'w':
+        dir = 1
+        if r == 6:
+            promotes = PROMOTES[stm]
+    else:
+        dir = -1
+        if r == 1:
+            promotes = PROMOTES[stm]
+
+    nextsq = pair2square(r + dir, c)
+    if promotes[0] and b[nextsq] == ' ':
+        for p in promotes:
+            yield src | nextsq << 6 | p
+
+    for dc in (-1, 1):
+        if 0 <= c + dc <= 7:
+            nextsq = pair2square(r + dir, c + dc)
+            if b[nextsq] != ' ' and get_side(b[nextsq]) != stm:
+                for p in promotes:
+                    yield src | nextsq << 6 | CAPTURE_BITS[b[nextsq]] | p
+            elif nextsq == board.en_passant:
+                yield src | nextsq << 6 | CAPTURE_BITS[b[src].swapcase()]
+
+
+def gen_pawn_quiets(board, src):
+    """Generate pawn pushes (not promoting)"""
+
+    b = board.raw
+    r = rank(src)
+
+    if board.stm == 'w':
+        dir = 8
+        first_rank, last_rank = 1, 6
+    else:
+        dir = -8
+        first_rank, last_rank = 6, 1
+
+    nextsq = src + dir
+    if r != last_rank and b[nextsq] == ' ':
+        yield src | nextsq << 6
+        if r == first_rank and b[nextsq + dir] == ' ':
+            yield src | (nextsq + dir) << 6 | MOVE_DOUBLE_PUSH
+
+
+def _gen_ray_capture_moves(board, src, rays):
+    b = board.raw
+    stm = board.stm
+    for ray in rays:
+        for dst in ray:
+            if b[dst] != ' ':
+                if get_side(b[dst]) != stm:
+                    yield src | dst << 6 | CAPTURE_BITS[b[dst]]
+                break
+
+
+def _gen_ray_quiet_moves(board, src, rays):
+    b = board.raw
+    for ray in rays:
+        for dst in ray:
+            if b[dst] != ' ':
+                break
+            yield src | dst << 6
+
+
+def _gen_simple_capture_moves(board, src, dsts):
+    b = board.raw
+    stm = board.stm
+    for dst in dsts:
+        if b[dst] != ' ' and get_side(b[dst]) != stm:
+            yield src | dst << 6 | CAPTURE_BITS[b[dst]]
+
+
+def _gen_simple_quiet_moves(board, src, dsts):
+    b = board.raw
+    for dst in dsts:
+        if b[dst] == ' ':
+            yield src | dst << 6
+
+
+def gen_king_quiets(board, src):
+    for m in _gen_simple_quiet_moves(board, src, king_table[src]):
+        yield m
+
+    if not board.checked:
+        for m in _gen_castling_moves(board, src, board.stm):
+            yield m
+
+
 movefunc['p'] = gen_pawn_moves
 movefunc['n'] = gen_knight_moves
 movefunc['b'] = gen_bishop_moves
 movefunc['r'] = gen_rook_moves
 movefunc['q'] = gen_queen_moves
 movefunc['k'] = gen_king_moves
+
+capturefunc = {
+    'p': gen_pawn_captures,
+    'n': lambda board, src: _gen_simple_capture_moves(board, src, knight_table[src]),
+    'b': lambda board, src: _gen_ray_capture_moves(board, src, bishop_table[src]),
+    'r': lambda board, src: _gen_ray_capture_moves(board, src, rook_table[src]),
+    'q': lambda board, src: _gen_ray_capture_moves(
+        board, src, chain(bishop_table[src], rook_table[src])),
+    'k': lambda board, src: _gen_simple_capture_moves(board, src, king_table[src]),
+    }
+
+quietfunc = {
+    'p': gen_pawn_quiets,
+    'n': lambda board, src: _gen_simple_quiet_moves(board, src, knight_table[src]),
+    'b': lambda board, src: _gen_ray_quiet_moves(board, src, bishop_table[src]),
+    'r': lambda board, src: _gen_ray_quiet_moves(board, src, rook_table[src]),
+    'q': lambda board, src: _gen_ray_quiet_moves(
+        board, src, chain(bishop_table[src], rook_table[src])),
+    'k': gen_king_quiets,
+    }
@@ -0,0 +1,106 @@
+"""Staged move generation
+
+Moves are generated in stages, a stage is generated only when the previous
+one is exhausted: a search that gets a cutoff early doesn't pay for the
+moves it never tries.
+
+"""
+
+from smash.movegen import movefunc, find_checks_and_pins, gen_legal_moves
+from smash.ordering import mvv_lva
+
+
+STAGE_TT, STAGE_CAPTURES, STAGE_KILLERS, STAGE_QUIETS, STAGE_DONE = range(5)
+
+
+def is_pseudo_legal(board, m):
+    """Returns true if `m` is a pseudo legal move of the board
+
+    Useful for moves coming from other positions (i.e. hash and killer
+    moves).
+
+    """
+    p = board.raw[m & 0x3f]
+    if p == ' ' or (p.isupper() != (board.stm == 'w')):
+        return False
+    return m in movefunc[p.lower()](board, m & 0x3f)
+
+
+class MovePicker(object):
+    """Generate the legal moves of a board in stages
+
+    The hash move is returned first, then the captures (and promotions) in
+    MVV-LVA order, the killer moves, the counter move and finally the
+    remaining quiet moves, sorted by `history` (a [from][to] table) when
+    given. With `captures_only` just the captures are generated.
+
+    The current stage is available in `stage` while iterating.
+
+    """
+
+    def __init__(self, board, tt_move=None, killers=(), captures_only=False,
+                 counter_move=0, history=None):
+        self.board = board
+        self.tt_move = tt_move
+        self.killers = killers
+        self.counter_move = counter_move
+        self.history = history
+        self.captures_only = captures_only
+        self.stage = STAGE_TT
+
+    def __iter__(self):
+        board = self.board
+        checks_and_pins = find_checks_and_pins(board)
+        tt_move = self.tt_move
+
+        if self.captures_only:
+            tt_move = None
+        elif tt_move:
+            self.stage = STAGE_TT
+            if self._is_legal(tt_move, checks_and_pins):
+                yield tt_move
+            else:
+                tt_move = None
+
+        self.stage = STAGE_CAPTURES
+        captures = [m for m in gen_legal_moves(board, board.gen_captures(),
+                                               checks_and_pins)
+                    if m != tt_move]
+        captures.sort(key=lambda m: mvv_lva(board, m), reverse=True)
+        for m in captures:
+            yield m
+
+        if self.captures_only:
+            self.stage = STAGE_DONE
+            return
+
+        self.stage = STAGE_KILLERS
+        done = [tt_move]
+        for m in tuple(self.killers) + (self.counter_move,):
+            # killers come from sibling nodes: they must be quiet moves
+            # legal in this position
+            if m and m not in done and not m >> 12 & 0xff \
+                    and self._is_legal(m, checks_and_pins):
+                done.append(m)
+                yield m
+
+        self.stage = STAGE_QUIETS
+        quiets = [m for m in gen_legal_moves(board, board.gen_quiets(),
+                                             checks_and_pins)
+                  if m not in done]
+        history = self.history
+        if history is not None:
+            quiets.sort(key=lambda m: history.item(m & 0x3f, m >> 6 & 0x3f),
+                        reverse=True)
+        for m in quiets:
+            yield m
+
+        self.stage = STAGE_DONE
+
+    def _is_legal(self, m, checks_and_pins):
+        board = self.board
+        if not is_pseudo_legal(board, m):
+            return False
+        for _ in gen_legal_moves(board, [m], checks_and_pins):
+            return True
+        return False
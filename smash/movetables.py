@@ -261,3 +261,792 @@ bishop_table = \
         [[52, 43, 34, 25, 16], [54, 47]],
         [[53, 44, 35, 26, 17, 8], [55]],
         [[54, 45, 36, 27, 18, 9, 0]]]
+
+zobrist_piece = \
+    {   'B': [   6496952152569189433,
+                 -951551848224303632,
+                 5513243670176322119,
+                 4841912675550434109,
+                 -5265454178990567337,
+                 -6519711444614648294,
+                 -9190611701111629969,
+                 -448785358591578070,
+                 1243182757476630853,
+                 -5266449989301080621,
+                 -6091244676096538964,
+                 -5270096293760107337,
+                 -5070579631292524903,
+                 8650822444153034661,
+                 -7561422697449924005,
+                 -5786826230449866094,
+                 2485746148721150300,
+                 -3993124118064198671,
+                 -609497240908509805,
+                 7208721997838127509,
+                 735478099363314844,
+                 581654796306673759,
+                 4265620146437907711,
+                 -2963961628208797794,
+                 3657195008243560439,
+                 -6104323765308432518,
+                 -2216233356834631049,
+                 -3538592457183091191,
+                 6061494017117484109,
+                 -5983829023918323021,
+                 3710442829875222222,
+                 2946876304291361638,
+                 1602604456818155256,
+                 -4429649832761636243,
+                 8982110328199761268,
+                 2294404952172215374,
+                 1208351934323077142,
+                 -6006765039288471611,
+                 -8764553097848082152,
+                 -6565411109287797715,
+                 -470843265969789274,
+                 303183364212797691,
+                 -8488345595040654789,
+                 -748090426234815968,
+                 -4628079047207299873,
+                 5005815670442565618,
+                 -8910178967259541737,
+                 -4996654503152825113,
+                 7667770408128989775,
+                 3809366972946208892,
+                 -7596935768334030091,
+                 3764480489159005824,
+                 6809921751758109641,
+                 -7142833380897819057,
+                 2312828895604781117,
+                 -3847850861649102120,
+                 7295050952810088337,
+                 -344662217575021563,
+                 -8468661613347202442,
+                 9128712076996279217,
+                 421430109743443782,
+                 4950868242456960080,
+                 4076137104432997960,
+                 -8791680306829508593],
+        'K': [   -7233156147553965689,
+                 -6587948101557856033,
+                 464732828610854136,
+                 -2090839317043006426,
+                 -89134843491837348,
+                 -690952172377039708,
+                 -9029609033741232809,
+                 -2999781091505988025,
+                 7476632049165904862,
+                 -2909289026172560104,
+                 -1668583950701591230,
+                 -5994035479072950702,
+                 38807203744369624,
+                 4221358096054683499,
+                 -7275117782480084147,
+                 -5840419815122102011,
+                 1107498648334308845,
+                 -4881852097545584803,
+                 6103828863036991731,
+                 -3136201854049955928,
+                 -9035281906317434216,
+                 -6634354272499013523,
+                 -998690153347377345,
+                 4234304820596566353,
+                 4044805733475623798,
+                 7716752839894767361,
+                 5841128482063300523,
+                 6313133049908346179,
+                 6777583643256944936,
+                 -106846927068014231,
+                 8094483748383892761,
+                 4517083812058745102,
+                 7578787393265012538,
+                 3984486737808425891,
+                 -9031157256892601759,
+                 359766064192466137,
+                 3548927087412024693,
+                 5808630858491793513,
+                 -3380794008651286495,
+                 9189894086598368359,
+                 -4622008972527438973,
+                 -1952263711766138073,
+                 -7656176032585491402,
+                 -146438029420067887,
+                 6761555216589975229,
+                 -5129688771564701279,
+                 -7720975811895166277,
+                 413035075560398106,
+                 5675516136977828464,
+                 3882659094959804948,
+                 -1484355733367944921,
+                 8734514891027552848,
+                 5971579260778505434,
+                 -1736504791040679159,
+                 2884988331469547627,
+                 -1244518086601443145,
+                 -7855713677670197572,
+                 -4490184988417007914,
+                 2707164812337532892,
+                 -6940285526589585673,
+                 -8882905182464088221,
+                 -5469894449870438938,
+                 -6529541679809204733,
+                 -3724366708887111832],
+        'N': [   4344694985037562711,
+                 -7491985141738647518,
+                 3144800696975647117,
+                 6075212237835670639,
+                 7667819841467030016,
+                 -4303016972622044273,
+                 -993745984382171471,
+                 -869153419740803054,
+                 3891836449677368402,
+                 1777954679748884818,
+                 7412608283359373462,
+                 -4068416853075605917,
+                 7384925072022822774,
+                 1096826542041017876,
+                 -2380949840086751778,
+                 951854827620154221,
+                 4330843178016344351,
+                 5474883499059738776,
+                 3585074524835375261,
+                 -2072510084030928264,
+                 3786029072036918738,
+                 7191984541789080482,
+                 722221734941887472,
+                 7937610674408624164,
+                 -5927828352310602108,
+                 -2803285723250168274,
+                 9029628697893925528,
+                 -8337437232199760729,
+                 7903925600069388245,
+                 868793098645175133,
+                 -5802238422917888185,
+                 600749744900006958,
+                 2900580644194573500,
+                 8257711762688408407,
+                 -8351753835992706491,
+                 117858924128336111,
+                 3102510723456707781,
+                 4621060079918705108,
+                 -1047413214076690428,
+                 7229434733446433380,
+                 8588125577162230928,
+                 5007036974084813041,
+                 8592476587463894805,
+                 1977582621759133350,
+                 -8310150532198621652,
+                 -8551529898698924720,
+                 3698762181597661715,
+                 7411908922318183988,
+                 8506196129620239523,
+                 8715265769272504912,
+                 8945011783897836919,
+                 7697366865436956788,
+                 5199808603834399449,
+                 2754467161712252371,
+                 -618476197675002113,
+                 -6396361866286588821,
+                 -9018662064112440539,
+                 1320787187543704081,
+                 -3276578959913368742,
+                 4467307199777734479,
+                 -214011219782330441,
+                 -1866584760851011043,
+                 7545579461611777898,
+                 624329078843967489],
+        'P': [   1767548932466200326,
+                 2026084282422487854,
+                 -877256832492350295,
+                 -8650853117524130603,
+                 -7453397625642134315,
+                 8517613802453887889,
+                 -1213715385913078491,
+                 -4148669172817515528,
+                 -8873566016786839504,
+                 -5324058905249920852,
+                 4948979210474927843,
+                 -1928755678633729626,
+                 2928356201020981374,
+                 -2665157509104721282,
+                 -662306091828138506,
+                 -1440784955971542070,
+                 -8101596010654038582,
+                 -9207869872485670580,
+                 3733391733521308734,
+                 -3777198764981340674,
+                 4984579002724574465,
+                 1776923747852209655,
+                 -6332551866903784886,
+                 3136632395756022362,
+                 -1867048315314402985,
+                 2092629091070797625,
+                 -7071934871101307405,
+                 -1935228044180965993,
+                 6862848262372209034,
+                 85764039615552111,
+                 -2060360493243791323,
+                 -774004870916182877,
+                 -7025999650669434789,
+                 7852604390004526338,
+                 5866297060575002185,
+                 -9040280707825228735,
+                 -3201960778228435692,
+                 5432901147465539066,
+                 2553741042446367946,
+                 7448630620074757009,
+                 5164592752088497779,
+                 6509335141650617223,
+                 6935580016198661088,
+                 1584678854621948662,
+                 -3822400353818458899,
+                 165762122479391633,
+                 765489977743036414,
+                 -3418992368638332432,
+                 7674933960378345864,
+                 982615057987639425,
+                 -1378990580505959990,
+                 -6987445627236757684,
+                 -1665654778128313065,
+                 -6537045332813787571,
+                 5312997771668078041,
+                 170399111978280849,
+                 7674262107230324140,
+                 -4434448666785770322,
+                 3914415623618083483,
+                 7401814941881090351,
+                 9219698676233537745,
+                 6869330849357096766,
+                 87040376095162850,
+                 9197986906499162271],
+        'Q': [   -1483691925305833909,
+                 543265478574208660,
+                 -4134162677888737991,
+                 -2763314767790606844,
+                 217836326590908159,
+                 -4609727737950920954,
+                 4339804729250157714,
+                 -2481505377392557703,
+                 395419611535904911,
+                 -7247582651725400423,
+                 7357823590020769974,
+                 4501243857786777234,
+                 -2516606080507712772,
+                 5477143542084801645,
+                 -7417071108320557126,
+                 -2526819062683735494,
+                 -5491567278931408614,
+                 -134427957403602052,
+                 -7866372891186614486,
+                 -6310891874672634657,
+                 -3101734392904720864,
+                 5447066729382499784,
+                 -1686078260994894316,
+                 4891483708713840263,
+                 2632987804423245306,
+                 -6716774682949879781,
+                 -6977046368133118251,
+                 329111660900085239,
+                 -6308707700890993819,
+                 4285385202785905487,
+                 2688606138108159705,
+                 2682392535147656529,
+                 9205299406941120887,
+                 373705247905971035,
+                 2758844486961033787,
+                 7250773938514879249,
+                 -1257481496017756464,
+                 8826004066405752542,
+                 1898054169128021370,
+                 -5610227704057757050,
+                 8407797194092244267,
+                 8969718468533642930,
+                 -8855988898151941273,
+                 2237527069290602445,
+                 -7592621328906321743,
+                 -6636000627527522562,
+                 5959139608778086486,
+                 8827964377120065466,
+                 7838963836939568932,
+                 5237822459425453204,
+                 5869973917086932398,
+                 6508011775505949302,
+                 -1927690227169214839,
+                 5560360671346842942,
+                 5329994066617587128,
+                 365544512843475888,
+                 -1517528981264976823,
+                 -7675321294907276065,
+                 -7854519851893233960,
+                 8705438132457564562,
+                 6948582295750715101,
+                 2355772766511855269,
+                 -2999040023238646960,
+                 7449901584008257359],
+        'R': [   7476904381852005497,
+                 -3357940496656050489,
+                 -7529513402150624617,
+                 5930087914222516155,
+                 -1559937612546049675,
+                 2958271463496702743,
+                 9178618255696351798,
+                 6463736691015647548,
+                 -7887034749629951256,
+                 -8249666891789238519,
+                 1945794286533746885,
+                 -7686721001591433197,
+                 -13559173580953927,
+                 -1090370800128567598,
+                 -4775795097341040648,
+                 1797704581186829563,
+                 -4857040809699154384,
+                 5291350376895588962,
+                 -6650381554869160440,
+                 3934540406095765384,
+                 3167971108036978950,
+                 -2546866115005236865,
+                 6301161948750471414,
+                 -2281111070382736691,
+                 2611987306793509400,
+                 2856772755612446986,
+                 -2551544328965499426,
+                 -7113591256048260444,
+                 -3871341340512685528,
+                 -2065616784624624172,
+                 7304984606895500811,
+                 -2166819671861545905,
+                 -2804196579485960202,
+                 -1890814429144381920,
+                 -4006792560690314994,
+                 -4572533788894564338,
+                 2976882698271877479,
+                 -2181040935700419795,
+                 -6538451827121056841,
+                 6487644187902329692,
+                 -4704012158734925277,
+                 -5813433358049396343,
+                 -8117569648431058483,
+                 4834909510173530001,
+                 -8986060617185868017,
+                 3315434876196415924,
+                 7172526709285770398,
+                 3642837046230951421,
+                 -8369648830199219994,
+                 -8651849172402927437,
+                 -421634369894710165,
+                 -2807303082717508807,
+                 -2947129754231540952,
+                 1351900408129152833,
+                 -4809985364920207738,
+                 -61226508381960922,
+                 -3405390002451880145,
+                 -9019909975569648550,
+                 -1887377719697925535,
+                 283088119415168737,
+                 7962279296454543450,
+                 4182975387467715627,
+                 1642006189109887008,
+                 4933723569085775696],
+        'b': [   -4975013729064243369,
+                 -280823686836084666,
+                 -3263186539363751123,
+                 -6642181674183819386,
+                 3721174709668365823,
+                 1920595500429991244,
+                 -681081171332716792,
+                 6247998147328191502,
+                 1998742956798514275,
+                 -1404305602194337159,
+                 1761170058952321228,
+                 -5789800959033078982,
+                 1589301381605074848,
+                 6081279405264245259,
+                 -5454170646935540466,
+                 -1274132442780407550,
+                 -4379230641030895304,
+                 7809007450194773910,
+                 -8762648206920391957,
+                 5572156116208238391,
+                 8363483113981976550,
+                 -4742406876077588322,
+                 -6237287459688606410,
+                 3491467423989242576,
+                 8907368906555448265,
+                 -137360713921126908,
+                 -3864456110019858346,
+                 -8501038948526069016,
+                 5314000858703285126,
+                 4631749254911419027,
+                 6892932330320051481,
+                 -1106339046917522441,
+                 5918640843421601163,
+                 1482120046336246824,
+                 1967343908973515262,
+                 -1822498080666986817,
+                 8395994603025063726,
+                 3029628814333964308,
+                 25744811762848611,
+                 -6549746623917028424,
+                 3500851591426678168,
+                 3809781829894181127,
+                 8931931615357312861,
+                 -3077836345019090486,
+                 2695819475210270337,
+                 -3766119027332495044,
+                 -7966812582201250271,
+                 185403525864946772,
+                 -485315417739609866,
+                 1432688504054250268,
+                 8222752040280208891,
+                 -3624669568519436745,
+                 -5162529740595839030,
+                 8287177772187719127,
+                 3861570502533073087,
+                 2126260279205274726,
+                 7099783976252312611,
+                 8594741330192065021,
+                 2151612719790183960,
+                 1639041714698731030,
+                 2132009705446259017,
+                 -3028139009180140141,
+                 -2561472657522505444,
+                 5443348668582978272],
+        'k': [   1456288016373987975,
+                 7113922544484955724,
+                 9191103070382817729,
+                 8008118043731430597,
+                 7906266076915016467,
+                 7831281821511285122,
+                 7488761486182607810,
+                 -2078415839919810959,
+                 3317906252850880982,
+                 1250581639038858147,
+                 8373582202253952903,
+                 8029352053914408317,
+                 -1178249936951873929,
+                 -608358188158388361,
+                 6904274459899929597,
+                 3251624733370575485,
+                 4466150159737934799,
+                 -5975462993105117163,
+                 1077960566490138485,
+                 639468044926297381,
+                 2003735749035936652,
+                 -6061483057513873463,
+                 -1556662456091498877,
+                 8786915915969195571,
+                 6147378137537717694,
+                 8213661843105984285,
+                 -971448939980663259,
+                 6418062499452994101,
+                 5304323768273233027,
+                 6273466183083915253,
+                 -4522029470197206192,
+                 -6508014448409491961,
+                 -1048414328340390918,
+                 -2044395360966407395,
+                 -619342788885960672,
+                 7907408845972064470,
+                 -3355118522613854543,
+                 9113277593353977066,
+                 4009884440011653936,
+                 -1711603233427164103,
+                 3102076003672818788,
+                 -7581646956620023675,
+                 -7914314363830750563,
+                 -8990035845126161732,
+                 -8004062659236270079,
+                 -5158430985420691184,
+                 -1920583227981512977,
+                 4667971104113361020,
+                 1064966514702538087,
+                 3831976223977868920,
+                 9039742806017072361,
+                 2005271896794123110,
+                 5237263866139752395,
+                 8942318788246920048,
+                 -4933038654725916224,
+                 7543452836599638194,
+                 -6580464539153738303,
+                 -4179614502900964392,
+                 2399437425631705553,
+                 6460877164215665498,
+                 1990720932279494842,
+                 -3159020259701602821,
+                 -5412788971183425064,
+                 -5687484645927225964],
+        'n': [   7853355047210979869,
+                 -4033716606303840059,
+                 -7081703874473679009,
+                 -5766541694176170744,
+                 1048655181646800497,
+                 -7477515944704375005,
+                 6860920832067261420,
+                 -6260457446061843995,
+                 -614042365981659263,
+                 8405708450726562438,
+                 -2133889025654672573,
+                 4587842731059623790,
+                 -2506495961165850141,
+                 5609683243573860274,
+                 -4205216730237476582,
+                 8913755058819298510,
+                 -6463593583626717698,
+                 -367020442788216854,
+                 -4764347067117273876,
+                 6314865703027335654,
+                 -4826122328285434857,
+                 7805122950060086410,
+                 2801039500985524500,
+                 4239556608765654687,
+                 -1648606848194931803,
+                 7685416472599094525,
+                 -8982801482803852033,
+                 -6541996778408752088,
+                 4454666422441918902,
+                 1867850037963824035,
+                 4457745468215845998,
+                 -5485157668918999898,
+                 6718359042396720976,
+                 9029702750243051500,
+                 7221227664764642774,
+                 -1349029185883212347,
+                 -3914275709333412572,
+                 -1102878170053429346,
+                 1712003463973103654,
+                 349219543888637613,
+                 1316851877239703472,
+                 -2207143027117291170,
+                 4120461591773369379,
+                 -5009734876719966610,
+                 3720862785453758821,
+                 -6095381543364084473,
+                 691012397225131342,
+                 8196772143352767161,
+                 4218354878662466508,
+                 -8554563797607461746,
+                 5119640517780376917,
+                 -7332760395979588205,
+                 3080589442893951588,
+                 927737967801044984,
+                 -4927359956084544295,
+                 3402890307948409987,
+                 -9097065883587539070,
+                 -6375498310611102093,
+                 -320387535126524023,
+                 6707875185326708444,
+                 8810943676348145582,
+                 -2187370743458575566,
+                 -2449367402019554010,
+                 8194210526003648298],
+        'p': [   227756372926824035,
+                 -5866427328579865812,
+                 -3176415743365169203,
+                 -6451837887518458000,
+                 4378213765061013100,
+                 4124909544979082754,
+                 2332148019451625078,
+                 7668777781061269004,
+                 4509771130302326821,
+                 -1024627035514731969,
+                 2545364011530466526,
+                 2589905376184707334,
+                 -5004608919707967381,
+                 253017807651331584,
+                 1807756846159164381,
+                 4700296223794980559,
+                 7368723521238610233,
+                 7432814302488976901,
+                 -9096427325399570395,
+                 -5743691385553538411,
+                 1337873270021088160,
+                 140199770568574420,
+                 6451385597347882876,
+                 -3380320374978604559,
+                 -3936484120170904006,
+                 7189082997396237593,
+                 383946285954013495,
+                 49809736359843467,
+                 3862581297892788767,
+                 -5553121225117024867,
+                 941622597910117761,
+                 -6359463560972223319,
+                 1865232980708164001,
+                 -8775073075052125876,
+                 5421185307119789604,
+                 8493532435134788204,
+                 -8305417537715751965,
+                 9083174949881541552,
+                 -3561575823193005722,
+                 4867942128158923381,
+                 -1979970254179498572,
+                 -2331364210501417062,
+                 -6501473757551882608,
+                 -8261391198246117553,
+                 -417195059068910843,
+                 -1366469049653918658,
+                 2712496878293758315,
+                 8135777411737523561,
+                 -3274589049674280801,
+                 -229147146702050105,
+                 1796895369172170271,
+                 -7297474187031358066,
+                 -4918934876667379659,
+                 -9010207190221303290,
+                 -5244064704192976724,
+                 507036037395298561,
+                 8226310861883963555,
+                 -1752069563342595609,
+                 -2415399826330404374,
+                 -6324937330824217763,
+                 4064880478225085749,
+                 3801163650269711833,
+                 -5578685286877842225,
+                 2304634476623791634],
+        'q': [   -4966527475600653333,
+                 4717858304123556116,
+                 -179968882611220039,
+                 8248276287657813458,
+                 -895266759963170469,
+                 6549481847051112399,
+                 7010458415608417976,
+                 3153082441431330819,
+                 7783712092666433772,
+                 3149723754947416810,
+                 -4503685375375658428,
+                 5107142884010421518,
+                 -1010729883064628642,
+                 975685259098674323,
+                 -104091869112222227,
+                 -7534748972511292759,
+                 5164136650094271404,
+                 481017051783920331,
+                 6616524359157593459,
+                 6817464293580615103,
+                 -908249335586983027,
+                 -4982357676288829880,
+                 4692170246070735639,
+                 -4975872544936463491,
+                 2287858385806958617,
+                 -7806135244045202814,
+                 5999325577802887391,
+                 8943655605083586109,
+                 -7697057639195570915,
+                 6421170975588264367,
+                 -9148710105803737476,
+                 5511808323058624036,
+                 -5303571798172465875,
+                 7146519082164545021,
+                 -6791296948201951968,
+                 3745862747420679164,
+                 3382721497699085143,
+                 -4095805477615311247,
+                 8690214029052674958,
+                 6861247046658575288,
+                 -9147038691495812456,
+                 5780308917883834566,
+                 -7348097056731175079,
+                 -8459695405656790853,
+                 6814362390334739721,
+                 3723724143855200850,
+                 -2495200929564770845,
+                 2392199994442951707,
+                 8877723111643658501,
+                 7237506615389152039,
+                 -8752145949266654247,
+                 -5878288627472290817,
+                 6086221971336254195,
+                 7697957902058492143,
+                 -4697717941423981663,
+                 -5875969691936941839,
+                 5782827444731863562,
+                 -5884842922478005070,
+                 8724989514520745796,
+                 5298547289542084877,
+                 -7023961925520717749,
+                 -68839084953006446,
+                 3971095117917246233,
+                 -5234933224698933634],
+        'r': [   -3104912280866310361,
+                 2881979013999608166,
+                 810550557004546497,
+                 -2780707487382184510,
+                 -8354764011921167803,
+                 5693511628136283300,
+                 1198339796931779391,
+                 -2570706097986070225,
+                 5455289091194060451,
+                 804687440965948991,
+                 8083675267457423693,
+                 5352328805217920146,
+                 4344169911261887563,
+                 9222359760223600692,
+                 -2300953438897835212,
+                 5488591402018652503,
+                 -2157041774213243541,
+                 7462741680895020047,
+                 468254564016990167,
+                 -1208595168582863426,
+                 8529474368657016266,
+                 6958458040616597862,
+                 4107830803153654700,
+                 -7647623374056248943,
+                 5933950583919834638,
+                 -1877075523224913314,
+                 4635264173206974824,
+                 -4783266525297231476,
+                 -3115230077965594569,
+                 1774961578011111006,
+                 8055450714520778535,
+                 6532282590302876695,
+                 -6725583901271645565,
+                 -1672724067255083745,
+                 3977714132274520955,
+                 -3592222420013116795,
+                 -4212160068133344681,
+                 1456765421906283406,
+                 1752703047077485929,
+                 -1248243586977006195,
+                 -8331820127200069252,
+                 -1302409549985402291,
+                 6502200706252428377,
+                 -6755489542183464451,
+                 896663002692285995,
+                 9197985426154743954,
+                 -8981795290649287877,
+                 6423552735101574565,
+                 -8886142876401279267,
+                 1022297832663249814,
+                 -4513717230448334153,
+                 1606297261090660885,
+                 2796879839460581306,
+                 -6642771884235928456,
+                 7995444659932731280,
+                 4579583901008893575,
+                 9093483890348198915,
+                 -7856664061687712148,
+                 -4179322269257963469,
+                 538394937818989296,
+                 8505121670214857040,
+                 4355838590140902175,
+                 600664634120310013,
+                 7605576550007556044]}
+
+zobrist_en_passant = \
+    [   7142823514841939323,
+        -3587882452822547462,
+        2983625093642931964,
+        -4472589156448395241,
+        -1437573058435823544,
+        2747582163574821991,
+        -6213972356980762754,
+        7819068401700618519]
+
+zobrist_castling = \
+    {   'K': -7071135870935523949,
+        'Q': -7361970353334386329,
+        'k': -6549321717389737700,
+        'q': -731680551545157381}
+
+zobrist_stm = \
+    8922923659006559940
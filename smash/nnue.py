@@ -0,0 +1,183 @@
+"""Small NNUE-style evaluator
+
+The network has HalfKP-like inputs: for each side (the perspective) the
+pieces other than the kings are indexed by the square of the king of the
+perspective, their type (own or their pawn, knight, bishop, rook, queen)
+and their square, with the board flipped for black. The inputs feed a
+first layer (the accumulator) of `ACC_SIZE` neurons for each perspective,
+kept by the board and updated incrementally as the pieces move. The
+accumulators of the side to move and of the other side, clipped, feed two
+dense layers and the output.
+
+All the arithmetic is integer: int16 accumulators, int8 dense weights and
+int32 sums scaled down by `SHIFT` bits after each dense layer.
+
+The weights are stored in a binary file (see `write_weights`) mapped in
+memory with `np.memmap`, so loading is immediate.
+
+"""
+
+import numpy as np
+
+from smash.evaluate import PACKED_PIECES
+
+
+MAGIC = 'SMNN'
+VERSION = 1
+
+ACC_SIZE = 32
+HIDDEN1 = 32
+HIDDEN2 = 32
+# own and their pawn, knight, bishop, rook and queen
+PIECE_TYPES = 10
+FEATURES = 64 * PIECE_TYPES * 64
+
+# activation range of the accumulator and of the hidden layers
+ACC_CLIP = 1023
+HIDDEN_CLIP = 127
+SHIFT = 6
+
+# data offsets are aligned to this size
+ALIGN = 64
+
+# (name, dtype, shape) of the arrays in the order of the file
+LAYOUT = [
+    ('w1', np.int16, (FEATURES, ACC_SIZE)),
+    ('b1', np.int16, (ACC_SIZE, )),
+    ('w2', np.int8, (2 * ACC_SIZE, HIDDEN1)),
+    ('b2', np.int32, (HIDDEN1, )),
+    ('w3', np.int8, (HIDDEN1, HIDDEN2)),
+    ('b3', np.int32, (HIDDEN2, )),
+    ('w4', np.int8, (HIDDEN2, )),
+    ('b4', np.int32, (1, )),
+    ]
+
+HEADER = np.dtype([('magic', 'S4'), ('version', '<u4'), ('features', '<u4'),
+                   ('acc_size', '<u4'), ('hidden1', '<u4'), ('hidden2', '<u4')])
+
+
+def _feature_offsets():
+    """Offsets of the features by perspective, piece and square
+
+    The square of the king of the perspective adds ``king * PIECE_TYPES * 64``
+    (flipped for black as the squares).
+
+    """
+    offsets = {}
+    for perspective, flip in (('w', 0), ('b', 56)):
+        offsets[perspective] = table = {}
+        for t, p in enumerate('PNBRQ'):
+            own, their = (p, p.lower()) if perspective == 'w' else (p.lower(), p)
+            table[own] = [t * 64 + (sq ^ flip) for sq in range(64)]
+            table[their] = [(t + 5) * 64 + (sq ^ flip) for sq in range(64)]
+    return offsets
+
+
+FEATURE_OFFSETS = _feature_offsets()
+KING_OFFSETS = {
+    'w': [sq * PIECE_TYPES * 64 for sq in range(64)],
+    'b': [(sq ^ 56) * PIECE_TYPES * 64 for sq in range(64)],
+    }
+
+
+def _packed_offsets(offsets):
+    """The feature offsets by packed piece code, -1 for no feature"""
+
+    table = np.empty((len(PACKED_PIECES), 64), dtype=np.int32)
+    table.fill(-1)
+    for code, p in enumerate(PACKED_PIECES):
+        if p in offsets:
+            table[code] = offsets[p]
+    return table
+
+
+PACKED_OFFSETS = dict((side, _packed_offsets(offsets))
+                      for side, offsets in FEATURE_OFFSETS.items())
+_SQUARES = np.arange(64)
+
+
+def _offsets():
+    offset = ALIGN
+    for name, dtype, shape in LAYOUT:
+        yield name, dtype, shape, offset
+        size = np.dtype(dtype).itemsize * int(np.prod(shape))
+        offset += (size + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_weights(path, weights):
+    """Write the `weights` (a dict of the arrays of `LAYOUT`) to `path`"""
+
+    header = np.zeros(1, dtype=HEADER)
+    header[0] = (MAGIC, VERSION, FEATURES, ACC_SIZE, HIDDEN1, HIDDEN2)
+    with open(path, 'wb') as f:
+        f.write(header.tostring())
+        for name, dtype, shape, offset in _offsets():
+            f.seek(offset)
+            f.write(np.asarray(weights[name], dtype=dtype).reshape(shape).tostring())
+
+
+class NNUE(object):
+    """The network, see the module documentation"""
+
+    def __init__(self, path):
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if len(header) != 1 or header[0]['magic'] != MAGIC or \
+                header[0]['version'] != VERSION or \
+                tuple(header[0])[2:] != (FEATURES, ACC_SIZE, HIDDEN1, HIDDEN2):
+            raise ValueError('Invalid network file: %s' % path)
+
+        self.path = path
+        for name, dtype, shape, offset in _offsets():
+            # plain array views: the slicing of memmap objects is slow
+            data = np.memmap(path, dtype=dtype, mode='r', offset=offset,
+                             shape=shape)
+            setattr(self, name, data.view(np.ndarray))
+
+    def refresh(self, board, side):
+        """Compute from scratch the accumulator of the perspective `side`"""
+
+        features = PACKED_OFFSETS[side][board.packed, _SQUARES]
+        features = features[features >= 0] + KING_OFFSETS[side][board.king_square(side)]
+        return self.b1 + self.w1[features].sum(axis=0, dtype=np.int16)
+
+    def accumulators(self, board):
+        """Both the accumulators of `board` as a (2, ACC_SIZE) array"""
+
+        return np.array([self.refresh(board, 'w'), self.refresh(board, 'b')])
+
+    def add(self, acc, kings, p, sq):
+        """Add the piece `p` in `sq` to the accumulators"""
+
+        w1 = self.w1
+        acc[0] += w1[KING_OFFSETS['w'][kings['w']] + FEATURE_OFFSETS['w'][p][sq]]
+        acc[1] += w1[KING_OFFSETS['b'][kings['b']] + FEATURE_OFFSETS['b'][p][sq]]
+
+    def remove(self, acc, kings, p, sq):
+        """Remove the piece `p` in `sq` from the accumulators"""
+
+        w1 = self.w1
+        acc[0] -= w1[KING_OFFSETS['w'][kings['w']] + FEATURE_OFFSETS['w'][p][sq]]
+        acc[1] -= w1[KING_OFFSETS['b'][kings['b']] + FEATURE_OFFSETS['b'][p][sq]]
+
+    def move(self, acc, kings, p, src, dst):
+        """Move the piece `p` from `src` to `dst` in the accumulators"""
+
+        w1 = self.w1
+        offsets = FEATURE_OFFSETS['w'][p]
+        king = KING_OFFSETS['w'][kings['w']]
+        acc[0] += w1[king + offsets[dst]] - w1[king + offsets[src]]
+        offsets = FEATURE_OFFSETS['b'][p]
+        king = KING_OFFSETS['b'][kings['b']]
+        acc[1] += w1[king + offsets[dst]] - w1[king + offsets[src]]
+
+    def evaluate(self, acc, stm):
+        """Score of the accumulators `acc` relative to `stm`"""
+
+        if stm == 'w':
+            x = acc.ravel()
+        else:
+            x = acc[::-1].ravel()
+        x = np.clip(x, 0, ACC_CLIP).astype(np.int32)
+        x = np.clip((x.dot(self.w2) + self.b2) >> SHIFT, 0, HIDDEN_CLIP)
+        x = np.clip((x.dot(self.w3) + self.b3) >> SHIFT, 0, HIDDEN_CLIP)
+        return int(x.dot(self.w4) + self.b4[0])
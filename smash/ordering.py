@@ -0,0 +1,215 @@
+"""Move ordering heuristics
+
+Captures are ordered by MVV-LVA, quiet moves by the killer, counter-move
+and history tables filled by the search at the cutoffs. The static
+exchange evaluation (`see`) tells the captures that lose material.
+
+"""
+
+import numpy as np
+
+from smash.base import pieces, EN_PASSANT_CAPTURES
+from smash.evaluate import MAT_SCORES
+from smash.tt import MAX_PLY
+
+
+# piece values indexed by the piece codes of the encoded moves
+PIECE_VALUES = [MAT_SCORES.get(p, 0) for p in pieces]
+
+# history scores are halved when one of them gets past this value
+HISTORY_MAX = 1 << 24
+
+
+def mvv_lva(board, m):
+    """Most valuable victim, least valuable attacker score of a capture
+
+    Promotions count as the capture of the promoted piece.
+
+    """
+    victim = PIECE_VALUES[m >> 16 & 0xf] + PIECE_VALUES[m >> 12 & 0xf]
+    return victim * 100 - MAT_SCORES.get(board.raw[m & 0x3f], 0)
+
+
+def _squares(sq, deltas):
+    """The squares at (rank, file) `deltas` from `sq` inside the board"""
+
+    r, c = sq >> 3, sq & 7
+    return [(r + dr) * 8 + c + dc for dr, dc in deltas
+            if 0 <= r + dr < 8 and 0 <= c + dc < 8]
+
+
+def _rays(sq, directions):
+    """The squares from `sq` by direction, the nearest first"""
+
+    rays = []
+    for dr, dc in directions:
+        ray = []
+        r, c = (sq >> 3) + dr, (sq & 7) + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            ray.append(r * 8 + c)
+            r, c = r + dr, c + dc
+        rays.append(ray)
+    return rays
+
+
+# the attacks on a square by piece: the squares of the pieces (or the
+# rays of the sliding pieces) that attack it
+SEE_KNIGHTS = [_squares(sq, [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2),
+                             (-2, -1), (-2, 1), (-1, 2)]) for sq in range(64)]
+SEE_KINGS = [_squares(sq, [(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0),
+                           (-1, -1), (0, -1), (1, -1)]) for sq in range(64)]
+SEE_DIAGONALS = [_rays(sq, [(1, 1), (1, -1), (-1, 1), (-1, -1)]) for sq in range(64)]
+SEE_LINES = [_rays(sq, [(1, 0), (-1, 0), (0, 1), (0, -1)]) for sq in range(64)]
+# the white pawns attack from below, the black ones from above
+SEE_PAWNS = {
+    'w': [_squares(sq, [(-1, -1), (-1, 1)]) for sq in range(64)],
+    'b': [_squares(sq, [(1, -1), (1, 1)]) for sq in range(64)],
+    }
+SEE_PIECES = {'w': 'PNBRQK', 'b': 'pnbrqk'}
+
+
+def _least_attacker(b, sq, side):
+    """The square of the least valuable piece of `side` attacking `sq`
+
+    `b` is a list of the pieces by square, the sliding pieces behind the
+    first one of a ray attack only when it is removed (x-rays). Returns
+    None when `sq` is not attacked.
+
+    """
+    pawn, knight, bishop, rook, queen, king = SEE_PIECES[side]
+    for x in SEE_PAWNS[side][sq]:
+        if b[x] == pawn:
+            return x
+    for x in SEE_KNIGHTS[sq]:
+        if b[x] == knight:
+            return x
+
+    queen_sq = None
+    for rays, slider in ((SEE_DIAGONALS, bishop), (SEE_LINES, rook)):
+        for ray in rays[sq]:
+            for x in ray:
+                p = b[x]
+                if p != ' ':
+                    if p == slider:
+                        return x
+                    if p == queen:
+                        queen_sq = x
+                    break
+    if queen_sq is not None:
+        return queen_sq
+
+    for x in SEE_KINGS[sq]:
+        if b[x] == king:
+            return x
+    return None
+
+
+def see(board, m):
+    """Static exchange evaluation of the capture `m`
+
+    The material won (or lost when negative) by the side to move when the
+    pieces of both sides capture on the destination square in order of
+    value, each side stopping when going on would lose more. The pins are
+    not considered, the king captures only a piece no longer defended.
+
+    """
+    b = board.raw.tolist()
+    src = m & 0x3f
+    dst = m >> 6 & 0x3f
+    promote = m >> 12 & 0xf
+    piece = b[src]
+    gain = [PIECE_VALUES[m >> 16 & 0xf]]
+    if promote:
+        piece = pieces[promote]
+        gain[0] += PIECE_VALUES[promote] - MAT_SCORES['p']
+    elif piece in 'Pp' and b[dst] == ' ' and m >> 16 & 0xf:
+        b[EN_PASSANT_CAPTURES[dst]] = ' '
+    b[src] = ' '
+    b[dst] = piece
+
+    side = 'b' if board.stm == 'w' else 'w'
+    while True:
+        sq = _least_attacker(b, dst, side)
+        if sq is None:
+            break
+        attacker = b[sq]
+        other = 'b' if side == 'w' else 'w'
+        if attacker in 'Kk':
+            b[sq] = ' '
+            defended = _least_attacker(b, dst, other) is not None
+            b[sq] = attacker
+            if defended:
+                break
+        gain.append(MAT_SCORES.get(b[dst], 0) - gain[-1])
+        b[dst] = attacker
+        b[sq] = ' '
+        side = other
+
+    while len(gain) > 1:
+        last = gain.pop()
+        gain[-1] = -max(-gain[-1], last)
+    return gain[0]
+
+
+class MoveOrdering(object):
+    """Tables of the quiet move ordering heuristics
+
+    - `killers[ply]`: the last two quiet moves that caused a cutoff at `ply`
+    - `history[side][from][to]`: how often a quiet move caused a cutoff,
+      weighted by the depth
+    - `counters[from + 64 * to]`: the quiet move that refuted the previous
+      move
+
+    """
+
+    def __init__(self):
+        self.killers = np.zeros((MAX_PLY + 1, 2), dtype=np.int32)
+        self.history = np.zeros((2, 64, 64), dtype=np.int32)
+        self.counters = np.zeros(64 * 64, dtype=np.int32)
+
+    def clear(self):
+        self.killers.fill(0)
+        self.history.fill(0)
+        self.counters.fill(0)
+
+    def new_search(self):
+        """Forget the killers and age the history of the previous search"""
+
+        self.killers.fill(0)
+        self.history >>= 1
+
+    def get_killers(self, ply):
+        k = self.killers[ply]
+        return (int(k[0]), int(k[1]))
+
+    def get_counter(self, prev):
+        return int(self.counters[prev & 0xfff]) if prev else 0
+
+    def get_history(self, stm):
+        return self.history[int(stm != 'w')]
+
+    def update(self, board, m, depth, ply, quiets):
+        """Update the tables after the quiet move `m` caused a cutoff
+
+        `quiets` are the quiet moves searched before `m` without success.
+
+        """
+        killers = self.killers[ply]
+        if killers[0] != m:
+            killers[1] = killers[0]
+            killers[0] = m
+
+        prev = board.last_move
+        if prev:
+            self.counters[prev & 0xfff] = m
+
+        history = self.history[int(board.stm != 'w')]
+        bonus = depth * depth
+        history[m & 0x3f, m >> 6 & 0x3f] += bonus
+        overflow = history[m & 0x3f, m >> 6 & 0x3f] > HISTORY_MAX
+        for q in quiets:
+            history[q & 0x3f, q >> 6 & 0x3f] -= bonus
+            overflow = overflow or history[q & 0x3f, q >> 6 & 0x3f] < -HISTORY_MAX
+
+        if overflow:
+            self.history >>= 1
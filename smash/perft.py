@@ -1,14 +1,13 @@
-from smash.movegen import gen_moves
+from smash.movegen import gen_legal_moves
 
 
 def perft(board, depth, ply):
+    if depth == 1:
+        return sum(1 for m in gen_legal_moves(board))
+
     count = 0
-    for m in gen_moves(board):
+    for m in gen_legal_moves(board):
         board.move(m)
-        if board.is_legal():
-            if depth == 1:
-                count += 1
-            else:
-                count += perft(board, depth-1, ply+1)
+        count += perft(board, depth-1, ply+1)
         board.undo()
     return count
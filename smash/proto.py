@@ -1,5 +1,6 @@
 import sys
 import logging
+import threading
 
 from smash.board import Board
 from smash.move import Move
@@ -9,9 +10,12 @@ log = logging.getLogger(__name__)
 
 
 class Protocol(object):
-    def __init__(self, engine, board_class):
+    def __init__(self, engine, board_class, fin=None, fout=None):
         self.engine = engine
-        self.board_class = Board
+        self.board_class = board_class
+        self.fin = fin or sys.stdin
+        self.fout = fout or sys.stdout
+        self._write_lock = threading.Lock()
 
     def loop(self):
         self._quit = False
@@ -26,34 +30,71 @@ class Protocol(object):
         raise NotImplemented()
 
     def read_input(self):
-        r = raw_input().strip()
+        """Read a line of input, None at the end of the input"""
+
+        r = self.fin.readline()
+        if not r:
+            return None
+        r = r.strip()
         log.debug('>>> %s', r)
         return r
 
     def write(self, s):
-        log.debug('<<< %s', s)
-        sys.stdout.write(s + '\n')
-        sys.stdout.flush()
+        # the search thread writes info and bestmove lines
+        with self._write_lock:
+            log.debug('<<< %s', s)
+            self.fout.write(s + '\n')
+            self.fout.flush()
 
 
 class UCIProtocol(Protocol):
-    def __init__(self, engine, board_class=Board):
-        super(UCIProtocol, self).__init__(engine, board_class)
+    """UCI protocol
+
+    The search runs in a background thread, so commands like isready and
+    stop are handled while searching.
+
+    """
+
+    # seconds between the stop requests while waiting for the search
+    STOP_POLL = 0.01
+
+    def __init__(self, engine, board_class=Board, fin=None, fout=None):
+        super(UCIProtocol, self).__init__(engine, board_class, fin, fout)
         engine.set_cb_info(self._cb_info)
+        self.board = None
+        self._position = None
+        self._moves = []
+        self._hashkey = None
+        self._search_thread = None
+        self._search_limits = {}
+        self._release = threading.Event()
 
     def read_command(self):
-        cmd = self.read_input()
-        cmd = cmd.split()
-        args = cmd[1:]
-        cmdname = cmd[0]
+        cmd = []
+        while not cmd:
+            line = self.read_input()
+            if line is None:
+                return 'quit', []
+            cmd = line.split()
 
-        return cmdname, args
+        return cmd[0], cmd[1:]
 
     def exec_command(self, cmd):
         cmdname, args = cmd
         if cmdname == 'uci':
             self.write('id name %s' % self.engine.name)
             self.write('id author %s' % self.engine.author)
+            for name, key, opt_type, opt_min, opt_max in self.engine.OPTIONS:
+                default = self.engine.DEFAULT_CONFIG[key]
+                if opt_type == 'spin':
+                    self.write('option name %s type spin default %s min %s max %s'
+                               % (name, default, opt_min, opt_max))
+                elif opt_type == 'string':
+                    self.write('option name %s type string default %s'
+                               % (name, default or '<empty>'))
+                else:
+                    self.write('option name %s type %s default %s'
+                               % (name, opt_type, str(default).lower()))
             self.write('uciok')
         elif cmdname == 'debug':
             if args[0] == 'on':
@@ -63,46 +104,168 @@ class UCIProtocol(Protocol):
         elif cmdname == 'isready':
             self.write('readyok')
         elif cmdname == 'setoption':
-            # TODO: set engine options
-            pass
+            self.wait_search()
+            self._setoption_command(args)
         elif cmdname == 'ucinewgame':
-            # TODO: reset the game engine
-            pass
+            self.wait_search()
+            self.engine.new_game()
         elif cmdname == 'position':
-            if args[0] == 'startpos':
-                board = self.board_class()
-                moves = args[1:]
-            elif args[0] == 'fen':
-                board = self.board_class(' '.join(args[1:7]))
-                moves = args[7:]
-
-            for move in moves:
-                m = Move.from_string(board, move)
-                board.move(m)
-            self.board = board
+            self.wait_search()
+            self._position_command(args)
         elif cmdname == 'go':
+            self.wait_search()
             self._go_command(args)
         elif cmdname == 'stop':
-            self.engine.stop()
+            self.stop_search()
         elif cmdname == 'ponderhit':
-            # TODO: handle ponder
-            pass
+            ponder = self._search_limits.get('ponder')
+            if ponder is not None:
+                ponder.set()
+                self._release.set()
         elif cmdname == 'quit':
-            self.engine.stop()
+            self.stop_search()
             self._quit = True
         else:
             log.warning('Unknown command: %s' % cmdname)
 
+    def _position_command(self, args):
+        if args[0] == 'startpos':
+            position = 'startpos'
+            moves = args[1:]
+        elif args[0] == 'fen':
+            position = ' '.join(args[1:7])
+            moves = args[7:]
+
+        if moves and moves[0] == 'moves':
+            moves = moves[1:]
+
+        # GUIs send the whole game every time: when the position is the
+        # same only the moves that differ are undone and played, if the
+        # board is still the one left by the last command
+        board = self.board
+        played = []
+        if board is None or position != self._position or \
+                board.hashkey != self._hashkey:
+            board = None
+        else:
+            common = 0
+            for a, b in zip(self._moves, moves):
+                if a != b:
+                    break
+                common += 1
+            try:
+                for _ in range(len(self._moves) - common):
+                    board.undo()
+                played = moves[:common]
+            except Exception:
+                log.warning('Cannot undo the moves, position rebuilt')
+                board = None
+        if board is None:
+            if position == 'startpos':
+                board = self.board_class()
+            else:
+                board = self.board_class(position)
+
+        # rebuilt from scratch next time if a move is invalid
+        self.board = None
+        self._position = None
+        for move in moves[len(played):]:
+            m = Move.from_string(board, move)
+            board.move(m)
+
+        self.board = board
+        self._position = position
+        self._moves = moves
+        self._hashkey = board.hashkey
+
+    def _setoption_command(self, args):
+        # setoption name <id> [value <x>], names may contain spaces
+        if 'value' in args:
+            i = args.index('value')
+            name, value = ' '.join(args[1:i]), ' '.join(args[i+1:])
+        else:
+            name, value = ' '.join(args[1:]), None
+
+        try:
+            self.engine.set_option(name, value)
+        except (KeyError, ValueError):
+            log.warning('Invalid option: %s %s' % (name, value))
+
+    GO_INT_ARGS = ('wtime', 'btime', 'winc', 'binc', 'movestogo', 'movetime',
+                   'depth', 'nodes')
+
     def _go_command(self, args):
-        # TODO: parse arguments
-        move, score = self.engine.bestmove(self.board)
-        self.write('bestmove %s' % move.str_simple())
+        limits = {}
+        args = iter(args)
+        for arg in args:
+            if arg in self.GO_INT_ARGS:
+                limits[arg] = int(next(args))
+            elif arg == 'infinite':
+                limits['infinite'] = True
+            elif arg == 'ponder':
+                limits['ponder'] = threading.Event()
+            else:
+                log.warning('Unsupported go argument: %s' % arg)
+
+        self._release.clear()
+        self._search_limits = limits
+        self._search_thread = threading.Thread(target=self._search,
+                                               args=(self.board, limits))
+        self._search_thread.daemon = True
+        self._search_thread.start()
+
+    def _search(self, board, limits):
+        move, score = self.engine.bestmove(board, **limits)
+
+        # in infinite mode and while pondering the best move is sent only
+        # after the stop (or the ponderhit)
+        if limits.get('infinite') or limits.get('ponder'):
+            self._release.wait()
+
+        # mate or stalemate at the root: the null move tells the GUI
+        if move is None:
+            self.write('bestmove 0000')
+            return
+
+        ponder = self.engine.ponder_move(board, move)
+        if ponder is not None:
+            self.write('bestmove %s ponder %s' % (move.str_simple(),
+                                                  ponder.str_simple()))
+        else:
+            self.write('bestmove %s' % move.str_simple())
+
+    def stop_search(self):
+        """Stop the search and wait for its best move"""
+
+        thread = self._search_thread
+        if thread is None:
+            return
+
+        self._release.set()
+        # a stop request can be lost if the search has not started yet
+        while thread.is_alive():
+            self.engine.stop()
+            thread.join(self.STOP_POLL)
+        self._search_thread = None
+
+    def wait_search(self):
+        """Wait the end of a search, infinite searches are stopped"""
+
+        limits = self._search_limits
+        if limits.get('infinite') or (limits.get('ponder') and
+                                      not limits['ponder'].is_set()):
+            self.stop_search()
+        elif self._search_thread is not None:
+            self._search_thread.join()
+            self._search_thread = None
 
     def _cb_info(self, **kwargs):
         s = ['info']
 
         if 'depth' in kwargs:
             s.append('depth %(depth)s')
+        if 'multipv' in kwargs:
+            s.append('multipv %(multipv)s')
         if 'nodes' in kwargs:
             s.append('nodes %(nodes)s')
         if 'score' in kwargs:
@@ -115,6 +278,8 @@ class UCIProtocol(Protocol):
         if 'nodes' in kwargs and kwargs.get('time', 0):
             kwargs['nps'] = int(kwargs['nodes'] / kwargs['time'])
             s.append('nps %(nps)s')
+        if 'hashfull' in kwargs:
+            s.append('hashfull %(hashfull)s')
 
         if 'pv' in kwargs:
             kwargs['pv_moves'] = ' '.join(x.str_simple() for x in kwargs['pv'])
@@ -1,7 +1,6 @@
 from itertools import izip_longest
 
 from smash.move import Move
-from smash.movegen import gen_moves
 from smash.base import squares
 from smash.perft import perft
 
@@ -51,12 +50,7 @@ class ShellHelper(object):
         print perft(self.board, depth, 0)
 
     def movelist(self):
-        r = []
-        for m in gen_moves(self.board):
-            self.board.move(m)
-            if self.board.is_legal():
-                r.append(m.str_simple())
-            self.board.undo()
+        r = [m.str_simple() for m in self.board.legal_moves()]
         r = iter(r)
         for row in izip_longest(*[r]*4, fillvalue=''):
             print ' '.join(row)
@@ -0,0 +1,93 @@
+"""Lazy SMP
+
+Helper processes search the same root position as the main one and share
+with it only the transposition table: the entries stored by a process
+speed up and change the move ordering of the others. Half of the helpers
+search one ply deeper than the main process so the processes diverge.
+
+The processes are forked for each search, so they start with a copy of
+the engine state (history, config) and the table is the only thing that
+needs to be in shared memory.
+
+The scaling with the number of processes has not been measured on more
+than one core: the Threads option stays at 1 by default and the values
+above it are experimental.
+
+"""
+
+import ctypes
+import multiprocessing
+from Queue import Empty
+
+
+# seconds to wait for the result of a helper after the stop
+HELPER_TIMEOUT = 5
+
+
+class SharedState(object):
+    """State shared between the search processes
+
+    - `stop`: set by the main process when the search is over
+    - `nodes`: nodes searched by each process
+
+    """
+
+    def __init__(self, threads):
+        self.stop = multiprocessing.RawValue(ctypes.c_bool, False)
+        self.nodes = multiprocessing.RawArray(ctypes.c_long, threads)
+
+    def total_nodes(self):
+        return sum(self.nodes)
+
+
+def _helper(engine, board, index, depth, results):
+    engine.set_cb_info(lambda **kwargs: None)
+    engine._shared_index = index
+    engine._abortable = True
+    try:
+        result = engine._iterate(board, depth, start=1 + index % 2)
+    except KeyboardInterrupt:
+        result = (None, 0, 0)
+    engine._publish_nodes()
+    results.put((index, ) + result)
+
+
+def search(engine, board, depth, threads):
+    """Search with `threads` processes
+
+    Returns the result of the process that completed the deepest
+    iteration as a tuple ``(move, score, depth)``.
+
+    """
+    shared = engine._shared = SharedState(threads)
+    engine._shared_index = 0
+    results = multiprocessing.Queue()
+
+    helpers = []
+    for index in range(1, threads):
+        p = multiprocessing.Process(target=_helper,
+                                    args=(engine, board, index, depth, results))
+        p.daemon = True
+        p.start()
+        helpers.append(p)
+
+    best = (None, 0, 0)
+    try:
+        best = engine._iterate(board, depth)
+    finally:
+        shared.stop.value = True
+        for _ in helpers:
+            try:
+                index, move, score, completed = results.get(timeout=HELPER_TIMEOUT)
+            except Empty:
+                break
+            if move is not None and completed > best[2]:
+                best = (move, score, completed)
+        for p in helpers:
+            p.join(HELPER_TIMEOUT)
+
+        engine._publish_nodes()
+        engine.stat.nodes = shared.total_nodes()
+        engine._shared = None
+
+    return best
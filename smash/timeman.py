@@ -0,0 +1,64 @@
+"""Time management
+
+Computes the time budget of a search from the UCI clock parameters.
+
+"""
+
+import time
+
+
+# moves left in the game when the GUI doesn't send movestogo
+DEFAULT_MOVES_TO_GO = 30
+
+# time (in seconds) reserved for the communication with the GUI
+MOVE_OVERHEAD = 0.05
+
+
+class TimeManager(object):
+    """Time budget of a search
+
+    `soft` is the time we would like to spend, a new iteration is not
+    started past half of it. `hard` is the time after which the search is
+    aborted. Both are None when the search has no time limit.
+
+    Times are in milliseconds as in the UCI protocol.
+
+    """
+
+    def __init__(self, stm='w', wtime=None, btime=None, winc=0, binc=0,
+                 movestogo=None, movetime=None, infinite=False):
+        self.soft = None
+        self.hard = None
+
+        if infinite:
+            pass
+        elif movetime is not None:
+            self.soft = self.hard = max(0.001, movetime / 1000. - MOVE_OVERHEAD)
+        else:
+            left, inc = (wtime, winc) if stm == 'w' else (btime, binc)
+            if left is not None:
+                left = max(0.001, left / 1000. - MOVE_OVERHEAD)
+                inc = (inc or 0) / 1000.
+                movestogo = movestogo or DEFAULT_MOVES_TO_GO
+                self.soft = min(left, left / movestogo + inc * 3 / 4)
+                self.hard = min(left / 2, self.soft * 4)
+
+        self.start()
+
+    @property
+    def limited(self):
+        return self.hard is not None
+
+    def start(self):
+        self.t_start = time.time()
+
+    def elapsed(self):
+        return time.time() - self.t_start
+
+    def can_deepen(self):
+        """Returns true if there is time to start a new iteration"""
+
+        return self.soft is None or self.elapsed() < self.soft / 2
+
+    def out_of_time(self):
+        return self.hard is not None and self.elapsed() >= self.hard
@@ -0,0 +1,53 @@
+"""Generate the weights of an untrained network
+
+The network reproduces the material and midgame piece square scores of
+`smash.evaluate` (without the kings, which are not inputs): the first
+neuron of an accumulator sums the scores of the pieces of its side, the
+second one the scores of the pieces of the other side. The first hidden
+layer takes their difference for the side to move (split in a positive
+and a negative neuron), the second one passes them to the output.
+
+It is a starting point to be trained, and a way to check the network
+code against a known evaluation.
+
+"""
+
+import numpy as np
+
+from smash.evaluate import PSQ_MG
+from smash.nnue import (LAYOUT, FEATURE_OFFSETS, KING_OFFSETS, SHIFT,
+                        write_weights)
+
+
+def gen_weights():
+    weights = dict((name, np.zeros(shape, dtype=dtype))
+                   for name, dtype, shape in LAYOUT)
+
+    w1 = weights['w1']
+    for p in 'PNBRQ':
+        for sq in range(64):
+            score = PSQ_MG[p][sq]
+            for king in range(64):
+                # white pieces: own for white, their for black
+                w1[KING_OFFSETS['w'][king] + FEATURE_OFFSETS['w'][p][sq], 0] = score
+                w1[KING_OFFSETS['b'][king] + FEATURE_OFFSETS['b'][p][sq], 1] = score
+                # black pieces
+                q = p.lower()
+                score_q = -PSQ_MG[q][sq]
+                w1[KING_OFFSETS['b'][king] + FEATURE_OFFSETS['b'][q][sq], 0] = score_q
+                w1[KING_OFFSETS['w'][king] + FEATURE_OFFSETS['w'][q][sq], 1] = score_q
+
+    unit = 1 << SHIFT
+    w2 = weights['w2']
+    w2[0, 0], w2[1, 0] = unit, -unit
+    w2[0, 1], w2[1, 1] = -unit, unit
+
+    w3 = weights['w3']
+    w3[0, 0] = w3[1, 1] = unit
+
+    weights['w4'][:2] = 1, -1
+    return weights
+
+
+def gen_nnue(path):
+    write_weights(path, gen_weights())
@@ -1,5 +1,4 @@
-import os
-import struct
+import random
 
 from smash.base import pair2square, rank, col
 
@@ -68,11 +67,24 @@ def gen_knight_table():
                              (-2, 1), (-2, -1), (-1, -2), (1, -2)])
 
 
-def nextrand64():
-    return struct.unpack('l', os.urandom(8))[0]
+ZOBRIST_SEED = 0x5ada5ada
 
 
-def gen_zobrist_keys():
+def gen_zobrist_keys(seed=ZOBRIST_SEED):
+    """Generate the keys used for the zobrist hashing
+
+    Keys are signed 64 bits integers. The generator is seeded so that the
+    same tables are generated at every run.
+
+    """
+    rnd = random.Random(seed)
+
+    def nextrand64():
+        x = rnd.getrandbits(64)
+        if x >= 1 << 63:
+            x -= 1 << 64
+        return int(x)
+
     piece_keys = {}
     for p in 'PNBRQKpnbrqk':
         piece_keys[p] = [nextrand64() for sq in range(64)]
@@ -80,7 +92,7 @@ def gen_zobrist_keys():
     en_passant_keys = [nextrand64() for c in range(8)]
 
     castling_keys = {}
-    for p in 'KkQq':
+    for p in 'KQkq':
         castling_keys[p] = nextrand64()
 
     stm_key = nextrand64()
@@ -96,12 +108,19 @@ def gen_tables():
     def indent(s):
         return re.sub('^', ' '*4, s, flags=re.M)
 
-    output = {
-        'knight_table': gen_knight_table(),
-        'bishop_table': gen_bishop_table(),
-        'rook_table': gen_rook_table(),
-        'king_table': gen_king_table(),
-        }
+    zobrist_piece, zobrist_en_passant, zobrist_castling, zobrist_stm = \
+        gen_zobrist_keys()
+
+    output = [
+        ('knight_table', gen_knight_table()),
+        ('rook_table', gen_rook_table()),
+        ('king_table', gen_king_table()),
+        ('bishop_table', gen_bishop_table()),
+        ('zobrist_piece', zobrist_piece),
+        ('zobrist_en_passant', zobrist_en_passant),
+        ('zobrist_castling', zobrist_castling),
+        ('zobrist_stm', zobrist_stm),
+        ]
 
     return '\n'.join('%s = \\\n%s\n' % (k, indent(pp.pformat(v)))
-                     for k, v in output.iteritems()).rstrip()
+                     for k, v in output).rstrip()
@@ -0,0 +1,148 @@
+"""Transposition table
+
+The table is stored in preallocated shared memory viewed as numpy arrays,
+so its memory usage depends only on the configured size and the worker
+processes of a parallel search share it. Entries are grouped in buckets of
+two: the first slot is depth-preferred, the second one is always replaced.
+
+An entry packs move, score, depth, bound and generation in a 64 bit `data`
+word, the key is stored xored with it: an entry torn by the concurrent
+writes of two processes doesn't match the key and is ignored.
+
+"""
+
+import ctypes
+import multiprocessing
+
+import numpy as np
+
+from smash.evaluate import INF
+
+
+# bound types
+TT_EXACT = 1
+TT_LOWER = 2
+TT_UPPER = 3
+
+MAX_PLY = 128
+MATE_BOUND = INF - MAX_PLY
+
+# bytes used by an entry: key ^ data and data
+ENTRY_SIZE = 8 + 8
+
+# data layout: move (21 bits), score (18 bits), depth (8 bits),
+# bound (2 bits), generation (8 bits)
+SCORE_SHIFT = 21
+SCORE_OFFSET = 1 << 17
+DEPTH_SHIFT = 39
+BOUND_SHIFT = 47
+GENERATION_SHIFT = 49
+
+
+def score_to_tt(score, ply):
+    """Mate scores are stored relative to the node instead of the root"""
+
+    if score > MATE_BOUND:
+        return score + ply
+    elif score < -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_tt(score, ply):
+    if score > MATE_BOUND:
+        return score - ply
+    elif score < -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class TranspositionTable(object):
+    def __init__(self, size_mb=16):
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        """Allocate the table to use about `size_mb` megabytes"""
+
+        buckets = 1
+        while buckets * 4 * ENTRY_SIZE <= size_mb * 1024 * 1024:
+            buckets *= 2
+
+        self.size_mb = size_mb
+        self._mask = buckets - 1
+        n = buckets * 2
+        self._keys = np.frombuffer(
+            multiprocessing.RawArray(ctypes.c_int64, n), dtype=np.int64)
+        self._data = np.frombuffer(
+            multiprocessing.RawArray(ctypes.c_int64, n), dtype=np.int64)
+        self.generation = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def clear(self):
+        self._keys.fill(0)
+        self._data.fill(0)
+        self.generation = 0
+
+    def new_search(self):
+        """Age the entries of the previous searches"""
+
+        self.generation = (self.generation + 1) & 0xff
+
+    def probe(self, key, ply):
+        """Look for the position `key`
+
+        Returns a tuple ``(move, score, depth, bound)`` or None if the
+        position is not stored.
+
+        """
+        i = (key & self._mask) << 1
+        data = int(self._data[i])
+        if int(self._keys[i]) ^ data != key:
+            i += 1
+            data = int(self._data[i])
+            if int(self._keys[i]) ^ data != key:
+                return None
+
+        bound = data >> BOUND_SHIFT & 3
+        if not bound:
+            return None
+
+        return (data & 0x1fffff,
+                score_from_tt((data >> SCORE_SHIFT & 0x3ffff) - SCORE_OFFSET, ply),
+                data >> DEPTH_SHIFT & 0xff,
+                bound)
+
+    def store(self, key, move, score, depth, bound, ply):
+        i = (key & self._mask) << 1
+
+        # the depth-preferred slot is replaced by deeper searches, by the
+        # same position or when it is left by an older search
+        old = int(self._data[i])
+        same = int(self._keys[i]) ^ old == key
+        if not same and old >> BOUND_SHIFT & 3 \
+                and old >> GENERATION_SHIFT == self.generation \
+                and depth < old >> DEPTH_SHIFT & 0xff:
+            i += 1
+            old = int(self._data[i])
+            same = int(self._keys[i]) ^ old == key
+
+        if not move and same:
+            move = old & 0x1fffff
+
+        data = (move
+                | (score_to_tt(score, ply) + SCORE_OFFSET) << SCORE_SHIFT
+                | depth << DEPTH_SHIFT
+                | bound << BOUND_SHIFT
+                | self.generation << GENERATION_SHIFT)
+        self._keys[i] = key ^ data
+        self._data[i] = data
+
+    def hashfull(self):
+        """Permille of the table used by the current search"""
+
+        data = self._data[:min(1000, len(self._data))]
+        used = (data >> BOUND_SHIFT & 3 != 0) & \
+               (data >> GENERATION_SHIFT == self.generation)
+        return int(np.count_nonzero(used) * 1000 / len(data))
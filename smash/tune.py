@@ -0,0 +1,362 @@
+"""Texel tuning of the evaluation parameters
+
+The positions of a labeled file (a FEN and the result of the game on each
+line) are converted once into a binary file of packed records, `RECORD`,
+that is mapped in memory with `np.memmap`: the operating system streams
+it from disk, so the datasets larger than the memory work as well.
+
+The classical evaluation is linear in its parameters: given the phase of
+a position it is the dot product of a vector of features (the counts of
+the pieces by square, of the doubled pawns, ...) by the parameters. The
+features of a minibatch of positions are computed with numpy as a matrix
+(see `features`) and the parameters are moved along the gradient of the
+mean squared error between the results and the sigmoid of the scores,
+with the Adam update.
+
+The tuned parameters are written as a python module to the path given
+by the user. Copied to smash/evalparams.py, it is loaded by
+`smash.evaluate` when imported, replacing the parameters of the source.
+
+"""
+
+import os
+import logging
+
+import numpy as np
+
+from smash import evaluate
+from smash.evaluate import (
+    PACKED_PIECES, PACKED_PHASE, PHASE_TOTAL, LOWEST_RANK, FLIPPED_RANKS,
+    pawn_masks, pawn_terms_batch)
+
+log = logging.getLogger(__name__)
+
+
+# a packed board and the result from the white point of view in half
+# points: 0 for a loss, 1 for a draw and 2 for a win
+RECORD = np.dtype([('board', np.int8, (64, )), ('result', np.int8)])
+
+RESULTS = {'1-0': 2, '0-1': 0, '1/2-1/2': 1}
+# the results as scores, only in brackets or quotes: bare they are the
+# move counters of a FEN
+SCORES = {'1': 2, '1.0': 2, '0.5': 1, '0': 0, '0.0': 0}
+
+# positions converted at a time
+CHUNK_SIZE = 65536
+
+# the parameters by name with their size and the phase they score in
+PARAMETERS = [
+    ('material', 5, 'both'),
+    ('pst_mg', 6 * 64, 'mg'),
+    ('pst_eg', 6 * 64, 'eg'),
+    ('pawns_mg', 11, 'mg'),
+    ('pawns_eg', 11, 'eg'),
+    ('shield', 8, 'mg'),
+    ]
+
+SIZE = sum(size for name, size, phase in PARAMETERS)
+
+# the pawn is the unit of the scores: its value is not tuned
+FIXED = [0]
+
+_CODES = dict((p, code) for code, p in enumerate(PACKED_PIECES) if p != ' ')
+_FLIPPED = np.arange(64) ^ 56
+_RANKS = np.arange(8)
+
+
+def _slices():
+    offset = 0
+    slices = {}
+    for name, size, phase in PARAMETERS:
+        slices[name] = slice(offset, offset + size)
+        offset += size
+    return slices
+
+
+SLICES = _slices()
+
+
+def pack_fen(placement):
+    """The packed board of the piece placement field of a FEN
+
+    Returns None if the placement is not valid.
+
+    """
+    packed = []
+    for row in reversed(placement.split('/')):
+        for c in row:
+            if c.isdigit():
+                packed.extend([0] * int(c))
+            elif c in _CODES:
+                packed.append(_CODES[c])
+            else:
+                return None
+    if len(packed) != 64:
+        return None
+    return packed
+
+
+def parse_line(line):
+    """The packed board and the result of a line of a labeled file
+
+    The line is a FEN (or an EPD) followed by the result as the last
+    field, like ``1-0``, ``"1/2-1/2";`` or ``[0.5]``. The scores (``1.0``,
+    ``0.5``, ...) must be in brackets or quotes.
+
+    Returns None if the line is not valid.
+
+    """
+    fields = line.split()
+    if len(fields) < 2:
+        return None
+    label = fields[-1].rstrip(';')
+    result = RESULTS.get(label.strip('"[]'))
+    if result is None and label[:1] in '["' and label[-1:] in ']"':
+        result = SCORES.get(label[1:-1])
+    packed = pack_fen(fields[0])
+    if result is None or packed is None:
+        return None
+    return packed, result
+
+
+def convert(src, dst):
+    """Convert the labeled file `src` to the binary file `dst`
+
+    Returns the number of positions, the invalid lines are skipped.
+
+    """
+    count = skipped = 0
+    chunk = np.zeros(CHUNK_SIZE, dtype=RECORD)
+    n = 0
+    with open(src) as fin, open(dst, 'wb') as fout:
+        for line in fin:
+            r = parse_line(line)
+            if r is None:
+                if line.strip():
+                    skipped += 1
+                continue
+            chunk[n] = r
+            n += 1
+            if n == CHUNK_SIZE:
+                chunk.tofile(fout)
+                count += n
+                n = 0
+        chunk[:n].tofile(fout)
+        count += n
+
+    if skipped:
+        log.warning('%s: %d invalid lines skipped', src, skipped)
+    return count
+
+
+def load(path):
+    """The records of the binary file `path`, mapped in memory"""
+
+    if os.path.getsize(path) % RECORD.itemsize:
+        raise ValueError('Invalid positions file: %s' % path)
+    return np.memmap(path, dtype=RECORD, mode='r')
+
+
+def features(positions):
+    """The feature matrix of the packed `positions`
+
+    The scores of the classical evaluation from the white point of view are
+    the dot products of the rows by the parameters, but for the rounding
+    of the phase blend (see `evaluate`).
+
+    Returns a (N, `SIZE`) array.
+
+    """
+    positions = np.asarray(positions)
+    n = len(positions)
+
+    # the pieces by type and square, white minus black with the squares of
+    # black flipped
+    psq = np.zeros((n, 6, 64))
+    for t, p in enumerate('PNBRQK'):
+        psq[:, t] += positions == _CODES[p]
+        psq[:, t] -= (positions == _CODES[p.lower()])[:, _FLIPPED]
+    material = psq[:, :5].sum(axis=2)
+    psq = psq.reshape(n, 6 * 64)
+
+    white, black = pawn_masks(positions)
+    pawns = _pawn_features(white, FLIPPED_RANKS[black]) - \
+        _pawn_features(black, FLIPPED_RANKS[white])
+
+    king = (positions == _CODES['K']).argmax(axis=1)
+    shield = _shield_features(white, king, king < 16)
+    king = (positions == _CODES['k']).argmax(axis=1)
+    shield -= _shield_features(black, king, king >= 48)
+
+    phase = np.minimum(np.take(PACKED_PHASE, positions).sum(axis=1),
+                       PHASE_TOTAL)
+    mg = (phase / float(PHASE_TOTAL))[:, None]
+    eg = 1 - mg
+    return np.hstack([material, psq * mg, psq * eg, pawns * mg, pawns * eg,
+                      shield * mg])
+
+
+def _pawn_features(own, other):
+    """Doubled, isolated, backward and passed pawns by rank counts"""
+
+    doubled, isolated, backward, front, passed = pawn_terms_batch(own, other)
+    passed = ((front[:, :, None] == _RANKS) & passed[:, :, None]).sum(axis=1)
+    return np.column_stack([doubled, isolated, backward, passed])
+
+
+def _shield_features(own, king, sheltered):
+    """The counts by rank of the shield pawns of the kings in `king`"""
+
+    nearest = LOWEST_RANK[own][:, :, None] == _RANKS
+    shield = nearest.astype(np.int32)
+    shield[:, 1:] += nearest[:, :-1]
+    shield[:, :-1] += nearest[:, 1:]
+    shield = shield[np.arange(len(own)), king & 7]
+    return shield * sheltered[:, None]
+
+
+def get_params():
+    """The parameters of `smash.evaluate` as a vector"""
+
+    params = np.zeros(SIZE)
+    params[SLICES['material']] = [evaluate.MAT_SCORES[p] for p in 'pnbrq']
+    for name, pst in (('pst_mg', evaluate.PST_MG), ('pst_eg', evaluate.PST_EG)):
+        # square 0 is a1: the first row of the tables is the 8th rank
+        params[SLICES[name]] = [pst[p][sq ^ 56] for p in 'pnbrqk'
+                                for sq in range(64)]
+    for name, i in (('pawns_mg', 0), ('pawns_eg', 1)):
+        params[SLICES[name]] = [evaluate.DOUBLED_PAWN[i], evaluate.ISOLATED_PAWN[i],
+                                evaluate.BACKWARD_PAWN[i]] + \
+            [evaluate.PASSED_PAWN_MG, evaluate.PASSED_PAWN_EG][i]
+    params[SLICES['shield']] = evaluate.PAWN_SHIELD
+    return params
+
+
+def _format_table(values):
+    rows = []
+    for r in range(8):
+        row = ', '.join('%3d' % v for v in values[r * 8:r * 8 + 8])
+        rows.append('      %s,' % row)
+    return '\n'.join(rows)
+
+
+def write_params(path, params):
+    """Write `params` rounded to integers as a python module to `path`"""
+
+    params = [int(round(x)) for x in params]
+    get = lambda name: params[SLICES[name]]
+
+    lines = ['"""Evaluation parameters tuned by `smash.tune`"""', '']
+    lines.append('MAT_SCORES = {')
+    for p, v in zip('pnbrq', get('material')):
+        lines.append("    '%s': %d," % (p, v))
+    lines.append('    }')
+    for name, table in (('pst_mg', 'PST_MG'), ('pst_eg', 'PST_EG')):
+        values = get(name)
+        lines += ['', '%s = {' % table]
+        for t, p in enumerate('pnbrqk'):
+            pst = [values[t * 64 + (sq ^ 56)] for sq in range(64)]
+            lines.append("    '%s': [" % p)
+            lines.append(_format_table(pst).rstrip(',') + '],')
+        lines.append('    }')
+
+    mg, eg = get('pawns_mg'), get('pawns_eg')
+    lines.append('')
+    for i, name in enumerate(['DOUBLED_PAWN', 'ISOLATED_PAWN', 'BACKWARD_PAWN']):
+        lines.append('%s = (%d, %d)' % (name, mg[i], eg[i]))
+    lines.append('PASSED_PAWN_MG = %r' % mg[3:])
+    lines.append('PASSED_PAWN_EG = %r' % eg[3:])
+    lines.append('PAWN_SHIELD = %r' % get('shield'))
+
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def _sigmoid(scores, scale):
+    return 1 / (1 + np.exp(-scale * scores))
+
+
+def _batches(records, batch_size, rng=None):
+    """The minibatches of `records` as ``positions, results``
+
+    The batches are contiguous slices of the records, taken in a random
+    order when `rng` is given.
+
+    """
+    starts = np.arange(0, len(records), batch_size)
+    if rng is not None:
+        rng.shuffle(starts)
+    for start in starts:
+        batch = records[start:start + batch_size]
+        yield np.asarray(batch['board']), batch['result'] / 2.0
+
+
+def error(records, params, scale, batch_size=8192):
+    """The mean squared error of the evaluation over `records`"""
+
+    total = 0.0
+    for positions, results in _batches(records, batch_size):
+        scores = features(positions).dot(params)
+        total += ((results - _sigmoid(scores, scale)) ** 2).sum()
+    return total / len(records)
+
+
+def fit_scale(records, params, batch_size=8192, lo=0.0, hi=0.1, steps=20):
+    """The scale of the sigmoid that minimizes the error of `params`
+
+    The scale is found by a golden section search over [`lo`, `hi`] on the
+    first positions of `records`.
+
+    """
+    sample = records[:16 * batch_size]
+    ratio = (5 ** 0.5 - 1) / 2
+    for _ in range(steps):
+        a = hi - ratio * (hi - lo)
+        b = lo + ratio * (hi - lo)
+        if error(sample, params, a, batch_size) < error(sample, params, b, batch_size):
+            hi = b
+        else:
+            lo = a
+    return (lo + hi) / 2
+
+
+def tune(records, params, scale, epochs=10, batch_size=8192, rate=0.1,
+         seed=0, cb_epoch=None):
+    """Tune `params` over `records`
+
+    The learning `rate` is in the units of the parameters (tenths of a
+    pawn). `cb_epoch` is called after each epoch with the epoch number and
+    the mean error of its minibatches.
+
+    Returns the tuned parameters.
+
+    """
+    params = np.array(params, dtype=np.float64)
+    rng = np.random.RandomState(seed)
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    m = np.zeros_like(params)
+    v = np.zeros_like(params)
+    step = 0
+
+    for epoch in range(1, epochs + 1):
+        total = 0.0
+        for positions, results in _batches(records, batch_size, rng):
+            x = features(positions)
+            p = _sigmoid(x.dot(params), scale)
+            diff = p - results
+            total += (diff ** 2).sum()
+
+            grad = x.T.dot(diff * p * (1 - p)) * (2 * scale / len(results))
+            grad[FIXED] = 0
+
+            step += 1
+            m = beta1 * m + (1 - beta1) * grad
+            v = beta2 * v + (1 - beta2) * grad ** 2
+            m_hat = m / (1 - beta1 ** step)
+            v_hat = v / (1 - beta2 ** step)
+            params -= rate * m_hat / (np.sqrt(v_hat) + eps)
+
+        if cb_epoch is not None:
+            cb_epoch(epoch, total / len(records))
+
+    return params
@@ -0,0 +1,69 @@
+import unittest
+from smash.board import Board, START_POSITION
+from smash.bitboard import BitBoard
+from smash.perft import perft
+
+
+# positions from docs/perft.rst with the expected number of nodes
+perft_fixtures = [
+    (START_POSITION, [20, 400, 8902]),
+    ('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     [48, 2039]),
+    ('8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', [14, 191, 2812]),
+    ('rnbqkb1r/pp1p1ppp/2p5/4P3/2B5/8/PPP1NnPP/RNBQK2R w KQkq - 0 6',
+     [42, 1352]),
+    ]
+
+
+class BitBoardPerftTest(unittest.TestCase):
+    def test_perft(self):
+        for fen, results in perft_fixtures:
+            for depth, expected in enumerate(results, 1):
+                r = perft(BitBoard(fen), depth, 0)
+                self.assertEquals(r, expected,
+                                  msg='%s at depth %s: %s != %s' % (fen, depth, r, expected))
+
+    def test_parity(self):
+        """Legal moves must be the same of `Board` in every node"""
+
+        def walk(board, bitboard, depth):
+            moves = sorted(board.legal_moves())
+            self.assertEquals(sorted(bitboard.legal_moves()), moves,
+                              msg=board.fen())
+            self.assertEquals(bitboard.checked, board.checked, msg=board.fen())
+            if depth == 1:
+                return
+            for m in moves:
+                with board.moving(m):
+                    with bitboard.moving(m):
+                        walk(board, bitboard, depth - 1)
+
+        for fen, _ in perft_fixtures:
+            walk(Board(fen), BitBoard(fen), 2)
+
+
+class BitBoardAttackTest(unittest.TestCase):
+    fixtures = [
+        'k7/8/8/8/8/8/1p6/K7 w - - 0 1',
+        'k7/8/8/8/8/2b5/8/K7 w - - 0 1',
+        'k7/8/8/8/8/q7/8/K7 w - - 0 1',
+        'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+        '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+        ]
+
+    def test_can_attack(self):
+        for fen in self.fixtures:
+            board, bitboard = Board(fen), BitBoard(fen)
+            for stm in 'wb':
+                for sq in range(64):
+                    self.assertEquals(bitboard.can_attack(stm, sq),
+                                      board.can_attack(stm, sq),
+                                      msg='%s %s %s' % (fen, stm, sq))
+
+    def test_undo(self):
+        b = BitBoard('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1')
+        bb = dict(b._bb)
+        for m in b.gen_moves():
+            with b.moving(m):
+                pass
+            self.assertEquals(b._bb, bb)
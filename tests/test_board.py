@@ -116,6 +116,24 @@ class BoardMoveTest(unittest.TestCase):
             self.assertEquals(r, start_fen,
                               msg='Failed at n. %s:\n%r != %r' % (i, r, start_fen))
 
+    def test_long_history(self):
+        b = Board()
+        moves = ['g1f3', 'g8f6', 'f3g1', 'f6g8'] * 200
+        for m in moves:
+            b.move(Move.from_string(b, m))
+        self.assertEquals(b.hashkey, Board().hashkey)
+        for m in moves:
+            b.undo()
+        self.assertEquals(b.fen(), START_POSITION)
+
+    def test_castling_rights(self):
+        b = Board('r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1')
+        self.assertEquals(b.castling_rights, 15)
+        b.move(Move.from_string(b, 'a1a8'))
+        self.assertEquals(b.castling, {'K': 1, 'Q': 0, 'k': 1, 'q': 0})
+        b.undo()
+        self.assertEquals(b.castling_rights, 15)
+
 
 class BoardCheckTest(unittest.TestCase):
     def test_check_status(self):
@@ -131,3 +149,90 @@ class BoardLegalTest(unittest.TestCase):
             b = Board(fen)
             self.assertEquals(b.is_legal(), legal,
                               msg='Failed at n. %s\n%s (exp: %s)' % (i, fen, legal))
+
+
+class BoardHashTest(unittest.TestCase):
+    def test_stable_key(self):
+        self.assertEquals(Board().hashkey, 7319630636217560020)
+
+    def test_move_undo(self):
+        for i, (start_fen, move, end_fen) in enumerate(move_fixtures, 1):
+            b = Board(start_fen)
+            b.debug = True
+            b.move(move)
+            self.assertEquals(b.hashkey, Board(end_fen).hashkey,
+                              msg='Failed at n. %s' % i)
+            b.undo()
+            self.assertEquals(b.hashkey, Board(start_fen).hashkey,
+                              msg='Failed at n. %s' % i)
+
+    def test_transposition(self):
+        b1 = Board()
+        for m in ['g1f3', 'g8f6', 'b1c3']:
+            b1.move(Move.from_string(b1, m))
+
+        b2 = Board()
+        for m in ['b1c3', 'g8f6', 'g1f3']:
+            b2.move(Move.from_string(b2, m))
+
+        self.assertEquals(b1.hashkey, b2.hashkey)
+        self.assertNotEquals(b1.hashkey, Board().hashkey)
+
+    def test_null_move(self):
+        fen = 'rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 3'
+        b = Board(fen)
+        b.debug = True
+        key = b.hashkey
+        with b.moving_null():
+            self.assertEquals(b.fen(), 'rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR w KQkq - 1 4')
+            self.assertEquals(b.hashkey, Board(b.fen()).hashkey)
+            self.assertEquals(b.last_move, 0)
+        self.assertEquals(b.fen(), fen)
+        self.assertEquals(b.hashkey, key)
+
+    def test_en_passant(self):
+        # the en passant square is hashed only when a pawn can capture
+        b = Board()
+        b.debug = True
+        b.move(Move.from_string(b, 'e2e4'))
+        self.assertEquals(b.hashkey, Board(b.fen().replace(' e3 ', ' - ')).hashkey)
+
+        fen = 'rnbqkbnr/ppp1pppp/8/8/3p4/8/PPPPPPPP/RNBQKBNR w KQkq - 0 3'
+        b = Board(fen)
+        b.debug = True
+        b.move(Move.from_string(b, 'e2e4'))
+        self.assertNotEquals(b.hashkey, Board(b.fen().replace(' e3 ', ' - ')).hashkey)
+        b.move(Move.from_string(b, 'd4e3'))
+        b.undo()
+        b.undo()
+        self.assertEquals(b.hashkey, Board(fen).hashkey)
+
+    def test_history_keys(self):
+        # the keys don't overflow the history (64 bits on every platform)
+        b = Board()
+        keys = [b.hashkey]
+        for m in ['g1f3', 'g8f6', 'f3g1', 'f6g8'] * 200:
+            b.move(Move.from_string(b, m))
+            keys.append(b.hashkey)
+        for key in reversed(keys[:-1]):
+            b.undo()
+            self.assertEquals(b.hashkey, key)
+
+
+class BoardPiecesTest(unittest.TestCase):
+    def assertPieces(self, b):
+        for side in 'wb':
+            squares = [sq for sq, p in enumerate(b.raw)
+                       if p != ' ' and (p.isupper() == (side == 'w'))]
+            self.assertItemsEqual(b.pieces(side), squares)
+            king = {'w': 'K', 'b': 'k'}[side]
+            self.assertEquals(b.raw[b.king_square(side)], king)
+
+    def test_move_undo(self):
+        for i, (start_fen, move, _) in enumerate(move_fixtures, 1):
+            b = Board(start_fen)
+            self.assertPieces(b)
+            b.move(move)
+            self.assertPieces(b)
+            b.undo()
+            self.assertPieces(b)
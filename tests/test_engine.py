@@ -0,0 +1,165 @@
+import os
+import multiprocessing
+import threading
+import time
+import unittest
+from smash.board import Board
+from smash.engine import Engine, mate_score, CHECK_NODES
+from smash.timeman import TimeManager, MOVE_OVERHEAD
+from smash.move import Move
+from smash.epd import EPDSuite
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'fixtures')
+
+
+class EngineMateTest(unittest.TestCase):
+    fixtures = [
+        # mate in 1
+        ('1kqr4/2n2r2/1Np3pp/2p1pp2/4P3/Q2PP3/P5PP/1R4K1 w - - 0 1', 2, 'b6d7', 1),
+        # mate in 2
+        ('1B1Q1R2/8/qNrn3p/2p1rp2/Rn3k1K/8/5P2/bbN4B w - - 0 1', 3, 'd8f6', 2),
+        ('1B2K3/p2p1ppQ/N3k3/P1R1p2N/3p1b2/3P2p1/6P1/8 w - - 0 1', 3, 'c5b5', 2),
+        ]
+
+    def test_mates(self):
+        for fen, depth, expected, moves in self.fixtures:
+            engine = Engine(depth=depth)
+            board = Board(fen)
+            move, score = engine.bestmove(board)
+            self.assertEquals(move, Move.from_string(board, expected), msg=fen)
+            self.assertEquals(score, -mate_score(2 * moves), msg=fen)
+            if moves > 1:
+                self.assertTrue(engine.stat.cutoffs > 0)
+
+    def test_mate_suite(self):
+        with open(os.path.join(FIXTURES, 'mateIn2.epd')) as f:
+            suite = EPDSuite(f)._suite[:6]
+        for fen, moves in suite:
+            engine = Engine(depth=4)
+            move, score = engine.bestmove(Board(fen))
+            self.assertIn(move, moves, msg=fen)
+            self.assertEquals(score, -mate_score(4), msg=fen)
+
+
+class EngineLimitsTest(unittest.TestCase):
+    fen = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+
+    def test_iterative_deepening(self):
+        infos = []
+        engine = Engine()
+        engine.set_cb_info(lambda **kwargs: infos.append(kwargs))
+        move, score = engine.bestmove(Board(self.fen), depth=3)
+        self.assertEquals([x['depth'] for x in infos], [1, 2, 3])
+        self.assertEquals(infos[-1]['pv'][0], move)
+        self.assertPV(Board(self.fen), infos[-1]['pv'])
+
+    def assertPV(self, board, pv):
+        for m in pv:
+            self.assertIn(m, board.legal_moves())
+            board.move(m)
+
+    def test_pv(self):
+        board = Board(self.fen)
+        engine = Engine()
+        move, score = engine.bestmove(board, depth=4)
+        pv = engine.pv
+        self.assertTrue(len(pv) > 1)
+        self.assertEquals(pv[0], move)
+        self.assertEquals(engine.ponder_move(board, move), pv[1])
+        self.assertPV(board, pv)
+
+    def test_pv_warm_table(self):
+        # the transposition table doesn't cut the principal variation
+        engine = Engine()
+        for _ in range(2):
+            engine.bestmove(Board(self.fen), depth=4)
+            self.assertTrue(len(engine.pv) >= 4, engine.pv)
+            self.assertPV(Board(self.fen), engine.pv)
+
+    def test_multipv(self):
+        infos = []
+        engine = Engine(multipv=3)
+        engine.set_cb_info(lambda **kwargs: infos.append(kwargs))
+        move, score = engine.bestmove(Board(self.fen), depth=3)
+
+        self.assertEquals([(x['depth'], x['multipv']) for x in infos],
+                          [(d, k) for d in (1, 2, 3) for k in (1, 2, 3)])
+        lines = infos[-3:]
+        self.assertEquals(lines[0]['pv'][0], move)
+        self.assertEquals(lines[0]['score'], score)
+        self.assertEquals(len(set(x['pv'][0] for x in lines)), 3)
+        scores = [x['score'] for x in lines]
+        self.assertEquals(scores, sorted(scores, reverse=True))
+        for x in lines:
+            self.assertPV(Board(self.fen), x['pv'])
+
+        # full lines with the table filled by a previous search too
+        infos[:] = []
+        engine.bestmove(Board(self.fen), depth=3)
+        for x in infos:
+            self.assertTrue(len(x['pv']) >= x['depth'], x['pv'])
+
+        # the best move of a single pv search is one of the lines (the
+        # windows differ so the pruning and the scores can differ too)
+        single, _ = Engine().bestmove(Board(self.fen), depth=3)
+        self.assertIn(single, [x['pv'][0] for x in lines])
+
+    def test_nodes(self):
+        engine = Engine()
+        move, score = engine.bestmove(Board(self.fen), nodes=5000)
+        self.assertIsNotNone(move)
+        self.assertTrue(engine.stat.nodes < 5000 + CHECK_NODES)
+
+    def test_movetime(self):
+        engine = Engine()
+        t = time.time()
+        move, score = engine.bestmove(Board(self.fen), movetime=300)
+        self.assertIsNotNone(move)
+        self.assertTrue(time.time() - t < 1.5)
+
+    def test_ponder(self):
+        ponderhit = threading.Event()
+        threading.Timer(1, ponderhit.set).start()
+        engine = Engine()
+        t = time.time()
+        move, score = engine.bestmove(Board(self.fen), ponder=ponderhit,
+                                      wtime=1000, btime=1000)
+        # the clock starts at the ponderhit
+        self.assertTrue(1 < time.time() - t < 2)
+        self.assertIsNotNone(engine.ponder_move(Board(self.fen), move))
+
+    def test_time_manager(self):
+        tm = TimeManager('b', wtime=1000, btime=60000, binc=1000, movestogo=20)
+        self.assertTrue(2 < tm.soft < 4)
+        self.assertTrue(tm.soft < tm.hard <= 30)
+        self.assertFalse(TimeManager('w', infinite=True).limited)
+        self.assertEquals(TimeManager(movetime=1000).hard, 1 - MOVE_OVERHEAD)
+
+    def test_selective_search(self):
+        fen = 'r1bq1rk1/pp2ppbp/2np1np1/8/3NP3/2N1BP2/PPPQ2PP/R3KB1R w KQ - 0 1'
+        board = Board(fen)
+        engine = Engine()
+        engine.bestmove(board, depth=5)
+        self.assertTrue(engine.stat.pruned > 0)
+        self.assertTrue(engine.stat.reductions > 0)
+        nodes = engine.stat.nodes
+
+        for name in ('NullMove', 'LMR', 'Futility', 'ReverseFutility',
+                     'MateDistancePruning'):
+            engine.set_option(name, 'false')
+        engine.new_game()
+        engine.bestmove(board, depth=5)
+        self.assertEquals(engine.stat.pruned, 0)
+        self.assertEquals(engine.stat.reductions, 0)
+        self.assertTrue(engine.stat.nodes > nodes)
+        self.assertEquals(board.fen(), fen)
+
+    def test_threads(self):
+        board = Board(self.fen)
+        engine = Engine(threads=3)
+        move, score = engine.bestmove(board, depth=3)
+        self.assertIn(move, board.legal_moves())
+        self.assertTrue(engine.stat.nodes > 0)
+        self.assertEquals(multiprocessing.active_children(), [])
+        self.assertEquals(board.fen(), self.fen)
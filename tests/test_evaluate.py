@@ -1,6 +1,11 @@
 import unittest
 from smash.board import Board
-from smash.evaluate import evaluate_material
+from smash.bitboard import BitBoard
+from smash.move import Move
+from smash.engine import Engine, Stat
+from smash.evaluate import (evaluate, evaluate_material, evaluate_pawns,
+                             evaluate_batch, compute_psq, EvalCache, PawnTable,
+                             PHASE_TOTAL)
 
 
 class EvaluateMaterialTest(unittest.TestCase):
@@ -17,3 +22,184 @@ class EvaluateMaterialTest(unittest.TestCase):
         for fen, expected in self.fixtures:
             b = Board(fen=fen)
             self.assertEquals(evaluate_material(b.raw), expected)
+
+
+class EvaluateTest(unittest.TestCase):
+    fen = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+
+    def test_symmetry(self):
+        self.assertEquals(evaluate(Board()), 0)
+        self.assertEquals(Board().psq, (0, 0, PHASE_TOTAL))
+        # the same position with the colors swapped
+        b = Board('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1')
+        m = Board('rnbqkbnr/pppp1ppp/8/4p3/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1')
+        self.assertTrue(evaluate(b) < 0)
+        self.assertEquals(evaluate(b), evaluate(m))
+
+    def test_mirrored(self):
+        # the same scores with the colors swapped, also when the blend of
+        # the midgame and endgame scores is not an integer
+        def mirror(fen):
+            pieces, stm, castling, ep, rule50, movecnt = fen.split()
+            pieces = '/'.join(reversed(pieces.split('/'))).swapcase()
+            stm = 'b' if stm == 'w' else 'w'
+            castling = ''.join(sorted(castling.swapcase())) if castling != '-' else '-'
+            if ep != '-':
+                ep = ep[0] + {'3': '6', '6': '3'}[ep[1]]
+            return ' '.join([pieces, stm, castling, ep, rule50, movecnt])
+
+        fens = []
+        b = Board()
+        for m in ['e2e4', 'c7c5', 'g1f3', 'd7d6', 'd2d4', 'c5d4', 'f3d4',
+                  'g8f6', 'b1c3', 'a7a6', 'c1g5', 'e7e6', 'f2f4', 'f8e7']:
+            b.move(Move.from_string(b, m))
+            fens.append(b.fen())
+        fens += EvaluateBatchTest.fens + [
+            'r1b1k2r/pp2bppp/2n1pn2/8/3P4/2N2N2/PP3PPP/R1B1KB1R w KQkq - 0 9',
+            '2r3k1/pp3ppp/4pn2/8/3P4/5N2/PP3PPP/2R3K1 b - - 0 20',
+            '6k1/pp3ppp/4b3/8/3P4/5N2/PP3PPP/6K1 w - - 0 30',
+            ]
+        blends = 0
+        for fen in fens:
+            b, m = Board(fen), Board(mirror(fen))
+            self.assertEquals(evaluate(b), evaluate(m), msg=fen)
+            self.assertEquals(list(evaluate_batch([b, m])),
+                              [evaluate(b) * (1 if b.stm == 'w' else -1),
+                               evaluate(m) * (1 if m.stm == 'w' else -1)])
+            mg, eg, phase = b.psq
+            blends += (mg * phase + eg * (PHASE_TOTAL - phase)) % PHASE_TOTAL != 0
+        self.assertTrue(blends > 0)
+
+    def test_tapered(self):
+        # only kings and pawns: the endgame scores
+        b = Board('8/4k3/8/8/8/8/4PK2/8 w - - 0 1')
+        mg, eg, phase = b.psq
+        self.assertEquals(phase, 0)
+        self.assertEquals(evaluate(b), eg + evaluate_pawns(b.raw)[1])
+        self.assertNotEquals(mg, eg)
+
+    def test_incremental(self):
+        # the running totals and the pawn key match a from scratch
+        # computation after every move and undo (castling, promotions and
+        # en passant included)
+        def walk(b, depth):
+            self.assertEquals(b.psq, compute_psq(b.raw), msg=b.fen())
+            self.assertEquals(b.pawnkey, b._compute_pawnkey(), msg=b.fen())
+            if not depth:
+                return
+            for m in b.legal_moves():
+                with b.moving(m):
+                    walk(b, depth - 1)
+            self.assertEquals(b.psq, compute_psq(b.raw), msg=b.fen())
+
+        for board_class in (Board, BitBoard):
+            for fen in (self.fen, '8/2P2k2/8/3pP3/8/8/5K2/8 w - d6 0 1'):
+                walk(board_class(fen), 2)
+
+
+class EvaluatePawnsTest(unittest.TestCase):
+    fixtures = [
+        # isolated and passed
+        ('8/4k3/8/8/8/8/4PK2/8 w - - 0 1', (-1, 0)),
+        # doubled and isolated
+        ('6k1/8/8/3p4/8/2P5/P1P5/6K1 w - - 0 1', (-3, -3)),
+        # passed (d4) and backward (e3)
+        ('4k3/8/8/5p2/3P4/4P3/8/4K3 w - - 0 1', (1, 2)),
+        ('4k3/8/8/3p4/3P4/8/8/4K3 w - - 0 1', (0, 0)),
+        ]
+
+    def test_fixtures(self):
+        for fen, expected in self.fixtures:
+            self.assertEquals(tuple(evaluate_pawns(Board(fen).raw)[:2]),
+                              expected, msg=fen)
+
+    def test_shield(self):
+        b = Board('6k1/5ppp/8/8/8/8/5PPP/6K1 w - - 0 1')
+        scores = evaluate_pawns(b.raw)
+        self.assertEquals(scores[2 + 6], 6)
+        self.assertEquals(scores[2:10], scores[10:])
+        # a king left without pawns in front
+        sheltered = Board('3r2k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1')
+        exposed = Board('3r2k1/5ppp/8/8/8/8/5PPP/1K1R4 w - - 0 1')
+        self.assertTrue(evaluate(exposed) < evaluate(sheltered))
+
+    def test_table(self):
+        table = PawnTable(1)
+        b = Board(EvaluateTest.fen)
+        self.assertIsNone(table.probe(b.pawnkey))
+        score = evaluate(b)
+        self.assertEquals(evaluate(b, pawns=table), score)
+        self.assertEquals(table.probe(b.pawnkey), evaluate_pawns(b.raw))
+        self.assertEquals(evaluate(b, pawns=table), score)
+        # the key doesn't change with the pieces
+        with b.moving(b.legal_moves()[0]):
+            self.assertEquals(b.pawnkey, Board(EvaluateTest.fen).pawnkey)
+
+
+class EvaluateBatchTest(unittest.TestCase):
+    fens = [
+        EvaluateTest.fen,
+        '8/2P2k2/8/3pP3/8/8/5K2/8 w - d6 0 1',
+        '4k3/8/3p4/2p1p3/2P5/1P2P3/8/4K3 b - - 0 1',
+        '3r2k1/5ppp/8/8/8/8/5PPP/1K1R4 w - - 0 1',
+        ]
+
+    def test_children(self):
+        # the children as packed by the board and their scores (castling,
+        # promotions and en passant included)
+        for board_class in (Board, BitBoard):
+            for fen in self.fens:
+                b = board_class(fen)
+                moves = b.legal_moves()
+                children = b.pack_moves(moves)
+                expected = []
+                for i, m in enumerate(moves):
+                    with b.moving(m):
+                        self.assertEquals(list(children[i]), list(b.packed))
+                        score = evaluate(b)
+                        expected.append(score if b.stm == 'w' else -score)
+                xside = 'b' if b.stm == 'w' else 'w'
+                self.assertEquals(list(evaluate_batch(children, xside)),
+                                  expected, msg=fen)
+
+    def test_boards(self):
+        boards = [Board(fen) for fen in self.fens]
+        self.assertEquals(list(evaluate_batch(boards)),
+                          [evaluate(b) if b.stm == 'w' else -evaluate(b)
+                           for b in boards])
+
+    def test_search(self):
+        # the same search, with the children before the horizon evaluated
+        # in batches
+        results = []
+        for batch_eval in (False, True):
+            engine = Engine(batch_eval=batch_eval)
+            move, score = engine.bestmove(Board(EvaluateTest.fen), depth=3)
+            results.append((move, score, engine.stat.nodes))
+        self.assertEquals(results[0], results[1])
+
+
+class EvalCacheTest(unittest.TestCase):
+    def test_cache(self):
+        stat = Stat()
+        cache = EvalCache(1, stat)
+        self.assertTrue(len(cache) * EvalCache.ENTRY_SIZE <= 1024 * 1024)
+        b = Board(EvaluateTest.fen)
+        score = evaluate(b)
+        self.assertEquals(evaluate(b, cache), score)
+        self.assertEquals((stat.eval_hits, stat.eval_misses), (0, 1))
+        self.assertEquals(evaluate(b, cache), score)
+        self.assertEquals((stat.eval_hits, stat.eval_misses), (1, 1))
+
+        # a different position in the same slot replaces the entry
+        cache.store(b.hashkey + len(cache), 123)
+        self.assertIsNone(cache.probe(b.hashkey))
+        self.assertEquals(cache.probe(b.hashkey + len(cache)), 123)
+
+    def test_engine(self):
+        engine = Engine()
+        engine.set_option('EvalCache', '2')
+        self.assertEquals(engine.eval_cache.size_mb, 2)
+        engine.bestmove(Board(EvaluateTest.fen), depth=3)
+        self.assertTrue(engine.stat.eval_hits > 0)
+        self.assertTrue(0 < engine.stat.eval_hit_rate < 1)
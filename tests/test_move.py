@@ -0,0 +1,35 @@
+import unittest
+from smash.board import Board, SquareHelper
+from smash.move import Move, encode_move, move_src, move_dst, move_capture, move_promote
+
+
+class MoveEncodingTest(unittest.TestCase):
+    def test_fields(self):
+        sq = SquareHelper()
+        m = Move(sq.h7, sq.g8, capture='n', promote='Q')
+        self.assertEquals(m.src, sq.h7)
+        self.assertEquals(m.dst, sq.g8)
+        self.assertEquals(m.capture, 'n')
+        self.assertEquals(m.promote, 'Q')
+        self.assertIsNone(m.en_passant)
+
+        m = Move(sq.e2, sq.e4, en_passant=sq.e3)
+        self.assertEquals(m.en_passant, sq.e3)
+        self.assertIsNone(m.capture)
+        self.assertIsNone(m.promote)
+
+    def test_plain_int(self):
+        sq = SquareHelper()
+        m = encode_move(sq.e4, sq.d5, capture='p')
+        self.assertEquals(Move(sq.e4, sq.d5, capture='p'), m)
+        self.assertEquals(hash(Move(sq.e4, sq.d5, capture='p')), hash(m))
+        self.assertEquals(move_src(m), sq.e4)
+        self.assertEquals(move_dst(m), sq.d5)
+        self.assertEquals(move_capture(m), 'p')
+        self.assertEquals(move_promote(m), '')
+        self.assertEquals(Move.from_int(m).str_simple(), 'e4d5')
+
+    def test_from_string(self):
+        b = Board()
+        for m in b.legal_moves():
+            self.assertEquals(Move.from_string(b, m.str_simple()), m)
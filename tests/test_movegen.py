@@ -1,8 +1,8 @@
 import unittest
-from smash.board import Board, SquareHelper
+from smash.board import Board, SquareHelper, START_POSITION
 from smash.move import Move
 from smash.movegen import \
-    gen_moves, gen_pawn_moves, gen_knight_moves, gen_bishop_moves, \
+    gen_moves, gen_legal_moves, gen_captures, gen_quiets, gen_pawn_moves, gen_knight_moves, gen_bishop_moves, \
     gen_rook_moves, gen_queen_moves, gen_king_moves
 
 
@@ -247,3 +247,50 @@ class MoveGenTest(unittest.TestCase):
                                Move(sq.g1, sq.h3),
                                Move(sq.g1, sq.f3),
                                ])
+
+
+class LegalMoveGenTest(unittest.TestCase):
+    fixtures = [
+        START_POSITION,
+        'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+        '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+        'rnbqkb1r/pp1p1ppp/2p5/4P3/2B5/8/PPP1NnPP/RNBQK2R w KQkq - 0 6',
+        'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+        # en passant capture discovering a check on the king rank
+        '8/8/8/K2pP2r/8/8/8/7k w - d6 0 1',
+        # en passant capture of the checking pawn
+        '8/8/8/2k5/3Pp3/8/8/4K3 b - d3 0 1',
+        # double check
+        '7k/8/8/8/8/8/1n6/r2K4 w - - 0 1',
+        # king can't step back on the line of the checking rook
+        '8/8/8/8/8/8/r3K3/7k w - - 0 1',
+        ]
+
+    def legal_moves(self, board):
+        moves = []
+        for m in gen_moves(board):
+            with board.moving(m):
+                if board.is_legal():
+                    moves.append(m)
+        return moves
+
+    def test_filtered_moves(self):
+        def walk(board, depth):
+            moves = self.legal_moves(board)
+            self.assertItemsEqual(gen_legal_moves(board), moves, msg=board.fen())
+            if depth > 1:
+                for m in moves:
+                    with board.moving(m):
+                        walk(board, depth - 1)
+
+        for fen in self.fixtures:
+            walk(Board(fen), 2)
+
+    def test_captures_and_quiets(self):
+        for fen in self.fixtures:
+            b = Board(fen)
+            captures = list(gen_captures(b))
+            quiets = list(gen_quiets(b))
+            self.assertItemsEqual(captures + quiets, gen_moves(b), msg=fen)
+            for m in quiets:
+                self.assertFalse(m >> 12 & 0xff, msg=fen)
@@ -0,0 +1,54 @@
+import unittest
+from smash.board import Board, SquareHelper, START_POSITION
+from smash.bitboard import BitBoard
+from smash.move import Move
+from smash.movegen import gen_legal_moves
+from smash.movepick import MovePicker, mvv_lva
+
+
+class MovePickerTest(unittest.TestCase):
+    fixtures = [
+        START_POSITION,
+        'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+        '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+        'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+        '8/8/8/K2pP2r/8/8/8/7k w - d6 0 1',
+        ]
+
+    def test_all_legal_moves(self):
+        for fen in self.fixtures:
+            for board_class in (Board, BitBoard):
+                b = board_class(fen)
+                moves = list(MovePicker(b))
+                self.assertEquals(len(moves), len(set(moves)))
+                self.assertItemsEqual(moves, gen_legal_moves(b))
+
+    def test_captures_first(self):
+        b = Board(self.fixtures[1])
+        moves = list(MovePicker(b))
+        captures = [m for m in moves if Move.from_int(m).capture]
+        self.assertEquals(moves[:len(captures)], captures)
+        scores = [mvv_lva(b, m) for m in captures]
+        self.assertEquals(scores, sorted(scores, reverse=True))
+
+    def test_captures_only(self):
+        b = Board(self.fixtures[1])
+        moves = list(MovePicker(b, captures_only=True))
+        self.assertTrue(moves)
+        self.assertTrue(all(Move.from_int(m).capture for m in moves))
+
+    def test_tt_move_and_killers(self):
+        b = Board()
+        sq = SquareHelper()
+        tt_move = Move(sq.g1, sq.f3)
+        killer = Move(sq.e2, sq.e4, en_passant=sq.e3)
+        moves = list(MovePicker(b, tt_move, killers=[killer, tt_move]))
+        self.assertEquals(moves[:2], [tt_move, killer])
+        self.assertEquals(len(moves), 20)
+
+    def test_illegal_tt_move(self):
+        b = Board()
+        sq = SquareHelper()
+        moves = list(MovePicker(b, Move(sq.e2, sq.e5),
+                                killers=[Move(sq.e7, sq.e5)]))
+        self.assertItemsEqual(moves, gen_legal_moves(b))
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+from smash.board import Board
+from smash.bitboard import BitBoard
+from smash.engine import Engine
+from smash.evaluate import evaluate, PSQ_MG
+from smash.nnue import NNUE
+from smash.tools.gennnue import gen_nnue
+
+
+class NNUETest(unittest.TestCase):
+    fen = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'test.nnue')
+        gen_nnue(self.path)
+        self.nnue = NNUE(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def psq_score(self, board):
+        # the scores the generated network reproduces
+        score = sum(PSQ_MG[board.raw[sq]][sq] for s in 'wb'
+                    for sq in board.pieces(s) if board.raw[sq] not in 'Kk')
+        return score if board.stm == 'w' else -score
+
+    def test_evaluate(self):
+        b = Board(self.fen)
+        b.set_nnue(self.nnue)
+        self.assertEquals(evaluate(b), self.psq_score(b))
+        b.set_nnue(None)
+        self.assertIsNone(b.accumulators)
+
+    def test_incremental(self):
+        # the accumulators match a refresh after every move and undo (king
+        # moves, castling, promotions and en passant included)
+        def walk(b, depth):
+            self.assertEquals(b.accumulators.tolist(),
+                              self.nnue.accumulators(b).tolist(), msg=b.fen())
+            self.assertEquals(evaluate(b), self.psq_score(b), msg=b.fen())
+            if not depth:
+                return
+            for m in b.legal_moves():
+                with b.moving(m):
+                    walk(b, depth - 1)
+
+        for board_class in (Board, BitBoard):
+            for fen in (self.fen, '8/2P2k2/8/3pP3/8/8/5K2/8 w - d6 0 1'):
+                b = board_class(fen)
+                b.set_nnue(self.nnue)
+                walk(b, 2)
+
+    def test_invalid_file(self):
+        path = os.path.join(self.tmpdir, 'invalid.nnue')
+        with open(path, 'wb') as f:
+            f.write('not a network')
+        self.assertRaises(ValueError, NNUE, path)
+
+    def test_engine(self):
+        engine = Engine()
+        engine.set_option('EvalFile', self.path)
+        self.assertIsNone(engine.nnue)
+        engine.set_option('UseNNUE', 'true')
+        self.assertEquals(engine.nnue.path, self.path)
+
+        board = Board(self.fen)
+        move, score = engine.bestmove(board, depth=2)
+        self.assertIs(board.nnue, engine.nnue)
+        self.assertIn(move, board.legal_moves())
+
+        engine.set_option('UseNNUE', 'false')
+        engine.bestmove(board, depth=2)
+        self.assertIsNone(board.nnue)
+
+        engine.set_option('EvalFile', os.path.join(self.tmpdir, 'missing'))
+        self.assertRaises(ValueError, engine.set_option, 'UseNNUE', 'true')
+        self.assertFalse(engine.config['nnue'])
+        self.assertIsNone(engine.nnue)
+
+        # a network in use is dropped with its option when its file fails
+        engine.set_option('EvalFile', self.path)
+        engine.set_option('UseNNUE', 'true')
+        self.assertRaises(ValueError, engine.set_option, 'EvalFile',
+                          os.path.join(self.tmpdir, 'missing'))
+        self.assertFalse(engine.config['nnue'])
+        self.assertIsNone(engine.nnue)
@@ -0,0 +1,91 @@
+import unittest
+from smash.board import Board, SquareHelper
+from smash.engine import Engine
+from smash.move import Move
+from smash.movepick import MovePicker, STAGE_KILLERS
+from smash.evaluate import INF
+from smash.ordering import MoveOrdering, see
+
+
+class MoveOrderingTest(unittest.TestCase):
+    def test_update(self):
+        sq = SquareHelper()
+        b = Board()
+        ordering = MoveOrdering()
+        e4 = Move(sq.e2, sq.e4, en_passant=sq.e3)
+        nf3 = Move(sq.g1, sq.f3)
+        d4 = Move(sq.d2, sq.d4, en_passant=sq.d3)
+
+        ordering.update(b, e4, 3, 2, [nf3])
+        ordering.update(b, d4, 2, 2, [])
+        self.assertEquals(ordering.get_killers(2), (d4, e4))
+        self.assertEquals(ordering.get_killers(3), (0, 0))
+
+        history = ordering.get_history('w')
+        self.assertEquals(history[sq.e2, sq.e4], 9)
+        self.assertEquals(history[sq.g1, sq.f3], -9)
+        self.assertEquals(history[sq.d2, sq.d4], 4)
+        self.assertEquals(ordering.get_history('b').any(), False)
+
+        # aging
+        ordering.new_search()
+        self.assertEquals(ordering.get_killers(2), (0, 0))
+        self.assertEquals(history[sq.e2, sq.e4], 4)
+
+        ordering.clear()
+        self.assertEquals(history.any(), False)
+
+    def test_counter_move(self):
+        sq = SquareHelper()
+        b = Board()
+        ordering = MoveOrdering()
+        e4 = Move(sq.e2, sq.e4, en_passant=sq.e3)
+        c5 = Move(sq.c7, sq.c5, en_passant=sq.c6)
+        b.move(e4)
+        ordering.update(b, c5, 1, 1, [])
+        self.assertEquals(ordering.get_counter(b.last_move), c5)
+        self.assertEquals(ordering.get_counter(0), 0)
+
+    def test_picker(self):
+        sq = SquareHelper()
+        b = Board()
+        ordering = MoveOrdering()
+        nf3 = Move(sq.g1, sq.f3)
+        a3 = Move(sq.a2, sq.a3)
+        ordering.update(b, a3, 4, 1, [])
+        picker = MovePicker(b, counter_move=nf3, history=ordering.get_history('w'))
+        moves = []
+        for m in picker:
+            moves.append(m)
+            if len(moves) == 1:
+                self.assertEquals(picker.stage, STAGE_KILLERS)
+        self.assertEquals(moves[:2], [nf3, a3])
+        self.assertEquals(len(moves), 20)
+
+    def test_first_cutoff_rate(self):
+        engine = Engine()
+        engine.bestmove(Board('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'), depth=3)
+        self.assertTrue(engine.stat.cutoffs > 0)
+        self.assertTrue(0 < engine.stat.first_cutoff_rate <= 1)
+
+    def test_see(self):
+        sq = SquareHelper()
+        rxd5 = Move(sq.d2, sq.d5, capture='p')
+        self.assertEquals(see(Board('k7/8/8/3p4/8/8/3R4/K7 w - - 0 1'), rxd5), 10)
+        self.assertEquals(see(Board('k7/8/4p3/3p4/8/8/3R4/K7 w - - 0 1'), rxd5), -40)
+        # x-rays through the capturing pieces
+        self.assertEquals(see(Board('k2r4/8/8/3p4/8/8/3R4/K2R4 w - - 0 1'), rxd5), 10)
+        self.assertEquals(see(Board('k2r4/3r4/8/3p4/8/8/3R4/K2R4 w - - 0 1'), rxd5), -40)
+        self.assertEquals(see(Board('k2r4/8/8/3p4/8/8/3Q4/K2R4 w - - 0 1'),
+                              Move(sq.d2, sq.d5, capture='p')), -20)
+        # en passant
+        self.assertEquals(see(Board('k7/8/8/3pP3/8/8/8/K7 w - d6 0 1'),
+                              Move(sq.e5, sq.d6, capture='p')), 10)
+        # the king does not capture a defended piece
+        self.assertEquals(see(Board('3r4/8/8/8/8/8/2k5/K2R4 b - - 0 1'),
+                              Move(sq.d8, sq.d1, capture='R')), 50)
+
+    def test_qsearch_defended_capture(self):
+        # the defended pawn is won with the rook behind
+        b = Board('k2r4/8/8/3p4/8/8/3R4/K2R4 w - - 0 1')
+        self.assertEquals(Engine()._qsearch(b, -INF, INF, 1), 50)
@@ -0,0 +1,213 @@
+import os
+import threading
+import time
+import unittest
+from Queue import Queue, Empty
+from StringIO import StringIO
+
+from smash.board import Board
+from smash.engine import Engine
+from smash.move import Move
+from smash.proto import UCIProtocol
+
+
+class UCIHarness(object):
+    """Drive an UCIProtocol over pipes"""
+
+    def __init__(self, engine):
+        r, self._w = os.pipe()
+        self.fin = os.fdopen(r, 'r')
+        r, w = os.pipe()
+        self.fout = os.fdopen(w, 'w')
+        self._out = os.fdopen(r, 'r')
+        self._lines = Queue()
+
+        self.proto = UCIProtocol(engine, fin=self.fin, fout=self.fout)
+        self._loop = threading.Thread(target=self.proto.loop)
+        self._loop.daemon = True
+        self._loop.start()
+        self._reader = threading.Thread(target=self._read)
+        self._reader.daemon = True
+        self._reader.start()
+
+    def _read(self):
+        for line in iter(self._out.readline, ''):
+            self._lines.put(line.strip())
+
+    def send(self, cmd):
+        os.write(self._w, cmd + '\n')
+
+    def expect(self, prefix, timeout=10):
+        """Wait a line starting with `prefix`, returns it with the latency"""
+
+        t = time.time()
+        while True:
+            line = self._lines.get(timeout=max(0, t + timeout - time.time()))
+            if line.startswith(prefix):
+                return line, time.time() - t
+
+    def close(self):
+        self.send('quit')
+        self._loop.join(10)
+        os.close(self._w)
+        self.fout.close()
+
+
+class UCIProtocolTest(unittest.TestCase):
+    def setUp(self):
+        self.uci = UCIHarness(Engine())
+
+    def tearDown(self):
+        self.uci.close()
+        self.assertFalse(self.uci._loop.is_alive())
+
+    def test_handshake(self):
+        self.uci.send('uci')
+        self.uci.expect('option name Hash')
+        self.uci.expect('uciok')
+        self.uci.send('isready')
+        self.uci.expect('readyok')
+
+    def test_go_depth(self):
+        self.uci.send('position startpos moves e2e4')
+        self.uci.send('go depth 2')
+        self.uci.expect('info depth 2')
+        self.uci.expect('bestmove')
+
+    def test_latency_during_search(self):
+        uci = self.uci
+        uci.send('position startpos')
+        uci.send('go infinite')
+        uci.expect('info depth 3')
+
+        uci.send('isready')
+        line, latency = uci.expect('readyok')
+        self.assertTrue(latency < 0.5, latency)
+
+        uci.send('stop')
+        line, latency = uci.expect('bestmove')
+        self.assertTrue(latency < 0.5, latency)
+
+        # a search that finishes early waits the stop in infinite mode
+        uci.send('position fen 1kqr4/2n2r2/1Np3pp/2p1pp2/4P3/Q2PP3/P5PP/1R4K1 w - - 0 1')
+        uci.send('go infinite')
+        uci.expect('info depth 1')
+        self.assertRaises(Empty, uci.expect, 'bestmove', 0.3)
+        uci.send('stop')
+        self.assertEquals(uci.expect('bestmove')[0], 'bestmove b6d7')
+
+    def test_ponderhit(self):
+        uci = self.uci
+        uci.send('uci')
+        uci.expect('option name Ponder type check default false')
+        uci.send('position startpos moves e2e4 e7e5')
+        uci.send('go ponder wtime 2000 btime 2000')
+        uci.expect('info depth 3')
+        # no time limit while pondering
+        self.assertRaises(Empty, uci.expect, 'bestmove', 2)
+        uci.send('ponderhit')
+        line, latency = uci.expect('bestmove')
+        self.assertTrue(latency < 1.5, latency)
+        self.assertTrue(line.split()[1])
+
+    def test_ponder_miss(self):
+        uci = self.uci
+        uci.send('position startpos moves e2e4 e7e5')
+        uci.send('go ponder wtime 2000 btime 2000')
+        uci.expect('info depth 2')
+        uci.send('stop')
+        uci.expect('bestmove')
+        uci.send('position startpos moves e2e4 d7d5')
+        uci.send('go depth 2')
+        uci.expect('info depth 1')
+        uci.expect('bestmove')
+        self.assertEquals(uci.proto.board.hashkey, Board(
+            'rnbqkbnr/ppp1pppp/8/3p4/4P3/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 2').hashkey)
+
+    def test_no_legal_moves(self):
+        uci = self.uci
+        moves = ['f2f3', 'e7e5', 'g2g4', 'd8h4']
+        uci.send('position startpos moves %s' % ' '.join(moves))
+        uci.send('go depth 2')
+        self.assertEquals(uci.expect('bestmove')[0], 'bestmove 0000')
+        uci.send('isready')
+        uci.expect('readyok')
+        expected = Board()
+        for m in moves:
+            expected.move(Move.from_string(expected, m))
+        self.assertEquals(uci.proto.board.hashkey, expected.hashkey)
+
+        # stalemate
+        uci.send('position fen 7k/5Q2/6K1/8/8/8/8/8 b - - 0 1')
+        uci.send('go depth 2')
+        self.assertEquals(uci.expect('bestmove')[0], 'bestmove 0000')
+
+    def test_quit_during_search(self):
+        self.uci.send('position startpos')
+        self.uci.send('go wtime 100000 btime 100000')
+        self.uci.send('quit')
+        self.uci._loop.join(1)
+        self.assertFalse(self.uci._loop.is_alive())
+
+
+class UCIPositionTest(unittest.TestCase):
+    def setUp(self):
+        self.proto = UCIProtocol(Engine(), fout=StringIO())
+
+    def position(self, *args):
+        self.proto.exec_command(('position', list(args)))
+        return self.proto.board
+
+    def assertPosition(self, board, *moves):
+        expected = Board()
+        for m in moves:
+            expected.move(Move.from_string(expected, m))
+        self.assertEquals(list(board.raw), list(expected.raw))
+        self.assertEquals(board.hashkey, expected.hashkey)
+
+    def test_incremental(self):
+        b = self.position('startpos', 'moves', 'e2e4', 'e7e5')
+        self.assertIs(self.position('startpos', 'moves', 'e2e4', 'e7e5', 'g1f3', 'b8c6'), b)
+        self.assertPosition(b, 'e2e4', 'e7e5', 'g1f3', 'b8c6')
+
+        # takeback and a different continuation reuse the board too
+        self.assertIs(self.position('startpos', 'moves', 'e2e4', 'e7e5', 'b1c3'), b)
+        self.assertPosition(b, 'e2e4', 'e7e5', 'b1c3')
+        self.assertIs(self.position('startpos'), b)
+        self.assertPosition(b)
+
+    def test_takeback_en_passant_square(self):
+        # a piece moved to the en passant square doesn't capture
+        moves = ['b1c3', 'a7a6', 'c3b5', 'd7d5', 'b5d6']
+        b = self.position('startpos', 'moves', *moves)
+        self.assertIs(self.position('startpos', 'moves', *moves[:4]), b)
+        self.assertPosition(b, *moves[:4])
+
+    def test_new_position(self):
+        b = self.position('startpos', 'moves', 'e2e4')
+        fen = 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1'
+        b2 = self.position('fen', *(fen.split() + ['moves', 'e7e5']))
+        self.assertIsNot(b2, b)
+        self.assertPosition(b2, 'e2e4', 'e7e5')
+
+    def test_game_over(self):
+        # a search at the end of the game leaves the board as it was
+        moves = ['f2f3', 'e7e5', 'g2g4', 'd8h4']
+        b = self.position('startpos', 'moves', *moves)
+        self.proto.exec_command(('go', ['depth', '2']))
+        self.proto.wait_search()
+        self.assertIn('bestmove 0000', self.proto.fout.getvalue())
+        self.assertIs(self.position('startpos', 'moves', *moves[:3]), b)
+        self.assertPosition(b, *moves[:3])
+        self.assertIs(self.position('startpos', 'moves', *moves), b)
+        self.assertPosition(b, *moves)
+
+    def test_out_of_sync(self):
+        # a board changed behind the protocol is rebuilt
+        b = self.position('startpos', 'moves', 'e2e4', 'e7e5')
+        b.undo()
+        b2 = self.position('startpos', 'moves', 'e2e4', 'e7e5', 'g1f3')
+        self.assertIsNot(b2, b)
+        self.assertPosition(b2, 'e2e4', 'e7e5', 'g1f3')
+        self.assertIs(self.position('startpos', 'moves', 'e2e4'), b2)
+        self.assertPosition(b2, 'e2e4')
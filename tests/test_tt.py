@@ -0,0 +1,78 @@
+import unittest
+from smash.board import Board
+from smash.engine import Engine, mate_score
+from smash.tt import (TranspositionTable, TT_EXACT, TT_LOWER, TT_UPPER,
+                      score_to_tt, score_from_tt)
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def test_probe_and_store(self):
+        tt = TranspositionTable(1)
+        key = Board().hashkey
+        self.assertIsNone(tt.probe(key, 1))
+        tt.store(key, 1234, 56, 3, TT_EXACT, 1)
+        self.assertEquals(tt.probe(key, 1), (1234, 56, 3, TT_EXACT))
+        self.assertIsNone(tt.probe(key ^ 1 << 40, 1))
+
+    def test_replacement(self):
+        tt = TranspositionTable(1)
+        n = len(tt) / 2
+        deep, shallow, other = 5, 5 + n, 5 + 2 * n
+        tt.store(deep, 1, 10, 6, TT_LOWER, 1)
+        tt.store(shallow, 2, 20, 2, TT_UPPER, 1)
+        tt.store(other, 3, 30, 1, TT_UPPER, 1)
+        # the deep entry survives, the shallow ones replace each other
+        self.assertEquals(tt.probe(deep, 1)[0], 1)
+        self.assertIsNone(tt.probe(shallow, 1))
+        self.assertEquals(tt.probe(other, 1)[0], 3)
+
+        # entries of older searches are replaced
+        tt.new_search()
+        tt.store(shallow, 2, 20, 2, TT_UPPER, 1)
+        self.assertIsNone(tt.probe(deep, 1))
+        self.assertEquals(tt.probe(shallow, 1)[0], 2)
+
+    def test_keep_move(self):
+        tt = TranspositionTable(1)
+        tt.store(7, 99, 10, 2, TT_LOWER, 1)
+        tt.store(7, 0, 5, 3, TT_UPPER, 1)
+        self.assertEquals(tt.probe(7, 1), (99, 5, 3, TT_UPPER))
+
+    def test_mate_scores(self):
+        score = -mate_score(5)
+        self.assertEquals(score_from_tt(score_to_tt(score, 3), 3), score)
+        # the same mate found 2 plies deeper is 2 plies farther
+        self.assertEquals(score_from_tt(score_to_tt(score, 3), 5),
+                          -mate_score(7))
+        self.assertEquals(score_from_tt(score_to_tt(-score, 3), 1),
+                          mate_score(3))
+        self.assertEquals(score_to_tt(123, 10), 123)
+
+    def test_hashfull(self):
+        tt = TranspositionTable(1)
+        self.assertEquals(tt.hashfull(), 0)
+        for key in range(500):
+            tt.store(key, 0, 0, 1, TT_EXACT, 1)
+        self.assertEquals(tt.hashfull(), 500)
+        tt.new_search()
+        self.assertEquals(tt.hashfull(), 0)
+
+    def test_size(self):
+        for size in (1, 4, 16):
+            tt = TranspositionTable(size)
+            nbytes = tt._keys.nbytes + tt._data.nbytes
+            self.assertTrue(size * 1024 * 1024 / 2 < nbytes <= size * 1024 * 1024)
+
+    def test_torn_entry(self):
+        tt = TranspositionTable(1)
+        tt.store(7, 99, -mate_score(3), 12, TT_LOWER, 1)
+        self.assertEquals(tt.probe(7, 1), (99, -mate_score(3), 12, TT_LOWER))
+        # data written by another process without its key
+        tt._data[14] ^= 1
+        self.assertIsNone(tt.probe(7, 1))
+
+    def test_engine_option(self):
+        engine = Engine()
+        engine.set_option('Hash', '4')
+        self.assertEquals(engine.config['hash'], 4)
+        self.assertEquals(engine.tt.size_mb, 4)
@@ -0,0 +1,103 @@
+import os
+import imp
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from smash import evaluate, tune
+from smash.board import Board
+from smash.evaluate import evaluate_batch
+
+
+class TuneTest(unittest.TestCase):
+    fens = [
+        'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+        '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+        'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+        '6k1/5ppp/8/2P5/8/1P6/5PPP/6K1 b - - 0 1',
+        ]
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def positions(self):
+        # the test positions and their children
+        positions = []
+        for fen in self.fens:
+            b = Board(fen)
+            positions.append(b.packed)
+            positions.extend(b.pack_moves(b.legal_moves()))
+        return np.array(positions, dtype=np.int8)
+
+    def test_parse_line(self):
+        fen = self.fens[0]
+        packed = list(Board(fen).packed)
+        self.assertEquals(tune.parse_line('%s c9 "1/2-1/2";' % fen), (packed, 1))
+        self.assertEquals(tune.parse_line('%s [1.0]' % fen), (packed, 2))
+        self.assertEquals(tune.parse_line('%s 0-1' % fen), (packed, 0))
+        self.assertIsNone(tune.parse_line('%s c9 "*";' % fen))
+        self.assertIsNone(tune.parse_line('8/8/8 w - - 0 1 1-0'))
+        # the move counters of a FEN are not results
+        self.assertIsNone(tune.parse_line(fen))
+        self.assertIsNone(tune.parse_line(fen.replace(' 0 1', ' 1 0')))
+        self.assertEquals(tune.parse_line('%s c9 "0.5";' % fen), (packed, 1))
+        self.assertEquals(tune.parse_line('%s [0]' % fen), (packed, 0))
+
+    def test_convert(self):
+        src = os.path.join(self.tmpdir, 'positions.epd')
+        dst = os.path.join(self.tmpdir, 'positions.packed')
+        with open(src, 'w') as f:
+            for fen, result in zip(self.fens, ['1-0', '0-1', '1/2-1/2', '1-0']):
+                f.write('%s c9 "%s";\n' % (fen, result))
+            f.write('invalid\n')
+        self.assertEquals(tune.convert(src, dst), 4)
+
+        records = tune.load(dst)
+        self.assertEquals(list(records['result']), [2, 0, 1, 2])
+        for i, fen in enumerate(self.fens):
+            self.assertEquals(list(records[i]['board']), list(Board(fen).packed))
+
+    def test_features(self):
+        # the linear model is the evaluation but for the rounding
+        positions = self.positions()
+        scores = tune.features(positions).dot(tune.get_params())
+        diff = scores - evaluate_batch(positions)
+        self.assertTrue(((diff > -1e-9) & (diff < 1)).all())
+
+    def test_write_params(self):
+        path = os.path.join(self.tmpdir, 'params.py')
+        tune.write_params(path, tune.get_params())
+        params = imp.load_source('params', path)
+        self.assertEquals(params.MAT_SCORES,
+                          dict((p, evaluate.MAT_SCORES[p]) for p in 'pnbrq'))
+        for name in ('PST_MG', 'PST_EG', 'DOUBLED_PAWN', 'ISOLATED_PAWN',
+                     'BACKWARD_PAWN', 'PASSED_PAWN_MG', 'PASSED_PAWN_EG',
+                     'PAWN_SHIELD'):
+            self.assertEquals(getattr(params, name), getattr(evaluate, name))
+
+    def test_tune(self):
+        # results drawn from an evaluation with stronger knights
+        positions = self.positions()
+        params = tune.get_params()
+        target = params.copy()
+        target[tune.SLICES['material']][1] += 20
+        x = tune.features(positions)
+        rng = np.random.RandomState(0)
+        records = np.zeros(len(positions), dtype=tune.RECORD)
+        records['board'] = positions
+        p = 1 / (1 + np.exp(-0.05 * x.dot(target)))
+        records['result'] = 2 * (rng.rand(len(positions)) < p)
+
+        scale = tune.fit_scale(records, params, 64)
+        self.assertTrue(0 < scale < 0.1)
+        tuned = tune.tune(records, params, scale, epochs=5, batch_size=64,
+                          rate=0.5)
+        self.assertLess(tune.error(records, tuned, scale),
+                        tune.error(records, params, scale))
+        self.assertEquals(tuned[0], params[0])
+        self.assertGreater(tuned[1], params[1])